@@ -0,0 +1,74 @@
+"""CPU cost of a check itself: dispatch, checker logic and result construction.
+
+The network is replaced by an in-process fake session that answers at once,
+so the numbers are the per-check overhead that remains on top of the I/O,
+in microseconds of CPU time per check and monitor type (best of --repeat).
+`run_check` is what the scheduler and the CLI run; `check_monitor` also
+builds the validated MonitorStatus.
+
+    python -m benchmarks.bench_checkers --checks 20000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from status.core import check_monitor, run_check
+
+
+class FakeResponse:
+    status = 200
+    headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return {"uptime": 42}
+
+    async def text(self):
+        return "OK"
+
+
+class FakeSession:
+    def get(self, url, **kwargs):
+        return FakeResponse()
+
+    head = get
+
+
+MONITORS = {
+    "url": {"name": "u", "type": "url", "url": "http://127.0.0.1/"},
+    "url_expect_status": {"name": "s", "type": "url", "url": "http://127.0.0.1/", "expect_status": [200, 204]},
+    "syncthing": {"name": "st", "type": "syncthing", "url": "http://127.0.0.1:8384", "api_key": "key"},
+}
+
+
+async def run(check, monitor: dict, checks: int) -> float:
+    session = FakeSession()
+    start = time.process_time()
+    for _ in range(checks):
+        await check(session, monitor)
+    return (time.process_time() - start) / checks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = {"checks": args.checks, "cpu_us_per_check": {}}
+    for label, monitor in MONITORS.items():
+        report["cpu_us_per_check"][label] = {
+            check.__name__: round(min(asyncio.run(run(check, monitor, args.checks)) for _ in range(args.repeat)), 2)
+            for check in (run_check, check_monitor)
+        }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare the single and batched ping engines on a synthetic loopback host list.
+
+Every 127.x.y.z address answers locally, so this measures the engine overhead:
+wall time and the peak number of open file descriptors during a cycle.
+ICMP sockets need root (pass --privileged) or a ping_group_range that
+includes the current user.
+
+    python -m benchmarks.bench_ping --hosts 2000 --privileged
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from status.core import check_monitor
+from status.ping import configure_ping
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+async def sample_fds(peak: dict):
+    while True:
+        peak["fds"] = max(peak["fds"], open_fds())
+        await asyncio.sleep(0.005)
+
+
+async def run_cycle(monitors, engine, args):
+    configure_ping({
+        "engine": engine,
+        "count": args.count,
+        "concurrency": args.concurrency,
+        "privileged": args.privileged,
+    })
+    peak = {"fds": open_fds()}
+    sampler = asyncio.create_task(sample_fds(peak))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(check_monitor(None, m) for m in monitors))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return {
+        "seconds": round(elapsed, 4),
+        "peak_fds": peak["fds"],
+        "ok": sum(1 for r in results if r.status == "OK"),
+        "errors": sum(1 for r in results if r.status == "Error"),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--privileged", action="store_true")
+    args = parser.parse_args()
+
+    monitors = [
+        {"name": f"host{i}", "host": f"127.0.{i // 250}.{i % 250 + 1}", "type": "ping", "timeout": 2}
+        for i in range(args.hosts)
+    ]
+    report = {"hosts": args.hosts, "count": args.count, "concurrency": args.concurrency}
+    for engine in ("single", "batch"):
+        report[engine] = await run_cycle(monitors, engine, args)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""Compare list-scan filtering with MonitorRegistry lookups.
+
+Builds a config of url monitors spread over types, hosts and tags and times
+the queries the web API runs per request, both as a linear scan over the
+monitor dicts and through the registry (cold and cached).
+
+    python -m benchmarks.bench_registry --monitors 50000
+"""
+import argparse
+import json
+import time
+
+from status.registry import MonitorRegistry
+
+TYPES = ("url", "ping", "command", "syncthing")
+
+
+def linear_filter(monitors, name=None, types=None, tags=None):
+    if name:
+        monitors = [m for m in monitors if m["name"] == name]
+    if types:
+        monitors = [m for m in monitors if m.get("type", "url") in types]
+    if tags:
+        monitors = [m for m in monitors if set(m.get("tags", ())) & set(tags)]
+    return monitors
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--monitors", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    monitors = [
+        {"name": f"m{i}", "type": TYPES[i % len(TYPES)], "url": f"http://host{i % 500}.example.com/",
+         "tags": [f"team{i % 20}"]}
+        for i in range(args.monitors)
+    ]
+    start = time.perf_counter()
+    registry = MonitorRegistry(monitors)
+    build = time.perf_counter() - start
+
+    queries = {
+        "name": {"name": "m4242"},
+        "type": {"types": ["ping"]},
+        "type_and_tag": {"types": ["url"], "tags": ["team3"]},
+    }
+    report = {"monitors": args.monitors, "registry_build_seconds": round(build, 4), "queries": {}}
+    for label, query in queries.items():
+        select = {"names": query.get("name"), "types": query.get("types"), "tags": query.get("tags")}
+
+        def cold():
+            registry._name_queries.clear()
+            registry._queries.clear()
+            registry.names(**select)
+
+        report["queries"][label] = {
+            "linear_us": round(timed(lambda: linear_filter(monitors, **query), args.repeat), 1),
+            "registry_cold_us": round(timed(cold, args.repeat), 1),
+            "registry_cached_us": round(timed(lambda: registry.names(**select), args.repeat * 100), 3),
+        }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
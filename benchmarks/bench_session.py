@@ -0,0 +1,80 @@
+"""Compare a fresh ClientSession per cycle with the shared, pooled session.
+
+Starts a local aiohttp server, runs several check cycles of url monitors
+against it and reports wall time and how many TCP connections the server
+accepted for each strategy.
+
+    python -m benchmarks.bench_session --monitors 200 --cycles 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from status.core import check_monitor
+from status.session import get_session, close_session
+
+
+async def start_server():
+    peers = set()
+
+    async def handle(request):
+        # Every new TCP connection shows up as a new client (host, port) pair.
+        peers.add(request.transport.get_extra_info("peername"))
+        return web.Response(text="OK")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, port, peers
+
+
+async def run_cycles(monitors, cycles, shared):
+    for _ in range(cycles):
+        if shared:
+            session = await get_session()
+            await asyncio.gather(*(check_monitor(session, m) for m in monitors))
+        else:
+            async with aiohttp.ClientSession() as session:
+                await asyncio.gather(*(check_monitor(session, m) for m in monitors))
+    if shared:
+        await close_session()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--monitors", type=int, default=200)
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    runner, port, peers = await start_server()
+    monitors = [
+        {"name": f"m{i}", "url": f"http://127.0.0.1:{port}/m{i}", "type": "url"}
+        for i in range(args.monitors)
+    ]
+
+    report = {"monitors": args.monitors, "cycles": args.cycles}
+    try:
+        for label, shared in (("per_cycle_session", False), ("shared_session", True)):
+            peers.clear()
+            start = time.perf_counter()
+            await run_cycles(monitors, args.cycles, shared)
+            report[label] = {
+                "seconds": round(time.perf_counter() - start, 4),
+                "connections": len(peers),
+            }
+    finally:
+        await runner.cleanup()
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
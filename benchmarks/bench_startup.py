@@ -0,0 +1,91 @@
+"""Startup time of a one-shot check: `status.py <name>` for a single url monitor.
+
+Starts the stub server, then runs the CLI `--repeat` times and reports the
+time from process start to the first line of output. One extra run under
+`python -X importtime` breaks the import time down by top-level package and
+lists the heavy optional dependencies that got imported anyway.
+
+    python -m benchmarks.bench_startup --repeat 20 --target 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from benchmarks.bench_suite import ROOT, percentile, start_stubs
+
+# Nothing in a one-shot url check needs these.
+UNWANTED = ("fastapi", "uvicorn", "starlette", "icmplib", "sqlite3")
+
+
+def time_to_first_line(command: list[str]) -> float:
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    proc.stdout.readline()
+    elapsed = time.perf_counter() - start
+    proc.stdout.read()
+    proc.wait()
+    return elapsed
+
+
+def import_times(command: list[str]) -> dict[str, float]:
+    """Cumulative import time in ms of every top-level package, from -X importtime."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], cwd=ROOT,
+                            capture_output=True, text=True).stderr
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative) / 1000)
+    return packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--target", type=float, default=150, help="Target time to first result in ms.")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list in the import breakdown.")
+    args = parser.parse_args()
+
+    stubs, port = start_stubs(0)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config_path = os.path.join(tmpdir, "config.yaml")
+            with open(config_path, "w") as f:
+                yaml.safe_dump({"monitors": [{"name": "web", "url": f"http://127.0.0.1:{port}/"}],
+                                "reload": {"enabled": False}}, f)
+            command = [sys.executable, "status.py", "--config", config_path, "web"]
+
+            time_to_first_line(command)  # warm the page cache and .pyc files
+            runs = [time_to_first_line(command) * 1000 for _ in range(args.repeat)]
+            packages = import_times(command)
+    finally:
+        stubs.terminate()
+
+    median = statistics.median(runs)
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.repeat,
+        "first_result_ms_p50": round(median, 1),
+        "first_result_ms_p90": round(percentile(runs, 90), 1),
+        "target_ms": args.target,
+        "within_target": median <= args.target,
+        "imports_ms": {name: round(ms, 1) for name, ms in
+                       sorted(packages.items(), key=lambda item: -item[1])[:args.top]},
+        "unwanted_imports": [name for name in UNWANTED if name in packages],
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Throughput benchmark for the console, follow and web paths against local stubs.
+
+Generates configs with the requested numbers of monitors (url and syncthing
+monitors against benchmarks.stubs, trivial shell commands and, with
+--mix ...,ping=<w>, loopback ping targets), runs every scenario in its own process and prints
+one JSON document with checks/sec, p50/p99 cycle time, peak RSS and peak
+file-descriptor count per scenario and size.
+
+    python -m benchmarks.bench_suite --sizes 100,1000,10000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("console", "follow", "web")
+
+
+def percentile(values: list, pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        monitor_type, _, weight = part.partition("=")
+        mix[monitor_type.strip()] = float(weight)
+    return mix
+
+
+def generate_config(size: int, port: int, mix: dict, latency: float, error_rate: float) -> dict:
+    total = sum(mix.values())
+    counts = {monitor_type: int(size * weight / total) for monitor_type, weight in mix.items()}
+    counts[next(iter(counts))] += size - sum(counts.values())
+
+    query = f"?latency={latency:g}&error={error_rate:g}"
+    monitors = []
+    for i in range(counts.get("url", 0)):
+        monitors.append({"name": f"url-{i}", "type": "url", "url": f"http://127.0.0.1:{port}/u{i}{query}", "timeout": 10})
+    for i in range(counts.get("syncthing", 0)):
+        monitors.append({"name": f"syncthing-{i}", "type": "syncthing", "url": f"http://127.0.0.1:{port}",
+                         "api_key": "bench"})
+    for i in range(counts.get("command", 0)):
+        monitors.append({"name": f"command-{i}", "type": "command", "command": "true", "shell": False})
+    for i in range(counts.get("ping", 0)):
+        monitors.append({"name": f"ping-{i}", "type": "ping", "host": f"127.{i // 62500 % 256}.{i // 250 % 250}.{i % 250 + 1}"})
+    return {"monitors": monitors, "http": {"limit": 200, "limit_per_host": 200}}
+
+
+def configure_from(config: dict):
+    from status.session import configure_session
+    from status.ping import configure_ping
+    from status.ssh import configure_ssh
+    from status.executor import configure_commands
+    from status.breaker import configure_breaker
+
+    configure_session(config.get("http"))
+    configure_ping(config.get("ping"))
+    configure_ssh(config.get("ssh"))
+    configure_commands(config.get("commands"))
+    configure_breaker(config.get("breaker"))
+
+
+async def scenario_follow(config_path: str, interval: float, duration: float, workers: int = 1) -> dict:
+    from status.core import get_config
+    from status.shard import make_scheduler
+    from status.session import close_session
+
+    config = get_config(config_path)
+    configure_from(config)
+    monitors = config["monitors"]
+    scheduler = make_scheduler(monitors, workers=workers, settings=config, interval=interval)
+    results = scheduler.store.subscribe()
+
+    start = time.monotonic()
+    await scheduler.start()
+    await scheduler.wait_ready()
+    first_round = time.monotonic() - start
+    await asyncio.sleep(max(0.0, duration - first_round))
+    elapsed = time.monotonic() - start
+    await scheduler.stop()
+    await close_session()
+
+    last_seen, periods, checks = {}, [], 0
+    while not results.empty():
+        result = results.get_nowait()
+        checks += 1
+        if result.name in last_seen:
+            periods.append(result.checked_at - last_seen[result.name])
+        last_seen[result.name] = result.checked_at
+    return {
+        "checks": checks,
+        "checks_per_sec": checks / elapsed,
+        "first_round_seconds": first_round,
+        "cycle_p50": percentile(periods, 50),
+        "cycle_p99": percentile(periods, 99),
+    }
+
+
+async def scenario_web(config_path: str, interval: float, requests: int, workers: int = 1) -> dict:
+    import aiohttp
+    import uvicorn
+    from types import SimpleNamespace
+    from status.core import get_config
+    from status.web import create_web_app
+    from status.shard import make_scheduler
+
+    config = get_config(config_path)
+    configure_from(config)
+    args = SimpleNamespace(down=False, up=False, monitor_name=None, monitor=None, tag=None, follow=False, interval=interval)
+    scheduler = make_scheduler(config["monitors"], workers=workers, settings=config, interval=interval)
+    app = create_web_app(config["monitors"], args, scheduler=scheduler)
+    results = app.state.scheduler.store.subscribe()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    start = time.monotonic()
+    latencies = []
+    async with aiohttp.ClientSession() as client:
+        # the API serves whatever is there, so wait for the first round here
+        await scheduler.wait_ready()
+        first_round = time.monotonic() - start
+        for _ in range(requests):
+            request_start = time.monotonic()
+            async with client.get(f"http://127.0.0.1:{port}/api/status") as response:
+                await response.read()
+                etag = response.headers.get("ETag")
+            latencies.append(time.monotonic() - request_start)
+        # polling dashboards revalidate; a 304 means nothing changed since their last copy
+        conditional, not_modified = [], 0
+        for _ in range(requests):
+            request_start = time.monotonic()
+            async with client.get(f"http://127.0.0.1:{port}/api/status", headers={"If-None-Match": etag}) as response:
+                await response.read()
+                if response.status == 304:
+                    not_modified += 1
+                else:
+                    etag = response.headers.get("ETag")
+            conditional.append(time.monotonic() - request_start)
+    elapsed = time.monotonic() - start
+    server.should_exit = True
+    await serve
+
+    return {
+        "checks": results.qsize(),
+        "checks_per_sec": results.qsize() / elapsed,
+        "first_round_seconds": first_round,
+        "request_p50": percentile(latencies, 50),
+        "request_p99": percentile(latencies, 99),
+        "conditional_p50": percentile(conditional, 50),
+        "not_modified_ratio": not_modified / requests if requests else 0,
+    }
+
+
+def measure(command: list[str]) -> dict:
+    """Run a child process and report its wall time, peak RSS, peak fd count and JSON output."""
+    start = time.monotonic()
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = []
+    reader = threading.Thread(target=lambda: output.append(proc.stdout.read()))
+    reader.start()
+
+    peak_fds = 0
+    while True:
+        # wait4 instead of poll() so we get this child's own resource usage
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        try:
+            peak_fds = max(peak_fds, len(os.listdir(f"/proc/{proc.pid}/fd")))
+        except OSError:
+            pass
+        time.sleep(0.01)
+    wall = time.monotonic() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    reader.join()
+    return {"wall_seconds": wall, "returncode": proc.returncode, "peak_fds": peak_fds,
+            "peak_rss_mb": rusage.ru_maxrss / 1024, "stdout": output[0] if output else b""}
+
+
+def run_console(config_path: str, size: int, repeat: int) -> dict:
+    runs = [measure([sys.executable, "status.py", "--config", config_path, "-o", "json"]) for _ in range(repeat)]
+    walls = [run["wall_seconds"] for run in runs]
+    return {
+        "checks_per_sec": size / statistics.median(walls),
+        "cycle_p50": percentile(walls, 50),
+        "cycle_p99": percentile(walls, 99),
+        "peak_fds": max(run["peak_fds"] for run in runs),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "ok": all(run["returncode"] == 0 for run in runs),
+    }
+
+
+def run_child_scenario(scenario: str, config_path: str, args, workers: int = 1) -> dict:
+    run = measure([
+        sys.executable, "-m", "benchmarks.bench_suite", "--child", scenario, "--config", config_path,
+        "--interval", str(args.interval), "--duration", str(args.duration), "--requests", str(args.requests),
+        "--workers", str(workers),
+    ])
+    result = json.loads(run["stdout"] or b"{}")
+    result.update(peak_fds=run["peak_fds"], peak_rss_mb=run["peak_rss_mb"], ok=run["returncode"] == 0)
+    return result
+
+
+def start_stubs(latency: float) -> tuple[subprocess.Popen, int]:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stubs", "--latency", str(latency)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    return proc, int(line.split()[1])
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000", help="Comma-separated monitor counts, e.g. 100,1000,10000,50000.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--mix", default="url=0.7,syncthing=0.1,command=0.2",
+                        help="Monitor type weights. Add ping=<w> when ICMP sockets are allowed.")
+    parser.add_argument("--latency", type=float, default=5, help="Stub response latency in ms.")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Console runs per size.")
+    parser.add_argument("--interval", type=float, default=5, help="Check interval for follow and web.")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to run follow.")
+    parser.add_argument("--requests", type=int, default=50, help="/api/status requests per web run.")
+    parser.add_argument("--workers", default="1",
+                        help="Comma-separated worker process counts for follow and web, e.g. 1,2,4.")
+    parser.add_argument("--output", help="Also write the results to this file.")
+    parser.add_argument("--child", choices=["follow", "web"], help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "follow":
+        print(json.dumps(asyncio.run(scenario_follow(args.config, args.interval, args.duration, int(args.workers)))))
+        return
+    if args.child == "web":
+        print(json.dumps(asyncio.run(scenario_web(args.config, args.interval, args.requests, int(args.workers)))))
+        return
+
+    stubs, port = start_stubs(args.latency)
+    report = {
+        "version": git_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": time.time(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("child", "config", "output")},
+        "results": [],
+    }
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for size in (int(s) for s in args.sizes.split(",")):
+                config_path = os.path.join(tmpdir, f"config-{size}.yaml")
+                with open(config_path, "w") as f:
+                    yaml.safe_dump(generate_config(size, port, parse_mix(args.mix), args.latency, args.error_rate), f)
+                for scenario in args.scenarios.split(","):
+                    if scenario == "console":
+                        runs = [(1, run_console(config_path, size, args.repeat))]
+                    else:
+                        runs = [(workers, run_child_scenario(scenario, config_path, args, workers))
+                                for workers in (int(w) for w in args.workers.split(","))]
+                    for workers, result in runs:
+                        report["results"].append({"scenario": scenario, "monitors": size, "workers": workers, **result})
+                        print(f"{scenario:8} {size:>6} monitors, {workers} workers: "
+                              f"{result.get('checks_per_sec', 0):.0f} checks/sec", file=sys.stderr)
+    finally:
+        stubs.terminate()
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Local stand-ins for the services the monitors check.
+
+One aiohttp server answers every url monitor and fakes the syncthing API.
+Behaviour is set per server (command line) and can be overridden per URL
+with query parameters:
+
+    latency=<ms>        delay before the response headers
+    error=<0..1>        probability of answering 500
+    body=<bytes>        size of the response body
+    chunk_delay=<ms>    delay between 1 KiB body chunks (slow bodies)
+
+    python -m benchmarks.stubs --port 8080 --latency 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from aiohttp import web
+
+CHUNK = b"x" * 1024
+
+
+def _param(request, name, default):
+    value = request.query.get(name)
+    return float(value) if value is not None else default
+
+
+def create_stub_app(latency: float = 0, error_rate: float = 0, body_size: int = 0, chunk_delay: float = 0):
+    started = time.time()
+
+    async def handle(request):
+        delay = _param(request, "latency", latency) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < _param(request, "error", error_rate):
+            return web.Response(status=500, text="stub error")
+
+        size = int(_param(request, "body", body_size))
+        pause = _param(request, "chunk_delay", chunk_delay) / 1000
+        if not size:
+            return web.Response(text="OK")
+        response = web.StreamResponse()
+        response.content_length = size
+        await response.prepare(request)
+        sent = 0
+        while sent < size:
+            chunk = CHUNK[: min(len(CHUNK), size - sent)]
+            await response.write(chunk)
+            sent += len(chunk)
+            if pause:
+                await asyncio.sleep(pause)
+        await response.write_eof()
+        return response
+
+    syncthing_config = {
+        "folders": [{"id": "stub-folder", "label": "Stub", "paused": False}],
+        "devices": [{"deviceID": "STUB-DEVICE", "name": "stub"}, {"deviceID": "STUB-PEER", "name": "peer"}],
+    }
+    syncthing_connections = {"connections": {"STUB-PEER": {"connected": True, "address": "127.0.0.1:22000"}}}
+
+    async def syncthing(request):
+        if not request.headers.get("X-API-Key"):
+            return web.Response(status=403, text="Forbidden")
+        delay = _param(request, "latency", latency) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        path = request.path
+        if path == "/rest/system/status":
+            return web.json_response({"myID": "STUB-DEVICE", "uptime": int(time.time() - started)})
+        # everything else doesn't change, so it is served with an ETag like the real API's config
+        etag = '"stub-1"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        if path == "/rest/config":
+            body = syncthing_config
+        elif path == "/rest/system/connections":
+            body = syncthing_connections
+        elif path == "/rest/db/completion":
+            body = {"completion": 100, "needItems": 0}
+        else:
+            body = {"folder": request.query.get("folder"), "errors": None}
+        return web.json_response(body, headers={"ETag": etag})
+
+    app = web.Application()
+    for path in ("/rest/system/status", "/rest/system/connections", "/rest/config",
+                 "/rest/db/completion", "/rest/folder/errors"):
+        app.router.add_get(path, syncthing)
+    app.router.add_get("/{tail:.*}", handle)
+    return app
+
+
+async def start_stub_server(host: str = "127.0.0.1", port: int = 0, **options) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(create_stub_app(**options), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port, backlog=4096)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0, help="Response delay in ms.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Probability of a 500 response.")
+    parser.add_argument("--body-size", type=int, default=0, help="Response body size in bytes.")
+    parser.add_argument("--chunk-delay", type=float, default=0, help="Delay between 1 KiB body chunks in ms.")
+    args = parser.parse_args()
+
+    runner, port = await start_stub_server(
+        args.host, args.port,
+        latency=args.latency, error_rate=args.error_rate, body_size=args.body_size, chunk_delay=args.chunk_delay,
+    )
+    print(f"PORT {port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
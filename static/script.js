@@ -1,25 +1,39 @@
 const outputBox = document.getElementById('output-box');
-let intervalId = null;
+const currentResults = new Map(); // monitor name -> latest result
+const lines = new Map(); // monitor name -> rendered line element
+
+function statusQuery(args) {
+    let query = '';
+    if (args.monitor_name) query += `name=${encodeURIComponent(args.monitor_name)}&`;
+    for (const type of args.monitor || []) query += `type=${encodeURIComponent(type)}&`;
+    for (const tag of args.tag || []) query += `tag=${encodeURIComponent(tag)}&`;
+    if (args.up) query += `status=up&`;
+    if (args.down) query += `status=down&`;
+    return query;
+}
 
-async function fetchStatus(args) {
-    let url = `/api/status?`;
-    if (args.monitor_name) url += `name=${encodeURIComponent(args.monitor_name)}&`;
-    if (args.monitor) url += `type=${encodeURIComponent(args.monitor)}&`;
-    if (args.up) url += `status=up&`;
-    if (args.down) url += `status=down&`;
+function isUp(result) {
+    return result.status === 'OK' || (typeof result.status === 'number' && result.status >= 200 && result.status < 300);
+}
 
-    try {
-        const response = await fetch(url);
-        const data = await response.json();
-        formatStatus(data);
-    } catch (error) {
-        console.error('Error fetching status:', error);
-        outputBox.textContent = 'Error fetching status.';
-    }
+function fillLine(line, result) {
+    const up = isUp(result);
+    line.querySelector('.name').innerHTML = `<span class="bold ${up ? '' : 'down'}">${result.name}</span> (${result.host_or_url})`;
+
+    const statusLabel = up
+        ? `[<span class="emoji">✅</span><span class="status-text">Up</span>]`
+        : `[<span class="emoji">🔴</span><span class="status-text">Down</span>]`;
+    line.querySelector('.status').innerHTML = `
+        <span class="status-label">${statusLabel}</span>
+        <span class="status-code">${result.status}</span>
+        <span class="status-message">- ${result.message}</span>
+    `;
 }
 
 function formatStatus(results) {
     outputBox.innerHTML = ''; // Clear previous output
+    currentResults.clear();
+    lines.clear();
 
     if (!results || results.length === 0) {
         outputBox.textContent = 'No monitors to display.';
@@ -44,45 +58,67 @@ function formatStatus(results) {
 
             const nameSpan = document.createElement('span');
             nameSpan.classList.add('name');
-            const isUp = result.status === 'OK' || (typeof result.status === 'number' && result.status >= 200 && result.status < 300);
-            nameSpan.innerHTML = `<span class="bold ${isUp ? '' : 'down'}">${result.name}</span> (${result.host_or_url})`;
-
             const statusSpan = document.createElement('span');
             statusSpan.classList.add('status');
-            const statusLabel = isUp
-                ? `[<span class="emoji">✅</span><span class="status-text">Up</span>]`
-                : `[<span class="emoji">🔴</span><span class="status-text">Down</span>]`;
-            
-            statusSpan.innerHTML = `
-                <span class="status-label">${statusLabel}</span>
-                <span class="status-code">${result.status}</span>
-                <span class="status-message">- ${result.message}</span>
-            `;
 
             line.appendChild(nameSpan);
             line.appendChild(statusSpan);
+            fillLine(line, result);
             groupDiv.appendChild(line);
+
+            currentResults.set(result.name, result);
+            lines.set(result.name, line);
         });
 
         outputBox.appendChild(groupDiv);
     }
 }
 
+// Applies a single pushed change. Known monitors are patched in place;
+// only a monitor that isn't on screen yet needs a full re-render.
+function patchStatus(result) {
+    const line = lines.get(result.name);
+    if (line) {
+        currentResults.set(result.name, result);
+        fillLine(line, result);
+        return;
+    }
+    currentResults.set(result.name, result);
+    const results = [...currentResults.values()];
+    results.sort((a, b) => a.monitor_type.localeCompare(b.monitor_type));
+    formatStatus(results);
+}
+
+function removeStatus(name) {
+    if (!currentResults.delete(name)) return;
+    const line = lines.get(name);
+    const group = line.parentElement;
+    line.remove();
+    lines.delete(name);
+    if (!group.children.length) group.remove();
+    if (!currentResults.size) outputBox.textContent = 'No monitors to display.';
+}
+
+function followStatus(args) {
+    const events = new EventSource(`/api/events?${statusQuery(args)}`);
+    events.addEventListener('snapshot', event => formatStatus(JSON.parse(event.data)));
+    events.addEventListener('change', event => patchStatus(JSON.parse(event.data)));
+    events.addEventListener('remove', event => removeStatus(JSON.parse(event.data).name));
+    events.onerror = () => console.error('Status event stream interrupted, reconnecting...');
+}
+
 async function init() {
     try {
         const response = await fetch('/api/args');
         const args = await response.json();
 
-        fetchStatus(args);
-
-        if (args.follow) {
-            const interval = args.interval ? args.interval * 1000 : 5000;
-            intervalId = setInterval(() => fetchStatus(args), interval);
-        }
+        // The server pushes a snapshot on connect and then only changes,
+        // so results appear as their first checks finish.
+        followStatus(args);
     } catch (error) {
         console.error('Error fetching args:', error);
         outputBox.textContent = 'Error fetching initial arguments.';
     }
 }
 
-init();
\ No newline at end of file
+init();
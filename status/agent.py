@@ -0,0 +1,202 @@
+import asyncio
+import gzip
+import json
+import socket
+import sys
+import time
+import zlib
+
+from .config import MonitorDiff
+from .core import MonitorStatus
+from .registry import MonitorRegistry
+from . import metrics
+
+DEFAULT_AGENT_CONFIG = {
+    "name": None,
+    "server": None,
+    "push_interval": 5,
+    "timeout": 10,
+    "token": None,
+    "stale_after": 30,
+    "max_body_bytes": 32 * 1024 * 1024,
+}
+
+STALE = "Stale (agent offline)"
+
+_agent_config = dict(DEFAULT_AGENT_CONFIG)
+
+
+def configure_agent(agent_config: dict = None):
+    """Set agent options from the top-level `agent:` section of the config.
+
+    Agents push their results every `push_interval` seconds. The server
+    marks an agent's monitors stale when it has not heard from it for
+    `stale_after` seconds. When `token` is set, agents send it and the
+    server rejects pushes without it.
+    """
+    global _agent_config
+    _agent_config = dict(DEFAULT_AGENT_CONFIG)
+    _agent_config.update(agent_config or {})
+
+
+def agent_name() -> str:
+    return _agent_config["name"] or socket.gethostname()
+
+
+def agent_token() -> str | None:
+    return _agent_config["token"]
+
+
+class AgentPusher:
+    """Sends the latest result of every monitor in a store to the central server.
+
+    Only the newest result per monitor is kept between pushes, so a server
+    that is down for a while costs one result per monitor, not a backlog.
+    A push is sent every interval even when nothing changed; it doubles as
+    the agent's heartbeat.
+    """
+
+    def __init__(self, store, server: str, name: str = None, token: str = None):
+        self.store = store
+        self.url = f"{server.rstrip('/')}/api/agents/{name or agent_name()}/results"
+        self.token = token or agent_token()
+        self._pending: dict[str, MonitorStatus] = {}
+        self._queue = None
+        self._task = None
+
+    async def start(self, session):
+        self._queue = self.store.subscribe()
+        self._task = asyncio.create_task(self._run(session))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._queue is not None:
+            self.store.unsubscribe(self._queue)
+            self._queue = None
+
+    def _drain(self):
+        while not self._queue.empty():
+            result = self._queue.get_nowait()
+            self._pending[result.name] = result
+
+    def encode(self, results: list) -> bytes:
+        payload = json.dumps({"sent_at": time.time(), "results": [r.model_dump() for r in results]})
+        return gzip.compress(payload.encode(), compresslevel=5)
+
+    async def push(self, session) -> bool:
+        self._drain()
+        batch = self._pending
+        self._pending = {}
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            async with session.post(self.url, data=self.encode(list(batch.values())), headers=headers,
+                                    timeout=_agent_config["timeout"]) as response:
+                if response.status >= 400:
+                    raise RuntimeError(f"HTTP {response.status}: {await response.text()}")
+        except Exception as e:
+            print(f"Push to {self.url} failed: {e}", file=sys.stderr)
+            # keep anything newer that arrived while pushing
+            self._pending = {**batch, **self._pending}
+            return False
+        return True
+
+    async def _run(self, session):
+        while True:
+            await asyncio.sleep(_agent_config["push_interval"])
+            await self.push(session)
+
+
+def decode_push(body: bytes, encoding: str = None) -> list:
+    """Parse an agent push, inflating gzip with a cap on the decompressed size."""
+    limit = _agent_config["max_body_bytes"]
+    if encoding == "gzip":
+        inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        body = inflater.decompress(body, limit)
+        if inflater.unconsumed_tail:
+            raise ValueError("Push body too large")
+    elif len(body) > limit:
+        raise ValueError("Push body too large")
+    return json.loads(body)["results"]
+
+
+class AgentHub:
+    """Merges pushed agent results into the server's result store.
+
+    Agent monitors are stored as "<agent>/<name>" with an `agent:<agent>`
+    tag in their own registry, so the regular filters work on them and
+    agents can reuse monitor names.
+    """
+
+    def __init__(self, store, history=None):
+        self.store = store
+        self.history = history
+        self.registry = MonitorRegistry()
+        self.last_seen: dict[str, float] = {}
+        self._monitors: dict[str, set[str]] = {}
+        self._stale: set[str] = set()
+        self._task = None
+
+    def ingest(self, agent: str, results: list[dict]):
+        """Store a push. Every result is validated first, so a push with a bad item changes nothing."""
+        now = time.time()
+        results = [MonitorStatus(**data) for data in results]
+        self.last_seen[agent] = now
+        self._stale.discard(agent)
+        metrics.agent_last_seen.set(now, agent=agent)
+        metrics.agent_stale.set(0, agent=agent)
+
+        known = self._monitors.setdefault(agent, set())
+        added = []
+        for result in results:
+            result.name = f"{agent}/{result.name}"
+            result.checked_at = result.checked_at or now
+            if result.name not in known:
+                known.add(result.name)
+                added.append({"name": result.name, "type": result.monitor_type, "host": result.host_or_url,
+                              "tags": [f"agent:{agent}"]})
+            self.store.set(result)
+            if self.history is not None:
+                self.history.record(result)
+        if added:
+            self.registry.apply(MonitorDiff(added=added, removed=[], changed=[]))
+
+    def check_stale(self):
+        stale_after = _agent_config["stale_after"]
+        now = time.time()
+        for agent, seen in self.last_seen.items():
+            if agent in self._stale or now - seen <= stale_after:
+                continue
+            self._stale.add(agent)
+            metrics.agent_stale.set(1, agent=agent)
+            for name in self._monitors.get(agent, ()):
+                previous = self.store.get(name)
+                if previous is not None:
+                    self.store.set(previous.model_copy(update={
+                        "status": STALE, "message": f"no push from {agent} for {int(now - seen)}s", "timing": None,
+                    }))
+
+    def agents(self) -> list[dict]:
+        return [
+            {"name": agent, "last_seen": seen, "stale": agent in self._stale,
+             "monitors": len(self._monitors.get(agent, ()))}
+            for agent, seen in sorted(self.last_seen.items())
+        ]
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(max(1.0, _agent_config["stale_after"] / 3))
+            self.check_stale()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from .core import CheckResult, TimingRecord, make_result, _ms
+from . import metrics
+
+DEFAULT_BREAKER_CONFIG = {
+    "threshold": 3,
+    "max_interval": 300,
+    "probe": True,
+    "probe_timeout": 2,
+    "confirm": True,
+    "confirm_delay": 1,
+}
+
+_breaker_config = dict(DEFAULT_BREAKER_CONFIG)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def configure_breaker(breaker_config: dict = None):
+    """Set circuit breaker options from the top-level `breaker:` section of the config.
+
+    After `threshold` consecutive failures a monitor's interval doubles with
+    every further failure, up to `max_interval`. While backed off, url and
+    syncthing monitors first try a TCP connect (`probe`) and skip the full
+    request when it fails. With `confirm`, a result that flips a monitor
+    between up and down is re-checked after `confirm_delay` seconds before
+    it is published.
+    """
+    global _breaker_config
+    _breaker_config = dict(DEFAULT_BREAKER_CONFIG)
+    _breaker_config.update(breaker_config or {})
+
+
+def breaker_option(name: str):
+    return _breaker_config[name]
+
+
+def probe_address(monitor: dict) -> tuple[str, int] | None:
+    """Where a cheap TCP connect can tell whether the full check has a chance, if anywhere."""
+    if monitor.get("type", "url") not in ("url", "syncthing") or not monitor.get("url"):
+        return None
+    parts = urlsplit(monitor["url"])
+    if not parts.hostname:
+        return None
+    try:
+        port = parts.port or DEFAULT_PORTS.get(parts.scheme)
+    except ValueError:
+        return None
+    return (parts.hostname, port) if port else None
+
+
+async def probe(monitor: dict) -> CheckResult | None:
+    """TCP-connect to the monitor's host; return a failure result, or None if the full check should run."""
+    address = probe_address(monitor)
+    if address is None:
+        return None
+    start = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(*address), _breaker_config["probe_timeout"])
+    except asyncio.TimeoutError:
+        status = "Timeout"
+    except OSError as e:
+        status = f"Error: {e}"
+    else:
+        writer.close()
+        return None
+    return make_result(monitor, monitor.get("host", monitor.get("url")), status,
+                       f"probe: TCP connect to {address[0]}:{address[1]} failed",
+                       TimingRecord(connect=_ms(time.monotonic() - start)))
+
+
+class Breakers:
+    """Consecutive failure counts per monitor name."""
+
+    def __init__(self):
+        self._failures: dict[str, int] = {}
+
+    def failures(self, name: str) -> int:
+        return self._failures.get(name, 0)
+
+    def is_open(self, name: str) -> bool:
+        return self._failures.get(name, 0) >= _breaker_config["threshold"]
+
+    def record(self, name: str, up: bool):
+        was_open = self.is_open(name)
+        if up:
+            self._failures.pop(name, None)
+        else:
+            self._failures[name] = self._failures.get(name, 0) + 1
+        if was_open != self.is_open(name):
+            metrics.monitors_backed_off.inc(1 if not was_open else -1)
+
+    def forget(self, name: str):
+        if self.is_open(name):
+            metrics.monitors_backed_off.dec()
+        self._failures.pop(name, None)
+
+    def interval(self, name: str, interval: float) -> float:
+        """The monitor's interval, doubled for every failure past the threshold and capped at max_interval."""
+        excess = self._failures.get(name, 0) - _breaker_config["threshold"]
+        if excess < 0:
+            return interval
+        # cap the exponent so a monitor that has been down for days doesn't overflow
+        return max(interval, min(interval * 2 ** min(excess + 1, 32), _breaker_config["max_interval"]))
@@ -0,0 +1,69 @@
+"""Monitor types and the checkers that run them.
+
+A checker is a Checker subclass instance registered under a monitor type.
+The built-in types are registered by status.core. Out-of-tree checkers are
+found through the "status.checkers" entry point group, named after the
+monitor type they handle:
+
+    [project.entry-points."status.checkers"]
+    redis = "status_redis:RedisChecker"
+
+Entry points are only scanned the first time a monitor type is not found,
+so configs that use built-in types never pay for the scan.
+"""
+import sys
+
+ENTRY_POINT_GROUP = "status.checkers"
+
+_checkers: dict[str, "Checker"] = {}
+_entry_points_loaded = False
+
+
+class Checker:
+    """Checks one type of monitor.
+
+    validate() runs once per monitor when the config is loaded; check() runs
+    on every check and returns a core.CheckResult (see core.make_result).
+    """
+    required: tuple[str, ...] = ()
+
+    def validate(self, monitor: dict):
+        """Raise ValueError if the monitor cannot be checked."""
+        missing = [key for key in self.required if not monitor.get(key)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+
+    async def check(self, session, monitor: dict):
+        raise NotImplementedError
+
+
+def register_checker(monitor_type: str, checker: Checker):
+    _checkers[monitor_type] = checker
+
+
+def load_entry_points():
+    from importlib.metadata import entry_points
+
+    global _entry_points_loaded
+    _entry_points_loaded = True
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in _checkers:
+            continue  # built-in types can't be replaced
+        try:
+            checker = entry_point.load()
+        except Exception as e:
+            print(f"Could not load checker {entry_point.name!r} from {entry_point.value}: {e}", file=sys.stderr)
+            continue
+        register_checker(entry_point.name, checker() if isinstance(checker, type) else checker)
+
+
+def get_checker(monitor_type: str) -> Checker | None:
+    checker = _checkers.get(monitor_type)
+    if checker is None and not _entry_points_loaded:
+        load_entry_points()
+        checker = _checkers.get(monitor_type)
+    return checker
+
+
+def checker_types() -> list[str]:
+    return sorted(_checkers)
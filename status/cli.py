@@ -2,25 +2,48 @@ import argparse
 import asyncio
 import json
 import os
-import aiohttp
+import signal
+import sys
 import time
-import re
+from itertools import groupby
 
-from .core import get_config, check_monitor, MonitorStatus, is_up, filter_monitors
-from .web import create_web_app, run_web_server
+from .core import get_config, run_check, iter_checks, start_checks, MonitorStatus, is_up, select_monitors
+from .session import configure_session, get_session, close_session
+from .ping import configure_ping
+from .ssh import configure_ssh, close_ssh, multiplex_shared_hosts
+from .executor import configure_commands
+from .breaker import configure_breaker
+from .agent import configure_agent
+from .syncthing import configure_syncthing
+from .tcp import configure_tcp
 
+# The scheduler, history, renderer and especially the web server (fastapi, uvicorn)
+# are imported by the modes that use them, so one-shot checks start quickly.
 
 
+def create_web_app(*args, **kwargs):
+    from .web import create_web_app
+    return create_web_app(*args, **kwargs)
 
 
-def format_results_for_console(results: list[MonitorStatus]) -> list[str]:
+async def run_web_server(app):
+    from .web import run_web_server
+    await run_web_server(app)
+
+
+
+
+
+def format_results_for_console(results: list[MonitorStatus], width: int = None, columns: dict = None) -> list[str]:
+    """Format results as boxed rows, one box per monitor type.
+
+    `columns` keeps the status and message column widths per monitor type
+    between calls. Widths only grow, so one monitor changing status doesn't
+    realign (and redraw) every row of its box.
+    """
     if not results:
         return []
 
-    def strip_ansi(text):
-        import re
-        return re.sub(r'\x1b\[[0-9;]*m', '', text)
-
     results.sort(key=lambda r: r.monitor_type)
 
     if len(results) == 1:
@@ -36,13 +59,15 @@ def format_results_for_console(results: list[MonitorStatus]) -> list[str]:
         return [f"{name_str} {status_label} {result.status} {status_message}"]
 
 
-    try:
-        terminal_width = os.get_terminal_size().columns - 2 # Add padding
-    except OSError:
-        terminal_width = 78  # Default width if not a TTY
+    if width is not None:
+        terminal_width = width
+    else:
+        try:
+            terminal_width = os.get_terminal_size().columns - 2 # Add padding
+        except OSError:
+            terminal_width = 78  # Default width if not a TTY
 
     output_lines = []
-    from itertools import groupby
     slate_blue = "\033[38;5;68m"
     reset_color = "\033[0m"
 
@@ -56,6 +81,11 @@ def format_results_for_console(results: list[MonitorStatus]) -> list[str]:
             max_label_len = max(len("[✅ Up] "), len("[🔴 Down]"))
             max_status_len = max(len(str(r.status)) for r in group_results)
             max_message_len = max(len(f"- {r.message}") for r in group_results)
+            if columns is not None:
+                seen_status, seen_message = columns.get(monitor_type, (0, 0))
+                max_status_len = max(max_status_len, seen_status)
+                max_message_len = max(max_message_len, seen_message)
+                columns[monitor_type] = (max_status_len, max_message_len)
 
         output_lines.append(f"{slate_blue}┌{'─' * (terminal_width - 1)}┐{reset_color}")
 
@@ -74,7 +104,9 @@ def format_results_for_console(results: list[MonitorStatus]) -> list[str]:
 
             full_status_str = f"{padded_label} {padded_status} {padded_message}"
 
-            padding_len = terminal_width - len(strip_ansi(name_str)) - len(full_status_str) - 4
+            # visible width of name_str, without its color codes
+            name_len = len(result.name) + len(str(result.host_or_url)) + 3
+            padding_len = terminal_width - name_len - len(full_status_str) - 4
             if padding_len < 0:
                 padding_len = 0
             padding = " " * padding_len
@@ -99,6 +131,7 @@ async def main():
     monitor_group = parser.add_mutually_exclusive_group()
     monitor_group.add_argument("monitor_name", nargs="?", default=None, help="Monitor a specific service by name.")
     monitor_group.add_argument("-m", "--monitor", action='append', help="Filter by monitor type, or by type and name.")
+    parser.add_argument("-t", "--tag", action='append', help="Only check monitors with this tag.")
 
     status_group = parser.add_mutually_exclusive_group()
     status_group.add_argument("-d", "--down", action="store_true", help="Only show monitors that are down.")
@@ -108,44 +141,138 @@ async def main():
     mode_group.add_argument("-c", "--console", action="store_true", help="Run in console mode.")
     mode_group.add_argument("-f", "--follow", action="store_true", help="Run in follow mode.")
     mode_group.add_argument("-w", "--web", action="store_true", help="Run as a web server with API.")
+    mode_group.add_argument("--agent", action="store_true", help="Run checks here and push results to --server.")
 
     parser.add_argument("-i", "--interval", type=int, help="Refresh interval in seconds for watch mode.")
-    parser.add_argument("-o", "--output", default="text", choices=["text", "json"], help="Specify the output format (e.g., text, json).")
+    parser.add_argument("-o", "--output", default="text", choices=["text", "json", "ndjson"], help="Specify the output format (e.g., text, json, ndjson).")
     parser.add_argument("--config", default="config.yaml", help="Path to the configuration file.")
+    parser.add_argument("--server", help="URL of the central --web instance that agents push to.")
+    parser.add_argument("--workers", type=int, help="Run checks in this many worker processes (follow and web mode).")
     args = parser.parse_args()
 
     config_path = args.config
 
     config = get_config(config_path)
-    all_monitors = config.get("monitors", [])
-    ignored_monitors = config.get("ignore", [])
-    all_monitors = [m for m in all_monitors if m['name'] not in ignored_monitors]
-    
-    monitors_to_check = filter_monitors(all_monitors, name=args.monitor_name, types=args.monitor)
+    configure_session(config.get("http"))
+    configure_ping(config.get("ping"))
+    configure_ssh(config.get("ssh"))
+    configure_commands(config.get("commands"))
+    configure_breaker(config.get("breaker"))
+    configure_agent(config.get("agent"))
+    configure_syncthing(config.get("syncthing"))
+    configure_tcp(config.get("tcp"))
+    monitors_to_check = select_monitors(config, name=args.monitor_name, types=args.monitor, tags=args.tag)
+
+    workers = args.workers or config.get("workers", 1)
 
     async def run_checks():
-        async with aiohttp.ClientSession() as session:
-            tasks = [check_monitor(session, monitor) for monitor in monitors_to_check]
-            return await asyncio.gather(*tasks)
+        session = await get_session()
+        tasks = start_checks(monitors_to_check, lambda monitor: run_check(session, monitor))
+        return await asyncio.gather(*tasks)
 
     if args.follow:
+        from .history import open_history
+        from .render import TerminalRenderer
+        from .shard import make_scheduler
+
         interval = args.interval or config.get("follow", {}).get("interval", 5)
-        while True:
-            results = await run_checks()
-            if args.down:
-                results = [r for r in results if not is_up(r)]
-            elif args.up:
-                results = [r for r in results if is_up(r)]
-
-            if args.output == "json":
-                print(json.dumps([r.model_dump() for r in results], indent=4))
-            else:
-                print_results(results)
-            
-            await asyncio.sleep(interval)
-            print("\033[H\033[J", end="") # Clear screen
+        history = open_history(config.get("history"))
+        scheduler = make_scheduler(monitors_to_check, workers=workers, settings=config, interval=interval, history=history)
+        if history is not None:
+            await history.start()
+        await scheduler.start()
+        watcher = asyncio.create_task(scheduler.watch(
+            config_path, lambda c: select_monitors(c, args.monitor_name, args.monitor, args.tag), config.get("reload")))
+        # On a terminal, redraw only the rows that changed; piped output gets full frames.
+        renderer = TerminalRenderer() if args.output == "text" and sys.stdout.isatty() else None
+        redraw = asyncio.Event()
+        columns = {}
+        if renderer is not None:
+            renderer.open()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGWINCH, redraw.set)
+        try:
+            # Draw once every monitor has a first result, or after one redraw interval with whatever
+            # the store has: a monitor with a long interval of its own spreads its first check over it.
+            ready = asyncio.create_task(scheduler.wait_ready())
+            await asyncio.wait([ready], timeout=interval)
+            ready.cancel()
+            while True:
+                results = scheduler.store.results_for(scheduler.registry.names())
+                if args.down:
+                    results = [r for r in results if not is_up(r)]
+                elif args.up:
+                    results = [r for r in results if is_up(r)]
+
+                if args.output == "json":
+                    print(json.dumps([r.model_dump() for r in results], indent=4))
+                elif args.output == "ndjson":
+                    for r in results:
+                        print(json.dumps(r.model_dump()), flush=True)
+                elif renderer is not None:
+                    renderer.render(format_results_for_console(results, width=renderer.size.columns - 2,
+                                                                columns=columns))
+                else:
+                    print_results(results)
+
+                if renderer is not None:
+                    try:
+                        # wake early when the terminal is resized
+                        await asyncio.wait_for(redraw.wait(), interval)
+                    except asyncio.TimeoutError:
+                        renderer.next_page()
+                    redraw.clear()
+                    continue
+                await asyncio.sleep(interval)
+                if args.output != "ndjson":
+                    print("\033[H\033[J", end="") # Clear screen
+        finally:
+            if renderer is not None:
+                asyncio.get_running_loop().remove_signal_handler(signal.SIGWINCH)
+                renderer.close()
+            watcher.cancel()
+            await scheduler.stop()
+            if history is not None:
+                await history.stop()
+            await close_session()
+            await close_ssh()
+
+    elif args.agent:
+        from .agent import agent_name, AgentPusher
+        from .shard import make_scheduler
+
+        server = args.server or config.get("agent", {}).get("server")
+        if not server:
+            parser.error("--agent requires --server (or agent.server in the config)")
+        interval = args.interval or config.get("follow", {}).get("interval", 5)
+        scheduler = make_scheduler(monitors_to_check, workers=workers, settings=config, interval=interval)
+        pusher = AgentPusher(scheduler.store, server)
+        await scheduler.start()
+        await pusher.start(await get_session())
+        watcher = asyncio.create_task(scheduler.watch(
+            config_path, lambda c: select_monitors(c, args.monitor_name, args.monitor, args.tag), config.get("reload")))
+        print(f"Agent {agent_name()} checking {len(monitors_to_check)} monitors, pushing to {server}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            watcher.cancel()
+            await pusher.stop()
+            await scheduler.stop()
+            await close_session()
+            await close_ssh()
+
+    elif args.output == "ndjson" and not args.web:
+        # One JSON object per line, printed as soon as each check finishes
+        multiplex_shared_hosts(monitors_to_check)
+        session = await get_session()
+        async for result in iter_checks(session, monitors_to_check):
+            if (args.down and is_up(result)) or (args.up and not is_up(result)):
+                continue
+            print(json.dumps(result.model_dump()), flush=True)
+        await close_session()
+        await close_ssh()
 
     elif args.console or not (args.web or args.follow):
+        multiplex_shared_hosts(monitors_to_check)
         results = await run_checks()
 
         if args.down:
@@ -158,7 +285,17 @@ async def main():
             print(json.dumps([r.model_dump() for r in results], indent=4))
         else:
             print_results(results)
+        await close_session()
+        await close_ssh()
     
     if args.web:
-        app = create_web_app(monitors_to_check, args)
+        from .history import open_history
+        from .scheduler import DEFAULT_INTERVAL
+        from .shard import make_scheduler
+
+        history = open_history(config.get("history"))
+        scheduler = make_scheduler(monitors_to_check, workers=workers, settings=config,
+                                   interval=args.interval or DEFAULT_INTERVAL, history=history)
+        app = create_web_app(monitors_to_check, args, history=history, config_path=config_path,
+                             reload_config=config.get("reload"), scheduler=scheduler)
         await run_web_server(app)
@@ -0,0 +1,224 @@
+import asyncio
+import csv
+import hashlib
+import io
+import os
+import sys
+from typing import NamedTuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+DEFAULT_RELOAD_CONFIG = {
+    "enabled": True,
+    "interval": 2,
+}
+
+CSV_TYPES = ("ping_csv", "url_csv")
+
+
+class _CacheEntry(NamedTuple):
+    stamp: tuple
+    digest: str
+    key: object
+    value: object
+
+
+class MonitorDiff(NamedTuple):
+    added: list
+    removed: list
+    changed: list
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+_cache: dict[str, _CacheEntry] = {}
+
+
+def _stamp(path: str) -> tuple | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_cached(path: str, parse, key=None):
+    """Return parse(text) for the file, re-parsing only when its content changed.
+
+    The mtime/size stamp is checked first; when it differs the file is hashed,
+    so a touched but unchanged file is not parsed again. `key` lets callers
+    cache results that also depend on options other than the file content.
+    """
+    stamp = _stamp(path)
+    entry = _cache.get(path)
+    if entry is not None and entry.stamp == stamp and entry.key == key:
+        return entry.value
+
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if entry is not None and entry.digest == digest and entry.key == key:
+        _cache[path] = entry._replace(stamp=stamp)
+        return entry.value
+
+    value = parse(data.decode())
+    _cache[path] = _CacheEntry(stamp, digest, key, value)
+    return value
+
+
+def _csv_rows(text: str):
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, [])
+    columns = {name: i for i, name in enumerate(header)}
+    width = len(header)
+    for values in reader:
+        if len(values) < width:
+            values = values + [""] * (width - len(values))
+        yield columns, values
+
+
+def _column(columns: dict, values: list, name: str) -> str | None:
+    i = columns.get(name)
+    return values[i] if i is not None else None
+
+
+def _parse_ping_csv(text: str, csv_path: str, inherited: dict) -> list:
+    monitors = []
+    for columns, values in _csv_rows(text):
+        host = _column(columns, values, "host") or _column(columns, values, "ip")
+        if not host:
+            row = dict(zip(columns, values))
+            print(f"Warning: Skipping row in {csv_path} because it's missing 'host' or 'ip' column: {row}",
+                  file=sys.stderr)
+            continue
+        name = _column(columns, values, "name")
+        if not name:
+            row = dict(zip(columns, values))
+            print(f"Warning: Skipping row in {csv_path} because it's missing 'name' column: {row}", file=sys.stderr)
+            continue
+        monitors.append({"name": name, "host": host, "type": "ping", **inherited})
+    return monitors
+
+
+def _parse_url_csv(text: str, csv_path: str, inherited: dict, default_domain: str = None) -> list:
+    monitors = []
+    for columns, values in _csv_rows(text):
+        url = _column(columns, values, "url")
+        if not url:
+            subdomain = _column(columns, values, "name") or _column(columns, values, "subdomain")
+            domain = _column(columns, values, "domain") or default_domain
+            if not subdomain or not domain:
+                row = dict(zip(columns, values))
+                print(
+                    f"Warning: Skipping row in {csv_path} because it's missing 'subdomain' or 'domain' column: {row}",
+                    file=sys.stderr,
+                )
+                continue
+
+            ssl_val = (_column(columns, values, "ssl") or "").lower()
+            protocol = "https" if ssl_val in ["true", "1", "yes"] else "http"
+
+            url = f"{protocol}://{subdomain}.{domain}"
+
+        name = _column(columns, values, "name")
+        if not name:
+            row = dict(zip(columns, values))
+            print(f"Warning: Skipping row in {csv_path} because it's missing 'name' column: {row}", file=sys.stderr)
+            continue
+        monitors.append({"name": name, "url": url, "type": "url", **inherited})
+    return monitors
+
+
+def load_csv_monitors(monitor_config: dict) -> list:
+    """Expand a ping_csv or url_csv entry into monitors, reusing the cached result if nothing changed."""
+    csv_path = monitor_config.get("path")
+    if not csv_path:
+        return []
+
+    csv_type = monitor_config.get("type")
+    excluded = {"type", "path", "domain"} if csv_type == "url_csv" else {"type", "path"}
+    inherited = {k: v for k, v in monitor_config.items() if k not in excluded}
+    if csv_type == "url_csv":
+        def parse(text):
+            return _parse_url_csv(text, csv_path, inherited, monitor_config.get("domain"))
+    else:
+        def parse(text):
+            return _parse_ping_csv(text, csv_path, inherited)
+
+    try:
+        return _read_cached(csv_path, parse, key=repr(sorted(monitor_config.items(), key=lambda kv: kv[0])))
+    except FileNotFoundError:
+        print(f"Warning: CSV file not found at {csv_path}", file=sys.stderr)
+    except Exception as e:
+        print(f"Error reading CSV file {csv_path}: {e}", file=sys.stderr)
+    return []
+
+
+def load_yaml(path: str) -> dict:
+    return _read_cached(path, lambda text: yaml.load(text, Loader=SafeLoader))
+
+
+def get_config(config_path):
+    # The cached YAML document is shared between loads, so build a new top-level dict and monitor list.
+    config = dict(load_yaml(config_path) or {})
+
+    if "monitors" in config:
+        monitors = []
+        for monitor in config["monitors"]:
+            if monitor.get("type") in CSV_TYPES:
+                monitors.extend(load_csv_monitors(monitor))
+            else:
+                monitors.append(monitor)
+        config["monitors"] = monitors
+
+    return config
+
+
+def config_sources(config_path: str) -> dict:
+    """Stat the config file and every CSV it references; cheap enough to poll."""
+    stamps = {config_path: _stamp(config_path)}
+    try:
+        document = load_yaml(config_path) or {}
+    except (OSError, yaml.YAMLError):
+        return stamps
+    for monitor in document.get("monitors", []):
+        if monitor.get("type") in CSV_TYPES and monitor.get("path"):
+            stamps[monitor["path"]] = _stamp(monitor["path"])
+    return stamps
+
+
+def diff_monitors(old: list, new: list) -> MonitorDiff:
+    old_by_name = {m["name"]: m for m in old}
+    new_by_name = {m["name"]: m for m in new}
+    added = [m for name, m in new_by_name.items() if name not in old_by_name]
+    removed = [m for name, m in old_by_name.items() if name not in new_by_name]
+    changed = [m for name, m in new_by_name.items() if name in old_by_name and old_by_name[name] != m]
+    return MonitorDiff(added, removed, changed)
+
+
+async def watch_config(config_path: str, on_change, interval: float = DEFAULT_RELOAD_CONFIG["interval"]):
+    """Poll the config file and its CSV sources; call on_change(config) when any of them changed.
+
+    Only the files that actually changed are parsed again.
+    """
+    stamps = config_sources(config_path)
+    while True:
+        await asyncio.sleep(interval)
+        current = config_sources(config_path)
+        if current == stamps:
+            continue
+        stamps = current
+        try:
+            config = get_config(config_path)
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Error reloading config {config_path}: {e}", file=sys.stderr)
+            continue
+        result = on_change(config)
+        if asyncio.iscoroutine(result):
+            await result
@@ -1,10 +1,34 @@
 import asyncio
 import aiohttp
-import yaml
-import csv
-from icmplib import async_ping
+import functools
+import json
+import re
+import shlex
+import ssl
+import time
+from dataclasses import dataclass, replace
 from pydantic import BaseModel
-from typing import Union, List
+from typing import Union, List, Optional
+
+from . import syncthing, tcp
+from .ping import ping_host, format_ping_result
+from .ssh import get_multiplexer, SSHError
+from .executor import run_command as execute, use_shell
+from .config import get_config
+from .registry import MonitorRegistry
+from .checkers import Checker, register_checker, get_checker
+
+
+class Timing(BaseModel):
+    """Durations in milliseconds, measured with a monotonic clock. Fields that don't apply stay None."""
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    ttfb: Optional[float] = None
+    total: Optional[float] = None
+    rtt: Optional[float] = None
+    handshake: Optional[float] = None
+    spawn: Optional[float] = None
+    run: Optional[float] = None
 
 
 class MonitorStatus(BaseModel):
@@ -13,268 +37,540 @@ class MonitorStatus(BaseModel):
     status: Union[int, str]
     message: str
     monitor_type: str
+    checked_at: Optional[float] = None
+    timing: Optional[Timing] = None
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+@dataclass(slots=True)
+class TimingRecord:
+    """The fields of Timing, without validation."""
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    ttfb: Optional[float] = None
+    total: Optional[float] = None
+    rtt: Optional[float] = None
+    handshake: Optional[float] = None
+    spawn: Optional[float] = None
+    run: Optional[float] = None
+
+
+TIMING_FIELDS = tuple(Timing.model_fields)
+
+
+@dataclass(slots=True)
+class CheckResult:
+    """A result as checkers build it and the scheduler, store and history pass it around.
+
+    It has the same fields as MonitorStatus and the parts of its interface
+    the rest of the code uses (model_dump, model_dump_json, model_copy), but
+    costs no validation. to_status() makes the pydantic model; check_monitor
+    and the web API do that at their boundary.
+    """
+    name: str
+    host_or_url: str
+    status: Union[int, str]
+    message: str
+    monitor_type: str
+    timing: Optional[TimingRecord] = None
+    checked_at: Optional[float] = None
+
+    def model_dump(self) -> dict:
+        timing = self.timing
+        return {
+            "name": self.name,
+            "host_or_url": self.host_or_url,
+            "status": self.status,
+            "message": self.message,
+            "monitor_type": self.monitor_type,
+            "checked_at": self.checked_at,
+            "timing": None if timing is None else {field: getattr(timing, field) for field in TIMING_FIELDS},
+        }
+
+    def model_dump_json(self) -> str:
+        return json.dumps(self.model_dump(), separators=(",", ":"))
+
+    def model_copy(self, update: dict = None) -> "CheckResult":
+        return replace(self, **(update or {}))
+
+    def to_status(self) -> MonitorStatus:
+        return MonitorStatus(**self.model_dump())
+
+
+def make_result(monitor: dict, target: str, status: Union[int, str], message: str = "",
+                timing: TimingRecord = None) -> CheckResult:
+    return CheckResult(monitor["name"], target, status, message, monitor.get("type", "url"), timing)
+
+
+def _http_timing(marks: dict, start: float, ttfb_at: float = None) -> TimingRecord:
+    # marks are filled in by the trace hooks in session.timing_trace_config
+    dns = None
+    if "dns_start" in marks and "dns_end" in marks:
+        dns = marks["dns_end"] - marks["dns_start"]
+    connect = None
+    if "connect_start" in marks and "connect_end" in marks:
+        # DNS resolution happens inside connection creation; connect includes the TLS handshake
+        connect = marks["connect_end"] - marks["connect_start"] - (dns or 0)
+    return TimingRecord(
+        dns=_ms(dns),
+        connect=_ms(connect),
+        ttfb=_ms(ttfb_at - start) if ttfb_at is not None else None,
+        total=_ms(time.monotonic() - start),
+    )
+
+
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+BODY_CHUNK = 16 * 1024
+# Regex matches may span chunks by at most this many bytes.
+REGEX_WINDOW = 4096
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_body_regex(pattern: str) -> re.Pattern:
+    return re.compile(pattern.encode())
+
+
+def _expected_statuses(monitor) -> tuple | None:
+    expected = monitor.get("expect_status")
+    if expected is None:
+        return None
+    return tuple(int(code) for code in expected) if isinstance(expected, (list, tuple)) else (int(expected),)
+
+
+async def _read_body(response, monitor) -> str | None:
+    """Stream at most max_body_bytes of the body, stopping as soon as every expectation matched.
+
+    Returns a failure message, or None. Only a small tail of the previous
+    chunk is kept, so memory stays bounded however large the page is.
+    """
+    substring = monitor.get("expect_substring")
+    regex = monitor.get("expect_regex")
+    limit = monitor.get("max_body_bytes") or DEFAULT_MAX_BODY_BYTES
+    needle = substring.encode() if substring else None
+    pattern = _compile_body_regex(regex) if regex else None
+    keep = max(len(needle) - 1 if needle else 0, REGEX_WINDOW if pattern else 0)
+
+    tail = b""
+    read = 0
+    async for chunk in response.content.iter_chunked(BODY_CHUNK):
+        chunk = chunk[:limit - read]
+        read += len(chunk)
+        window = tail + chunk
+        if needle is not None and needle in window:
+            needle = None
+        if pattern is not None and pattern.search(window):
+            pattern = None
+        if read >= limit or (needle is None and pattern is None and (substring or regex)):
+            break
+        tail = window[-keep:] if keep else b""
+
+    missing = []
+    if needle is not None:
+        missing.append(repr(substring))
+    if pattern is not None:
+        missing.append(f"/{regex}/")
+    if missing:
+        return f"{' and '.join(missing)} not found in {'first ' if read >= limit else ''}{read} bytes"
+    return None
 
 
 async def check_url(session, monitor):
+    marks = {}
+    start = time.monotonic()
+    target = monitor.get("host", monitor.get("url"))
+    method = monitor.get("method", "GET").upper()
+    read_body = bool(monitor.get("expect_substring") or monitor.get("expect_regex") or monitor.get("max_body_bytes"))
     try:
-        async with session.get(monitor["url"], timeout=monitor.get("timeout", 10)) as response:
-            return MonitorStatus(
-                name=monitor["name"],
-                host_or_url=monitor.get("host", monitor.get("url")),
-                status=response.status,
-                message="OK",
-                monitor_type="url",
-            )
+        if read_body and method == "HEAD":
+            raise ValueError("expect_substring, expect_regex and max_body_bytes need a GET request")
+        if method == "GET":
+            request = session.get
+        elif method == "HEAD":
+            request = session.head
+        else:
+            request = functools.partial(session.request, method)
+        async with request(monitor["url"], timeout=monitor.get("timeout", 10), trace_request_ctx=marks) as response:
+            ttfb_at = time.monotonic()
+            status, message = response.status, "OK"
+            status_ok = True
+            expected = _expected_statuses(monitor)
+            if expected is not None:
+                status_ok = response.status in expected
+                if status_ok:
+                    status, message = "OK", f"HTTP {response.status}"
+                else:
+                    status, message = f"HTTP {response.status}", f"expected {', '.join(map(str, expected))}"
+            if read_body and status_ok:
+                failure = await _read_body(response, monitor)
+                if failure is not None:
+                    status, message = "Content mismatch", failure
+            return make_result(monitor, target, status, message, _http_timing(marks, start, ttfb_at))
     except asyncio.TimeoutError:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=monitor.get("host", monitor.get("url")),
-            status="Timeout",
-            message="",
-            monitor_type="url",
-        )
-    except aiohttp.ClientError as e:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=monitor.get("host", monitor.get("url")),
-            status=f"Error: {e}",
-            message="",
-            monitor_type="url",
-        )
+        return make_result(monitor, target, "Timeout", "", _http_timing(marks, start))
+    except (aiohttp.ClientError, ValueError, re.error) as e:
+        return make_result(monitor, target, f"Error: {e}", "", _http_timing(marks, start))
+
+
+def _syncthing_instance(sweep: dict) -> tuple[str, str]:
+    my_id = sweep["status"].get("myID")
+    devices = [d["deviceID"] for d in sweep["config"].get("devices", ()) if d.get("deviceID") != my_id]
+    connections = sweep["connections"].get("connections") or {}
+    connected = sum(1 for d in devices if connections.get(d, {}).get("connected"))
+    return "OK", f"Uptime: {sweep['status'].get('uptime', 0)}s, {connected}/{len(devices)} devices connected"
+
+
+def _syncthing_folder(sweep: dict, monitor: dict) -> tuple[str, str]:
+    folder = sweep["folder"]
+    if folder is None:
+        return "Not found", f"no folder {monitor['folder']}"
+    if folder.get("paused"):
+        return "Paused", ""
+    errors = sweep["errors"].get("errors") or []
+    if errors:
+        return "Errors", f"{len(errors)} errors, first: {errors[0].get('path')}: {errors[0].get('error')}"
+    completion = sweep["completion"].get("completion", 0)
+    if completion < monitor.get("min_completion", 100):
+        return "Syncing", f"{completion:.0f}% synced, {sweep['completion'].get('needItems', 0)} items needed"
+    return "OK", f"{completion:.0f}% synced"
+
+
+def _syncthing_device(sweep: dict, monitor: dict) -> tuple[str, str]:
+    device = syncthing.find_device(sweep["config"], monitor["device"])
+    if device is None:
+        return "Not found", f"no device {monitor['device']}"
+    if device.get("paused"):
+        return "Paused", ""
+    connection = (sweep["connections"].get("connections") or {}).get(device["deviceID"], {})
+    if connection.get("connected"):
+        return "OK", f"Connected to {connection.get('address', '')}".rstrip()
+    return "Disconnected", ""
 
 
 async def check_syncthing(session, monitor):
-    url = f"{monitor['url']}/rest/system/status"
-    headers = {"X-API-Key": monitor["api_key"]}
+    target = monitor.get("host", monitor.get("url"))
+    marks = {}
+    start = time.monotonic()
     try:
-        async with session.get(url, headers=headers, timeout=monitor.get("timeout", 10)) as response:
-            if response.status == 200:
-                data = await response.json()
-                uptime = data.get("uptime", 0)
-                return MonitorStatus(
-                    name=monitor["name"],
-                    host_or_url=monitor.get("host", monitor.get("url")),
-                    status="OK",
-                    message=f"Uptime: {uptime}s",
-                    monitor_type="syncthing",
-                )
-            else:
-                return MonitorStatus(
-                    name=monitor["name"],
-                    host_or_url=monitor.get("host", monitor.get("url")),
-                    status=f"HTTP {response.status}",
-                    message=await response.text(),
-                    monitor_type="syncthing",
-                )
+        client = syncthing.get_client(monitor["url"], monitor["api_key"])
+        sweep = await client.sweep(session, monitor.get("timeout", 10), monitor.get("folder"), marks)
+        if monitor.get("folder"):
+            status, message = _syncthing_folder(sweep, monitor)
+        elif monitor.get("device"):
+            status, message = _syncthing_device(sweep, monitor)
+        else:
+            status, message = _syncthing_instance(sweep)
+        return make_result(monitor, target, status, message, _http_timing(marks, start))
+    except syncthing.SyncthingError as e:
+        return make_result(monitor, target, str(e), e.text, _http_timing(marks, start))
     except asyncio.TimeoutError:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=monitor.get("host", monitor.get("url")),
-            status="Timeout",
-            message="",
-            monitor_type="syncthing",
-        )
+        return make_result(monitor, target, "Timeout", "", _http_timing(marks, start))
     except aiohttp.ClientError as e:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=monitor.get("host", monitor.get("url")),
-            status=f"Error: {e}",
-            message="",
-            monitor_type="syncthing",
-        )
+        return make_result(monitor, target, f"Error: {e}", "", _http_timing(marks, start))
 
 
 async def check_ping(session, monitor):
     host = monitor["host"]
     try:
-        result = await async_ping(host, count=1, timeout=monitor.get("timeout", 2), privileged=False)
+        result = await ping_host(host, monitor.get("timeout", 2))
         if result.is_alive:
-            return MonitorStatus(
-                name=monitor["name"],
-                host_or_url=host,
-                status="OK",
-                message=f"{result.avg_rtt}ms",
-                monitor_type="ping",
-            )
+            return make_result(monitor, host, "OK", format_ping_result(result), TimingRecord(rtt=result.avg_rtt))
         else:
-            return MonitorStatus(
-                name=monitor["name"],
-                host_or_url=host,
-                status="Down",
-                message="Host is down",
-                monitor_type="ping",
-            )
+            return make_result(monitor, host, "Down", "Host is down")
     except Exception as e:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=host,
-            status="Error",
-            message=str(e),
-            monitor_type="ping",
-        )
+        return make_result(monitor, host, "Error", str(e))
+
+
+def _port_error(monitor, target, error: Exception):
+    if isinstance(error, asyncio.TimeoutError):
+        return make_result(monitor, target, "Timeout", "")
+    if isinstance(error, ssl.SSLError):
+        return make_result(monitor, target, "TLS error", str(error))
+    if isinstance(error, ConnectionRefusedError):
+        return make_result(monitor, target, "Refused", str(error))
+    return make_result(monitor, target, f"Error: {error}", "")
+
+
+async def check_tcp(session, monitor):
+    target = f"{monitor['host']}:{monitor['port']}"
+    try:
+        result = await tcp.open_port(monitor["host"], int(monitor["port"]), monitor.get("timeout", 5))
+    except (asyncio.TimeoutError, OSError) as e:
+        return _port_error(monitor, target, e)
+    return make_result(monitor, target, "OK", f"Connected in {result.connect * 1000:.0f}ms",
+                       TimingRecord(connect=_ms(result.connect)))
+
+
+async def check_tls(session, monitor):
+    port = int(monitor.get("port", 443))
+    target = f"{monitor['host']}:{port}"
+    try:
+        result, cached = await tcp.certificate_expiry(monitor["host"], port, monitor.get("timeout", 5),
+                                                      monitor.get("server_name"))
+    except (asyncio.TimeoutError, OSError) as e:
+        return _port_error(monitor, target, e)
+    days = (result.not_after - time.time()) / 86400
+    expires = time.strftime("%Y-%m-%d", time.gmtime(result.not_after))
+    if days < 0:
+        status, message = "Expired", f"Certificate expired on {expires}"
+    elif result.verify_error:
+        # an untrusted certificate still has an expiry worth reporting
+        status = "TLS error"
+        message = f"Certificate verify failed: {result.verify_error}, expires in {int(days)} days ({expires})"
+    else:
+        warn_days = monitor.get("warn_days", tcp.tcp_option("warn_days"))
+        status = "Expiring" if days < warn_days else "OK"
+        message = f"Certificate expires in {int(days)} days ({expires})"
+    if cached:
+        message += ", handshake cached"
+    return make_result(monitor, target, status, message,
+                       TimingRecord(connect=_ms(result.connect), handshake=_ms(result.handshake)))
 
 
 async def check_command(session, monitor):
     command = monitor["command"]
     host = monitor.get("host")
+    timeout = monitor.get("timeout", 10)
+    timing = TimingRecord()
+    timing_message = ""
 
     if host:
+        # ssh hands the command to the remote shell, so no local shell is needed
+        run_command = ["ssh", host, command]
         command = f"ssh {host} '{command}'"
+    elif use_shell(monitor):
+        run_command = command
+    else:
+        run_command = shlex.split(command)
 
+    # `timeout` covers the ssh handshake and the command together
+    deadline = time.monotonic() + timeout
     try:
-        proc = await asyncio.create_subprocess_shell(
-            command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-
-        stdout, stderr = await proc.communicate()
-
-        if proc.returncode == 0:
-            return MonitorStatus(
-                name=monitor["name"],
-                host_or_url=command,
-                status="OK",
-                message=f"Exit code: {proc.returncode}",
-                monitor_type="command",
-            )
-        else:
-            return MonitorStatus(
-                name=monitor["name"],
-                host_or_url=command,
-                status="Down",
-                message=f"Exit code: {proc.returncode}",
-                monitor_type="command",
-            )
+        multiplexer = get_multiplexer(host) if host else None
+        if multiplexer:
+            handshake = await multiplexer.ensure_master(host, timeout)
+            run_command = multiplexer.argv(host, monitor["command"])
+            timing.handshake = _ms(handshake)
+            timing_message = "ssh reused" if handshake is None else f"ssh handshake {handshake * 1000:.0f}ms"
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        result = await execute(run_command, remaining)
+        timing.spawn = _ms(result.spawn)
+        timing.run = _ms(result.run)
+        if multiplexer:
+            timing_message = f" ({timing_message}, command {result.run * 1000:.0f}ms)"
+            if result.returncode == 255:
+                # ssh itself failed; the master is probably gone, so reconnect next time
+                multiplexer.discard(host)
+
+        status = "OK" if result.returncode == 0 else "Down"
+        return make_result(monitor, command, status, f"Exit code: {result.returncode}{timing_message}", timing)
+    except asyncio.TimeoutError:
+        return make_result(monitor, command, "Timeout", "", timing)
+    except SSHError as e:
+        return make_result(monitor, command, "Down", str(e), timing)
     except Exception as e:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=command,
-            status="Error",
-            message=str(e),
-            monitor_type="command",
-        )
-
-def _load_ping_monitors_from_csv(monitor_config):
-    csv_path = monitor_config.get("path")
-    if not csv_path:
-        return []
-
-    new_monitors = []
+        return make_result(monitor, command, "Error", str(e))
+
+
+class UrlChecker(Checker):
+    required = ("url",)
+    check = staticmethod(check_url)
+
+    def validate(self, monitor):
+        super().validate(monitor)
+        method = str(monitor.get("method", "GET")).upper()
+        if method not in HTTP_METHODS:
+            raise ValueError(f"unknown method {method}")
+        if method == "HEAD" and (monitor.get("expect_substring") or monitor.get("expect_regex")
+                                 or monitor.get("max_body_bytes")):
+            raise ValueError("expect_substring, expect_regex and max_body_bytes need a GET request")
+        try:
+            _expected_statuses(monitor)
+        except (TypeError, ValueError):
+            raise ValueError(f"expect_status must be a status code or a list of them, not {monitor['expect_status']!r}")
+        if monitor.get("expect_regex"):
+            try:
+                _compile_body_regex(monitor["expect_regex"])
+            except re.error as e:
+                raise ValueError(f"expect_regex: {e}")
+
+
+class SyncthingChecker(Checker):
+    required = ("url", "api_key")
+    check = staticmethod(check_syncthing)
+
+    def validate(self, monitor):
+        super().validate(monitor)
+        if monitor.get("folder") and monitor.get("device"):
+            raise ValueError("set folder or device, not both")
+        if not isinstance(monitor.get("min_completion", 100), (int, float)):
+            raise ValueError(f"min_completion must be a number, not {monitor['min_completion']!r}")
+
+
+class PingChecker(Checker):
+    required = ("host",)
+    check = staticmethod(check_ping)
+
+
+class CommandChecker(Checker):
+    required = ("command",)
+    check = staticmethod(check_command)
+
+    def validate(self, monitor):
+        super().validate(monitor)
+        if not monitor.get("host") and not use_shell(monitor):
+            try:
+                shlex.split(monitor["command"])
+            except ValueError as e:
+                raise ValueError(f"command: {e}")
+
+
+def _validate_port(monitor):
     try:
-        with open(csv_path, "r") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                host = row.get("host") or row.get("ip")
-                if not host:
-                    print(
-                        f"Warning: Skipping row in {csv_path} because it's missing 'host' or 'ip' column: {row}"
-                    )
-                    continue
-                new_monitor = {
-                    "name": row["name"],
-                    "host": host,
-                    "type": "ping",
-                }
-                new_monitor.update(
-                    {
-                        k: v
-                        for k, v in monitor_config.items()
-                        if k not in ["type", "path"]
-                    }
-                )
-                new_monitors.append(new_monitor)
-    except FileNotFoundError:
-        print(f"Warning: CSV file not found at {csv_path}")
-    except Exception as e:
-        print(f"Error reading CSV file {csv_path}: {e}")
+        port = int(monitor.get("port", 443))
+    except (TypeError, ValueError):
+        port = None
+    if port is None or not 0 < port < 65536:
+        raise ValueError(f"port must be a number from 1 to 65535, not {monitor['port']!r}")
+
+
+class TcpChecker(Checker):
+    required = ("host", "port")
+    check = staticmethod(check_tcp)
+
+    def validate(self, monitor):
+        super().validate(monitor)
+        _validate_port(monitor)
+
+
+class TlsChecker(Checker):
+    required = ("host",)
+    check = staticmethod(check_tls)
+
+    def validate(self, monitor):
+        super().validate(monitor)
+        _validate_port(monitor)
 
-    return new_monitors
 
+register_checker("url", UrlChecker())
+register_checker("syncthing", SyncthingChecker())
+register_checker("ping", PingChecker())
+register_checker("command", CommandChecker())
+register_checker("tcp", TcpChecker())
+register_checker("tls", TlsChecker())
 
-def _load_url_monitors_from_csv(monitor_config):
-    csv_path = monitor_config.get("path")
-    default_domain = monitor_config.get("domain")
-    if not csv_path:
-        return []
+CONFIG_ERROR = "Config error"
 
-    new_monitors = []
+
+def validate_monitor(monitor: dict) -> dict:
+    """Check a monitor's config once, at load time.
+
+    Returns the monitor itself, or a copy with a `config_error` message that
+    check_monitor reports instead of running the check. Unknown types are
+    left alone; check_monitor reports those.
+    """
+    checker = get_checker(monitor.get("type", "url"))
+    if checker is None:
+        return monitor
     try:
-        with open(csv_path, "r") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if "url" in row and row["url"]:
-                    url = row["url"]
-                else:
-                    subdomain = row.get("name") or row.get("subdomain")
-                    domain = row.get("domain") or default_domain
-                    if not subdomain or not domain:
-                        print(
-                            f"Warning: Skipping row in {csv_path} because it's missing 'subdomain' or 'domain' column: {row}"
-                        )
-                        continue
-
-                    ssl_val = str(row.get("ssl", "")).lower()
-                    protocol = "https" if ssl_val in ["true", "1", "yes"] else "http"
-
-                    url = f"{protocol}://{subdomain}.{domain}"
-
-                new_monitor = {"name": row["name"], "url": url, "type": "url"}
-                new_monitor.update(
-                    {
-                        k: v
-                        for k, v in monitor_config.items()
-                        if k not in ["type", "path", "domain"]
-                    }
-                )
-                new_monitors.append(new_monitor)
-    except FileNotFoundError:
-        print(f"Warning: CSV file not found at {csv_path}")
-    except Exception as e:
-        print(f"Error reading CSV file {csv_path}: {e}")
+        checker.validate(monitor)
+    except ValueError as e:
+        return {**monitor, "config_error": str(e)}
+    return monitor
+
+
+async def _config_error(monitor) -> CheckResult:
+    target = monitor.get("host") or monitor.get("url") or monitor.get("command") or ""
+    return make_result(monitor, target, CONFIG_ERROR, monitor["config_error"])
+
 
-    return new_monitors
+async def _unknown_type(monitor) -> CheckResult:
+    return make_result(monitor, monitor.get("host", monitor.get("url")), "Unknown type",
+                       f"Monitor type '{monitor.get('type')}' is not recognized.")
 
 
-def get_config(config_path):
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+def run_check(session, monitor):
+    """Start the monitor's check; awaiting it gives a CheckResult."""
+    if "config_error" in monitor:
+        return _config_error(monitor)
+    checker = get_checker(monitor.get("type", "url"))
+    if checker is None:
+        return _unknown_type(monitor)
+    return checker.check(session, monitor)
 
-    new_monitors = []
-    monitors_to_remove = []
 
-    if "monitors" in config:
-        for monitor in config["monitors"]:
-            if monitor.get("type") == "ping_csv":
-                new_monitors.extend(_load_ping_monitors_from_csv(monitor))
-                monitors_to_remove.append(monitor)
-            elif monitor.get("type") == "url_csv":
-                new_monitors.extend(_load_url_monitors_from_csv(monitor))
-                monitors_to_remove.append(monitor)
+async def check_monitor(session, monitor) -> MonitorStatus:
+    return (await run_check(session, monitor)).to_status()
 
-    if "monitors" in config:
-        config["monitors"].extend(new_monitors)
-        for monitor in monitors_to_remove:
-            config["monitors"].remove(monitor)
 
-    return config
+UNREACHABLE = "Unreachable (parent down)"
 
-async def check_monitor(session, monitor):
+
+def parent_of(monitor: dict, monitors) -> str | None:
+    """The monitor's `depends_on` parent, if it is one of `monitors` (a mapping or registry keyed by name).
+
+    Dependency cycles are ignored so that every monitor in a cycle is still checked.
+    """
+    parent = monitor.get("depends_on")
+    if not parent or parent not in monitors:
+        return None
+    seen = {monitor["name"]}
+    current = parent
+    while current is not None and current in monitors:
+        if current in seen:
+            return None
+        seen.add(current)
+        ancestor = monitors[current] if isinstance(monitors, dict) else monitors.monitor(current)
+        current = ancestor.get("depends_on")
+    return parent
+
+
+def unreachable_status(monitor: dict, parent) -> CheckResult:
     monitor_type = monitor.get("type", "url")
-    if monitor_type == "url":
-        return await check_url(session, monitor)
-    elif monitor_type == "syncthing":
-        return await check_syncthing(session, monitor)
-    elif monitor_type == "ping":
-        return await check_ping(session, monitor)
-    elif monitor_type == "command":
-        return await check_command(session, monitor)
-    else:
-        return MonitorStatus(
-            name=monitor["name"],
-            host_or_url=monitor.get("host", monitor.get("url")),
-            status="Unknown type",
-            message=f"Monitor type '{monitor_type}' is not recognized.",
-            monitor_type=monitor_type,
-        )
+    target = monitor.get("command") if monitor_type == "command" else monitor.get("host", monitor.get("url"))
+    return make_result(monitor, target or "", UNREACHABLE, f"{parent.name} is {parent.status}")
+
+
+def start_checks(monitors: list, check) -> list[asyncio.Task]:
+    """Start check(monitor) for every monitor at once.
+
+    A monitor whose `depends_on` parent is also in `monitors` waits for the
+    parent's result and is not checked at all when the parent is down.
+    """
+    by_name = {monitor["name"]: monitor for monitor in monitors}
+    tasks = {}
+
+    async def run(monitor, parent):
+        # shield: a cancelled child must not cancel the parent's check
+        parent_result = await asyncio.shield(tasks[parent])
+        if not is_up(parent_result):
+            return unreachable_status(monitor, parent_result)
+        return await check(monitor)
+
+    started = []
+    for monitor in monitors:
+        parent = parent_of(monitor, by_name)
+        task = asyncio.ensure_future(check(monitor) if parent is None else run(monitor, parent))
+        tasks.setdefault(monitor["name"], task)
+        started.append(task)
+    return started
+
+
+async def iter_checks(session, monitors):
+    """Check all monitors concurrently and yield each result as soon as it is ready."""
+    tasks = start_checks(monitors, lambda monitor: run_check(session, monitor))
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 class Monitor(BaseModel):
@@ -285,13 +581,32 @@ class Monitor(BaseModel):
     api_key: str = None
     command: str = None
     timeout: int = 10
+    interval: float = None
+    shell: bool = None
+    depends_on: str = None
+    method: str = "GET"
+    max_body_bytes: int = None
+    expect_status: Union[int, List[int]] = None
+    expect_substring: str = None
+    expect_regex: str = None
+    folder: str = None
+    device: str = None
+    min_completion: float = 100
+    port: int = None
+    server_name: str = None
+    warn_days: float = None
 
 def is_up(result: MonitorStatus) -> bool:
     return (isinstance(result.status, int) and 200 <= result.status < 300) or result.status == "OK"
 
-def filter_monitors(monitors: list, name: str = None, types: List[str] = None) -> list:
-    if name:
-        monitors = [m for m in monitors if m['name'] == name]
-    if types:
-        monitors = [m for m in monitors if m.get('type', 'url') in types]
-    return monitors
+def filter_monitors(monitors: list, name: str = None, types: List[str] = None, tags: List[str] = None) -> list:
+    """One-off filter of a monitor list; keep a MonitorRegistry around to filter the same monitors repeatedly."""
+    if not (name or types or tags):
+        return monitors
+    registry = MonitorRegistry(monitors)
+    return [record.config for record in registry.select(names=name, types=types, tags=tags)]
+
+def select_monitors(config: dict, name: str = None, types: List[str] = None, tags: List[str] = None) -> list:
+    ignored_monitors = set(config.get("ignore") or [])
+    monitors = [validate_monitor(m) for m in config.get("monitors", []) if m['name'] not in ignored_monitors]
+    return filter_monitors(monitors, name=name, types=types, tags=tags)
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import signal
+import time
+from typing import NamedTuple
+
+from . import metrics
+
+DEFAULT_COMMANDS_CONFIG = {
+    "max_parallel": 32,
+    "shell": True,
+}
+
+_commands_config = dict(DEFAULT_COMMANDS_CONFIG)
+_semaphore = None
+_semaphore_loop = None
+
+
+class CommandResult(NamedTuple):
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    spawn: float
+    run: float
+
+
+def configure_commands(commands_config: dict = None):
+    """Set subprocess options from the top-level `commands:` section of the config.
+
+    At most `max_parallel` command checks run at once. `shell` is the default
+    for monitors without their own `shell` key; when false, commands are split
+    with shlex and executed directly instead of through /bin/sh.
+    """
+    global _commands_config, _semaphore
+    _commands_config = dict(DEFAULT_COMMANDS_CONFIG)
+    _commands_config.update(commands_config or {})
+    _semaphore = None
+
+
+def use_shell(monitor) -> bool:
+    return monitor.get("shell", _commands_config["shell"])
+
+
+def get_semaphore() -> asyncio.Semaphore:
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(_commands_config["max_parallel"])
+        _semaphore_loop = loop
+    return _semaphore
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def run_command(command: str | list, timeout: float) -> CommandResult:
+    """Run a command string through the shell, or an argv list directly.
+
+    Waits for a free slot first, then raises asyncio.TimeoutError if the
+    command runs longer than `timeout` seconds. The command gets its own
+    process group so everything it started is killed along with it.
+    `spawn` and `run` are the seconds spent starting the process and
+    waiting for it to exit.
+    """
+    async with get_semaphore():
+        start = time.monotonic()
+        if isinstance(command, str):
+            proc = await asyncio.create_subprocess_shell(
+                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                stdin=asyncio.subprocess.DEVNULL, start_new_session=True,
+            )
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                stdin=asyncio.subprocess.DEVNULL, start_new_session=True,
+            )
+        spawned = time.monotonic()
+        metrics.subprocesses_running.inc()
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            _kill_group(proc)
+            await proc.wait()
+            raise
+        except asyncio.CancelledError:
+            _kill_group(proc)
+            # reap it, or it stays a zombie and its pipes outlive the loop
+            await asyncio.shield(proc.wait())
+            raise
+        finally:
+            metrics.subprocesses_running.dec()
+        return CommandResult(proc.returncode, stdout, stderr, spawned - start, time.monotonic() - spawned)
@@ -0,0 +1,262 @@
+import asyncio
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from .core import MonitorStatus, is_up
+
+DEFAULT_HISTORY_CONFIG = {
+    "path": None,
+    "flush_interval": 5,
+    "max_batch": 5000,
+    "prune_interval": 3600,
+    "retention": {
+        "raw": "2d",
+        "1m": "14d",
+        "1h": "400d",
+    },
+}
+
+RESOLUTIONS = {"1m": 60, "1h": 3600}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS monitors (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checks (
+    monitor_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    up INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    latency REAL,
+    PRIMARY KEY (monitor_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS checks_ts ON checks (ts);
+"""
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_{resolution} (
+    monitor_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    up_count INTEGER NOT NULL,
+    latency_sum REAL NOT NULL,
+    latency_count INTEGER NOT NULL,
+    latency_min REAL,
+    latency_max REAL,
+    PRIMARY KEY (monitor_id, bucket)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO rollup_{resolution} VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (monitor_id, bucket) DO UPDATE SET
+    count = count + excluded.count,
+    up_count = up_count + excluded.up_count,
+    latency_sum = latency_sum + excluded.latency_sum,
+    latency_count = latency_count + excluded.latency_count,
+    latency_min = min(coalesce(latency_min, excluded.latency_min), coalesce(excluded.latency_min, latency_min)),
+    latency_max = max(coalesce(latency_max, excluded.latency_max), coalesce(excluded.latency_max, latency_max))
+"""
+
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value) -> float:
+    """Parse durations like "90s", "30m", "24h", "7d" or "2w" into seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _DURATION_RE.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+def resolution_for(range_seconds: float) -> str:
+    if range_seconds <= 2 * 3600:
+        return "raw"
+    if range_seconds <= 7 * 86400:
+        return "1m"
+    return "1h"
+
+
+class History:
+    """Records every check result in SQLite (WAL mode) and answers range queries.
+
+    Results are buffered in memory and written in batches from a worker thread,
+    so recording never blocks the event loop on disk. Every batch also updates
+    the 1m and 1h rollup tables, and raw rows and rollups older than their
+    retention are pruned periodically.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5, max_batch: int = 5000,
+                 prune_interval: float = 3600, retention: dict = None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.prune_interval = prune_interval
+        retention = {**DEFAULT_HISTORY_CONFIG["retention"], **(retention or {})}
+        self.retention = {key: parse_duration(value) for key, value in retention.items()}
+        self._buffer: list[tuple] = []
+        self._monitor_ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_task = None
+        self._flush_now = asyncio.Event()
+        self._last_prune = 0.0
+        self._db = self._connect()
+        with self._db:
+            self._db.executescript(SCHEMA)
+            for resolution in RESOLUTIONS:
+                self._db.executescript(ROLLUP_SCHEMA.format(resolution=resolution))
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def record(self, result: MonitorStatus, latency: float = None):
+        self._buffer.append((result.name, result.checked_at or time.time(), is_up(result), str(result.status), latency))
+        if len(self._buffer) >= self.max_batch:
+            self._flush_now.set()
+
+    async def start(self):
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        self._db.close()
+
+    async def flush(self):
+        batch, self._buffer = self._buffer, []
+        if batch:
+            await asyncio.to_thread(self._write, batch)
+        if time.time() - self._last_prune >= self.prune_interval:
+            self._last_prune = time.time()
+            await asyncio.to_thread(self._prune)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except sqlite3.Error as e:
+                print(f"Error writing check history to {self.path}: {e}", file=sys.stderr)
+
+    def _monitor_id(self, name: str) -> int:
+        monitor_id = self._monitor_ids.get(name)
+        if monitor_id is None:
+            self._db.execute("INSERT OR IGNORE INTO monitors (name) VALUES (?)", (name,))
+            monitor_id = self._db.execute("SELECT id FROM monitors WHERE name = ?", (name,)).fetchone()[0]
+            self._monitor_ids[name] = monitor_id
+        return monitor_id
+
+    def _write(self, batch: list[tuple]):
+        with self._lock, self._db:
+            rows = []
+            rollups = {resolution: {} for resolution in RESOLUTIONS}
+            for name, ts, up, status, latency in batch:
+                monitor_id = self._monitor_id(name)
+                rows.append((monitor_id, ts, int(up), status, latency))
+                for resolution, seconds in RESOLUTIONS.items():
+                    key = (monitor_id, int(ts // seconds * seconds))
+                    agg = rollups[resolution].setdefault(key, [0, 0, 0.0, 0, None, None])
+                    agg[0] += 1
+                    agg[1] += int(up)
+                    if latency is not None:
+                        agg[2] += latency
+                        agg[3] += 1
+                        agg[4] = latency if agg[4] is None else min(agg[4], latency)
+                        agg[5] = latency if agg[5] is None else max(agg[5], latency)
+
+            self._db.executemany("INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?, ?)", rows)
+            for resolution, aggregates in rollups.items():
+                self._db.executemany(
+                    ROLLUP_UPSERT.format(resolution=resolution),
+                    [(*key, *agg) for key, agg in aggregates.items()],
+                )
+
+    def _prune(self):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM checks WHERE ts < ?", (now - self.retention["raw"],))
+            for resolution in RESOLUTIONS:
+                self._db.execute(
+                    f"DELETE FROM rollup_{resolution} WHERE bucket < ?", (now - self.retention[resolution],)
+                )
+
+    async def query(self, name: str, range_seconds: float, resolution: str = None) -> dict:
+        return await asyncio.to_thread(self._query, name, range_seconds, resolution)
+
+    def _query(self, name: str, range_seconds: float, resolution: str = None) -> dict:
+        resolution = resolution or resolution_for(range_seconds)
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution!r}")
+        end = time.time()
+        start = end - range_seconds
+        history = {"name": name, "resolution": resolution, "start": start, "end": end, "uptime": None, "points": []}
+
+        with self._lock:
+            row = self._db.execute("SELECT id FROM monitors WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return history
+            if resolution == "raw":
+                rows = self._db.execute(
+                    "SELECT ts, up, status, latency FROM checks WHERE monitor_id = ? AND ts >= ? ORDER BY ts",
+                    (row[0], start),
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    f"SELECT bucket, count, up_count, latency_sum, latency_count, latency_min, latency_max "
+                    f"FROM rollup_{resolution} WHERE monitor_id = ? AND bucket >= ? ORDER BY bucket",
+                    (row[0], int(start // RESOLUTIONS[resolution] * RESOLUTIONS[resolution])),
+                ).fetchall()
+
+        if resolution == "raw":
+            history["points"] = [
+                {"t": ts, "up": bool(up), "status": status, "latency": latency} for ts, up, status, latency in rows
+            ]
+            total, up_total = len(rows), sum(r[1] for r in rows)
+        else:
+            history["points"] = [
+                {
+                    "t": bucket,
+                    "count": count,
+                    "uptime": up_count / count,
+                    "latency_avg": latency_sum / latency_count if latency_count else None,
+                    "latency_min": latency_min,
+                    "latency_max": latency_max,
+                }
+                for bucket, count, up_count, latency_sum, latency_count, latency_min, latency_max in rows
+            ]
+            total, up_total = sum(r[1] for r in rows), sum(r[2] for r in rows)
+
+        if total:
+            history["uptime"] = up_total / total
+        return history
+
+
+def open_history(history_config: dict = None) -> History | None:
+    """Create a History from the top-level `history:` section, or None if no `path` is set."""
+    config = {**DEFAULT_HISTORY_CONFIG, **(history_config or {})}
+    if not config["path"]:
+        return None
+    return History(
+        config["path"],
+        flush_interval=config["flush_interval"],
+        max_batch=config["max_batch"],
+        prune_interval=config["prune_interval"],
+        retention=config["retention"],
+    )
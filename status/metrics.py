@@ -0,0 +1,216 @@
+import asyncio
+import bisect
+import os
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def remove(self, **labels):
+        self._values.pop(self._key(labels), None)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Counter(Gauge):
+    kind = "counter"
+
+    def set(self, value, **labels):
+        raise TypeError("Counters can only be incremented")
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # one count per bucket plus +Inf, then sum
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def series(self, **labels) -> list | None:
+        """A copy of the per-bucket counts (plus +Inf) and sum, as kept by observe()."""
+        series = self._series.get(self._key(labels))
+        return None if series is None else list(series)
+
+    def set_series(self, series: list, **labels):
+        self._series[self._key(labels)] = list(series)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, series in self._series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(float(bound))})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Register a callable that refreshes gauges right before rendering."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+monitor_up = REGISTRY.register(Gauge(
+    "status_monitor_up", "Whether the last check of the monitor succeeded (1) or not (0).", ("name", "type")))
+monitor_latency = REGISTRY.register(Gauge(
+    "status_monitor_latency_seconds", "Duration of the last check of the monitor.", ("name", "type")))
+monitor_last_check = REGISTRY.register(Gauge(
+    "status_monitor_last_check_timestamp_seconds", "Unix time of the last check of the monitor.", ("name", "type")))
+checks_total = REGISTRY.register(Counter(
+    "status_checks_total", "Checks run, by monitor type and outcome.", ("type", "result")))
+checks_skipped_total = REGISTRY.register(Counter(
+    "status_checks_skipped_total", "Checks not run because a monitor's depends_on parent was down.", ("type",)))
+check_duration = REGISTRY.register(Histogram(
+    "status_check_duration_seconds", "Time spent in check_monitor, by monitor type.", ("type",)))
+scheduler_lag = REGISTRY.register(Histogram(
+    "status_scheduler_lag_seconds", "How late checks start compared to when they were due.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)))
+checks_in_flight = REGISTRY.register(Gauge(
+    "status_checks_in_flight", "Checks currently running."))
+subprocesses_running = REGISTRY.register(Gauge(
+    "status_subprocesses_running", "Command monitor subprocesses currently running."))
+monitors_backed_off = REGISTRY.register(Gauge(
+    "status_monitors_backed_off", "Monitors checked less often because they kept failing."))
+agent_last_seen = REGISTRY.register(Gauge(
+    "status_agent_last_seen_timestamp_seconds", "Unix time of the last push from each agent.", ("agent",)))
+agent_stale = REGISTRY.register(Gauge(
+    "status_agent_stale", "Whether the agent stopped pushing results (1) or not (0).", ("agent",)))
+event_loop_lag = REGISTRY.register(Gauge(
+    "status_event_loop_lag_seconds", "How late the last event loop lag probe woke up."))
+open_fds = REGISTRY.register(Gauge(
+    "status_open_fds", "Open file descriptors of the process."))
+open_sockets = REGISTRY.register(Gauge(
+    "status_open_sockets", "Open sockets of the process."))
+
+
+def _collect_fds():
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return
+    sockets = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                sockets += 1
+        except OSError:
+            pass
+    open_fds.set(len(fds))
+    open_sockets.set(sockets)
+
+
+REGISTRY.add_collector(_collect_fds)
+
+
+def record_check(result, up: bool, duration: float = None):
+    """Record a result. `duration` is None for results that did not run a check (e.g. parent down)."""
+    labels = {"name": result.name, "type": result.monitor_type}
+    monitor_up.set(1 if up else 0, **labels)
+    monitor_last_check.set(result.checked_at or time.time(), **labels)
+    if duration is None:
+        checks_skipped_total.inc(type=result.monitor_type)
+        return
+    monitor_latency.set(duration, **labels)
+    checks_total.inc(type=result.monitor_type, result="up" if up else "down")
+    check_duration.observe(duration, type=result.monitor_type)
+
+
+def forget_monitor(name: str, monitor_type: str):
+    for gauge in (monitor_up, monitor_latency, monitor_last_check):
+        gauge.remove(name=name, type=monitor_type)
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Sleep for `interval` in a loop and record how late each wake-up is."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        event_loop_lag.set(max(0.0, loop.time() - start - interval))
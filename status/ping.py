@@ -0,0 +1,136 @@
+import asyncio
+
+# icmplib is imported by the first ping check (see _load_icmplib), so runs without
+# ping monitors don't pay for it.
+async_ping = None
+async_multiping = None
+
+DEFAULT_PING_CONFIG = {
+    "engine": "single",
+    "count": 1,
+    "interval": 0.2,
+    "concurrency": 50,
+    "window": 0.05,
+    "privileged": False,
+}
+
+_ping_config = dict(DEFAULT_PING_CONFIG)
+_batcher = None
+_batcher_loop = None
+
+
+def configure_ping(ping_config: dict = None):
+    """Set ping options from the top-level `ping:` section of the config.
+
+    `engine` is either "single" (one async_ping per monitor) or "batch"
+    (due ping monitors are collected for `window` seconds and probed together
+    with async_multiping, at most `concurrency` sockets at a time).
+    """
+    global _ping_config, _batcher
+    _ping_config = dict(DEFAULT_PING_CONFIG)
+    _ping_config.update(ping_config or {})
+    _batcher = None
+
+
+def format_ping_result(result) -> str:
+    return f"{result.avg_rtt}ms, loss {result.packet_loss:.0%}, jitter {result.jitter}ms"
+
+
+class PingBatcher:
+    def __init__(self, count: int, interval: float, concurrency: int, window: float, privileged: bool):
+        self.count = count
+        self.interval = interval
+        self.concurrency = concurrency
+        self.window = window
+        self.privileged = privileged
+        self._batches: dict[float, list] = {}
+        self._flushing: set[asyncio.Task] = set()
+
+    async def ping(self, host: str, timeout: float):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.setdefault(timeout, [])
+        batch.append((host, future))
+        if len(batch) == 1:
+            loop.call_later(self.window, self._start_flush, timeout)
+        return await future
+
+    def _start_flush(self, timeout: float):
+        task = asyncio.ensure_future(self._flush(timeout))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush(self, timeout: float):
+        batch = self._batches.pop(timeout, [])
+        hosts = list(dict.fromkeys(host for host, _ in batch))
+        try:
+            results = await async_multiping(
+                hosts,
+                count=self.count,
+                interval=self.interval,
+                timeout=timeout,
+                concurrent_tasks=self.concurrency,
+                privileged=self.privileged,
+            )
+            by_host = dict(zip(hosts, results))
+        except Exception:
+            # One bad host (e.g. a failed name lookup) fails the whole multiping,
+            # so retry each host on its own to report errors per monitor.
+            by_host = await self._ping_each(hosts, timeout)
+
+        for host, future in batch:
+            if future.done():
+                continue
+            result = by_host[host]
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _ping_each(self, hosts: list, timeout: float) -> dict:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def ping_one(host):
+            async with semaphore:
+                return await async_ping(
+                    host, count=self.count, interval=self.interval, timeout=timeout, privileged=self.privileged
+                )
+
+        results = await asyncio.gather(*(ping_one(host) for host in hosts), return_exceptions=True)
+        return dict(zip(hosts, results))
+
+
+def _load_icmplib():
+    global async_ping, async_multiping
+    if async_ping is None or async_multiping is None:
+        import icmplib
+        async_ping = async_ping or icmplib.async_ping
+        async_multiping = async_multiping or icmplib.async_multiping
+
+
+def get_batcher() -> PingBatcher:
+    global _batcher, _batcher_loop
+    loop = asyncio.get_running_loop()
+    if _batcher is None or _batcher_loop is not loop:
+        _batcher = PingBatcher(
+            count=_ping_config["count"],
+            interval=_ping_config["interval"],
+            concurrency=_ping_config["concurrency"],
+            window=_ping_config["window"],
+            privileged=_ping_config["privileged"],
+        )
+        _batcher_loop = loop
+    return _batcher
+
+
+async def ping_host(host: str, timeout: float):
+    _load_icmplib()
+    if _ping_config["engine"] == "batch":
+        return await get_batcher().ping(host, timeout)
+    return await async_ping(
+        host,
+        count=_ping_config["count"],
+        interval=_ping_config["interval"],
+        timeout=timeout,
+        privileged=_ping_config["privileged"],
+    )
@@ -0,0 +1,201 @@
+import fnmatch
+import itertools
+from dataclasses import dataclass
+
+GLOB_CHARS = frozenset("*?[")
+MAX_CACHED_QUERIES = 256
+
+
+@dataclass(slots=True)
+class MonitorRecord:
+    """What the registry knows about one monitor. `config` is the monitor dict itself, not a copy."""
+    name: str
+    type: str
+    host: str | None
+    tags: frozenset
+    parent: str | None
+    config: dict
+
+
+def url_host(url: str) -> str | None:
+    # urlsplit() is the slowest part of building a large registry; only the hostname is needed.
+    _, sep, rest = url.partition("://")
+    netloc = rest if sep else url
+    for delimiter in "/?#":
+        netloc = netloc.split(delimiter, 1)[0]
+    netloc = netloc.rpartition("@")[2]
+    if netloc.startswith("["):
+        return netloc[1:].partition("]")[0].lower() or None
+    return netloc.partition(":")[0].lower() or None
+
+
+def monitor_host(monitor: dict) -> str | None:
+    if monitor.get("host"):
+        return monitor["host"]
+    if monitor.get("url"):
+        return url_host(monitor["url"])
+    return None
+
+
+def make_record(monitor: dict) -> MonitorRecord:
+    tags = monitor.get("tags") or ()
+    if isinstance(tags, str):
+        tags = (tags,)
+    return MonitorRecord(monitor["name"], monitor.get("type", "url"), monitor_host(monitor), frozenset(tags),
+                         monitor.get("depends_on"), monitor)
+
+
+def _is_glob(pattern: str) -> bool:
+    return not GLOB_CHARS.isdisjoint(pattern)
+
+
+def _as_key(values) -> tuple | None:
+    if not values:
+        return None
+    if isinstance(values, str):
+        values = (values,)
+    return tuple(sorted(set(values)))
+
+
+class MonitorRegistry:
+    """Monitors indexed by name, type, host and tag.
+
+    select() intersects the index sets for the requested filters and caches
+    the resulting tuple of records until the registry changes, so repeated
+    queries (every API request, every redraw) are a dict lookup.
+    """
+
+    def __init__(self, monitors: list = ()):
+        self._records: dict[str, MonitorRecord] = {}
+        self._by_type: dict[str, set[str]] = {}
+        self._by_host: dict[str, set[str]] = {}
+        self._by_tag: dict[str, set[str]] = {}
+        self._by_parent: dict[str, set[str]] = {}
+        self._queries: dict[tuple, tuple[MonitorRecord, ...]] = {}
+        self._name_queries: dict[tuple, tuple[str, ...]] = {}
+        self._position: dict[str, int] = {}
+        self._counter = itertools.count()
+        for monitor in monitors:
+            self._add(make_record(monitor))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, name: str):
+        return name in self._records
+
+    def get(self, name: str) -> MonitorRecord | None:
+        return self._records.get(name)
+
+    def monitor(self, name: str) -> dict | None:
+        record = self._records.get(name)
+        return record.config if record is not None else None
+
+    def dependents(self, name: str) -> set[str]:
+        """Names of the monitors that declare `depends_on: name`."""
+        return self._by_parent.get(name, set())
+
+    @property
+    def monitors(self) -> list:
+        return [record.config for record in self._records.values()]
+
+    def _index(self, record: MonitorRecord) -> list[tuple[dict, str]]:
+        keys = [(self._by_type, record.type)]
+        if record.host:
+            keys.append((self._by_host, record.host))
+        for tag in record.tags:
+            keys.append((self._by_tag, tag))
+        if record.parent:
+            keys.append((self._by_parent, record.parent))
+        return keys
+
+    def _add(self, record: MonitorRecord):
+        previous = self._records.get(record.name)
+        if previous is not None:
+            # a changed monitor keeps its place in the order
+            self._unindex(previous)
+        else:
+            self._position[record.name] = next(self._counter)
+        self._records[record.name] = record
+        for index, key in self._index(record):
+            index.setdefault(key, set()).add(record.name)
+
+    def _remove(self, name: str):
+        record = self._records.pop(name, None)
+        if record is not None:
+            del self._position[name]
+            self._unindex(record)
+
+    def _unindex(self, record: MonitorRecord):
+        name = record.name
+        for index, key in self._index(record):
+            names = index.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del index[key]
+
+    def apply(self, diff):
+        """Apply a config.MonitorDiff; untouched monitors keep their records."""
+        for monitor in diff.removed:
+            self._remove(monitor["name"])
+        for monitor in [*diff.added, *diff.changed]:
+            self._add(make_record(monitor))
+        self._queries.clear()
+        self._name_queries.clear()
+
+    def _match_names(self, patterns: tuple) -> set[str]:
+        matched = set()
+        for pattern in patterns:
+            if _is_glob(pattern):
+                matched.update(fnmatch.filter(self._records, pattern))
+            elif pattern in self._records:
+                matched.add(pattern)
+        return matched
+
+    def select(self, names=None, types=None, tags=None, hosts=None) -> tuple[MonitorRecord, ...]:
+        """Records matching every given filter, in config order.
+
+        Each filter is a name or a list of them; names may be glob patterns.
+        A monitor matches a filter if it matches any of its values.
+        """
+        key = (_as_key(names), _as_key(types), _as_key(tags), _as_key(hosts))
+        cached = self._queries.get(key)
+        if cached is not None:
+            return cached
+
+        names, types, tags, hosts = key
+        candidates = None
+        for index, values in ((self._by_type, types), (self._by_tag, tags), (self._by_host, hosts)):
+            if values is None:
+                continue
+            matched = set().union(*(index.get(value, ()) for value in values))
+            candidates = matched if candidates is None else candidates & matched
+        if names is not None:
+            matched = self._match_names(names)
+            candidates = matched if candidates is None else candidates & matched
+
+        if candidates is None:
+            result = tuple(self._records.values())
+        elif len(candidates) * 8 > len(self._records):
+            # a large share of all monitors: one ordered pass beats sorting
+            result = tuple(record for name, record in self._records.items() if name in candidates)
+        else:
+            result = tuple(self._records[name] for name in sorted(candidates, key=self._position.__getitem__))
+
+        if len(self._queries) >= MAX_CACHED_QUERIES:
+            self._queries.clear()
+        self._queries[key] = result
+        return result
+
+    def names(self, names=None, types=None, tags=None, hosts=None) -> tuple[str, ...]:
+        key = (_as_key(names), _as_key(types), _as_key(tags), _as_key(hosts))
+        cached = self._name_queries.get(key)
+        if cached is None:
+            if len(self._name_queries) >= MAX_CACHED_QUERIES:
+                self._name_queries.clear()
+            cached = self._name_queries[key] = tuple(record.name for record in self.select(*key))
+        return cached
@@ -0,0 +1,90 @@
+import os
+import sys
+
+ALT_SCREEN_ON = "\033[?1049h\033[?25l"
+ALT_SCREEN_OFF = "\033[?25h\033[?1049l"
+CLEAR = "\033[H\033[J"
+DEFAULT_SIZE = os.terminal_size((80, 24))
+
+
+def terminal_size(fd: int = None) -> os.terminal_size:
+    try:
+        size = os.get_terminal_size(sys.stdout.fileno() if fd is None else fd)
+    except (OSError, ValueError):
+        return DEFAULT_SIZE
+    # a terminal that never reported its size says 0x0
+    return size if size.columns and size.lines else DEFAULT_SIZE
+
+
+class TerminalRenderer:
+    """Draws frames of lines on a terminal, rewriting only the rows that changed.
+
+    The previous frame is kept; each render() moves the cursor to changed
+    rows only, so the bytes written per frame are proportional to the number
+    of changed lines. A resize redraws everything. Frames taller than the
+    terminal are split into pages, and next_page() flips through them.
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._frame: list[str] = []
+        self._size = None
+        self.page = 0
+        self.pages = 1
+
+    def open(self):
+        """Switch to the alternate screen and hide the cursor."""
+        self.out.write(ALT_SCREEN_ON)
+        self.out.flush()
+
+    def close(self):
+        self.out.write(ALT_SCREEN_OFF)
+        self.out.flush()
+
+    @property
+    def size(self) -> os.terminal_size:
+        try:
+            fd = self.out.fileno()
+        except (AttributeError, ValueError, OSError):
+            fd = None
+        return terminal_size(fd)
+
+    def next_page(self):
+        self.page = (self.page + 1) % self.pages
+
+    def _paginate(self, lines: list[str], rows: int) -> list[str]:
+        if len(lines) <= rows:
+            self.pages = 1
+            self.page = 0
+            return lines
+        per_page = max(1, rows - 1)  # the last row shows the page footer
+        self.pages = -(-len(lines) // per_page)
+        self.page %= self.pages
+        start = self.page * per_page
+        footer = f"\033[2m-- page {self.page + 1}/{self.pages}, {len(lines)} lines --\033[0m"
+        return lines[start:start + per_page] + [footer]
+
+    def render(self, lines: list[str]) -> int:
+        """Draw a frame and return the number of characters written."""
+        size = self.size
+        output = []
+        if size != self._size:
+            self._size = size
+            self._frame = []
+            output.append(CLEAR)
+
+        frame = self._paginate(lines, size.lines)
+        previous = self._frame
+        for row, line in enumerate(frame):
+            if row >= len(previous) or previous[row] != line:
+                output.append(f"\033[{row + 1};1H{line}\033[K")
+        if len(frame) < len(previous):
+            # clear everything below the new last row
+            output.append(f"\033[{len(frame) + 1};1H\033[J")
+        self._frame = frame
+
+        data = "".join(output)
+        if data:
+            self.out.write(data)
+            self.out.flush()
+        return len(data)
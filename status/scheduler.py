@@ -0,0 +1,301 @@
+import asyncio
+import heapq
+import itertools
+import random
+import sys
+import time
+
+from .core import run_check, CheckResult, MonitorStatus, is_up, parent_of, unreachable_status, UNREACHABLE
+from .breaker import Breakers, breaker_option, probe
+from .config import diff_monitors, watch_config, DEFAULT_RELOAD_CONFIG
+from .registry import MonitorRegistry
+from .session import get_session
+from . import metrics
+
+DEFAULT_INTERVAL = 5
+DEFAULT_JITTER = 0.1
+
+
+def _content(result: MonitorStatus) -> tuple:
+    return result.host_or_url, result.status, result.message, result.monitor_type
+
+
+class ResultStore:
+    def __init__(self):
+        self._results: dict[str, MonitorStatus] = {}
+        self._subscribers: set[asyncio.Queue] = set()
+        self._change_subscribers: set[asyncio.Queue] = set()
+        # bumped on every change, so readers can tell whether anything they built from the store is stale
+        self.version = 0
+        # bumped only when what a result says changes, not when a recheck just moves checked_at or timing
+        self.content_version = 0
+
+    def set(self, result: MonitorStatus):
+        previous = self._results.get(result.name)
+        self._results[result.name] = result
+        self.version += 1
+        if previous is None or _content(previous) != _content(result):
+            self.content_version += 1
+        for queue in self._subscribers:
+            queue.put_nowait(result)
+        if previous is None or previous.status != result.status:
+            for queue in self._change_subscribers:
+                queue.put_nowait(result)
+
+    def subscribe(self, changes_only: bool = False) -> asyncio.Queue:
+        """Return a queue that receives every result stored from now on.
+
+        With `changes_only`, only results whose status differs from the
+        previous result for that monitor (or that are its first) are queued.
+        """
+        queue = asyncio.Queue()
+        if changes_only:
+            self._change_subscribers.add(queue)
+        else:
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        self._change_subscribers.discard(queue)
+
+    def get(self, name: str) -> MonitorStatus | None:
+        return self._results.get(name)
+
+    def remove(self, name: str):
+        if self._results.pop(name, None) is not None:
+            self.version += 1
+            self.content_version += 1
+
+    def results_for(self, names) -> list[MonitorStatus]:
+        get = self._results.get
+        return [r for r in map(get, names) if r is not None]
+
+    def __len__(self):
+        return len(self._results)
+
+
+class Scheduler:
+    """Runs every monitor in the background and keeps the latest result in a ResultStore.
+
+    Due checks are kept in a heap ordered by due time. Each monitor runs every
+    `interval` seconds (its own `interval` key, or the scheduler default) with
+    +/- `jitter` of that interval added so checks drift apart instead of firing
+    in bursts. The first check of every monitor, and of monitors added by a
+    reload, is spread over the whole interval. A monitor is only rescheduled
+    once its check has finished, so the same monitor never runs twice at once.
+
+    Heap entries carry a per-monitor generation; apply() bumps it for changed or
+    removed monitors, which turns their old entries into no-ops.
+
+    A monitor with a `depends_on` parent waits for the parent's first result
+    and is reported as unreachable, without being checked, while the parent
+    is down. Whenever a parent goes up or down its dependents are re-evaluated
+    right away.
+
+    Failing monitors are backed off and probed cheaply by a circuit breaker,
+    see breaker.configure_breaker.
+    """
+
+    def __init__(self, monitors: list, interval: float = DEFAULT_INTERVAL, jitter: float = DEFAULT_JITTER,
+                 store: ResultStore = None, history=None):
+        self.registry = MonitorRegistry(monitors)
+        self.interval = interval
+        self.jitter = jitter
+        self.store = store if store is not None else ResultStore()
+        self.history = history
+        self.breakers = Breakers()
+        self._session = None
+        self._heap: list[tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._generations: dict[str, int] = {}
+        self._in_flight: set[str] = set()
+        self._running: set[asyncio.Task] = set()
+        self._loop_task = None
+        self._wake = asyncio.Event()
+        self._pending = {record.name for record in self.registry}
+        self._ready = asyncio.Event()
+
+    @property
+    def monitors(self) -> list:
+        return self.registry.monitors
+
+    def interval_for(self, monitor) -> float:
+        return float(monitor.get("interval") or self.interval)
+
+    async def start(self):
+        self._session = await get_session()
+        if not self._pending:
+            self._ready.set()
+        now = time.monotonic()
+        for monitor in self.registry.monitors:
+            self._push(self._first_due(now, monitor), monitor["name"])
+        self._loop_task = asyncio.create_task(self._loop())
+
+    def _first_due(self, now: float, monitor) -> float:
+        # Spread first checks over the whole interval; the +/- jitter on later rounds
+        # only keeps them apart, it could never undo a burst. jitter=0 means no spreading.
+        if not self.jitter:
+            return now
+        return now + random.uniform(0, self.interval_for(monitor))
+
+    async def stop(self):
+        tasks = list(self._running)
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running.clear()
+        self._in_flight.clear()
+        self._loop_task = None
+        self._session = None
+
+    async def wait_ready(self):
+        await self._ready.wait()
+
+    def apply(self, diff):
+        """Apply a config.MonitorDiff without disturbing the schedule of unchanged monitors.
+
+        Added and changed monitors are spread over their interval like the
+        first round (unless a check of theirs is still running, which
+        reschedules them when it finishes).
+        Removed monitors are dropped along with their stored result.
+        """
+        now = time.monotonic()
+        self.registry.apply(diff)
+        for monitor in diff.removed:
+            name = monitor["name"]
+            self._generations[name] = self._generations.get(name, 0) + 1
+            self._pending.discard(name)
+            self.store.remove(name)
+            self.breakers.forget(name)
+            metrics.forget_monitor(name, monitor.get("type", "url"))
+            if self._loop_task is not None:
+                self._requeue(self.registry.dependents(name))
+        for monitor in [*diff.added, *diff.changed]:
+            name = monitor["name"]
+            self.breakers.forget(name)
+            self._generations[name] = self._generations.get(name, 0) + 1
+            if self._loop_task is not None and name not in self._in_flight:
+                self._push(self._first_due(now, monitor), name)
+        if not self._pending:
+            self._ready.set()
+
+    async def watch(self, config_path: str, select, reload_config: dict = None):
+        """Re-select monitors whenever the config changes and apply the difference.
+
+        `select(config)` returns the monitors this scheduler should run.
+        """
+        options = {**DEFAULT_RELOAD_CONFIG, **(reload_config or {})}
+        if not options["enabled"]:
+            return
+
+        def on_change(config):
+            diff = diff_monitors(self.monitors, select(config))
+            if diff:
+                print(f"Config reloaded: {len(diff.added)} added, {len(diff.removed)} removed, "
+                      f"{len(diff.changed)} changed", file=sys.stderr)
+                self.apply(diff)
+
+        await watch_config(config_path, on_change, options["interval"])
+
+    def _requeue(self, names):
+        """Check these monitors now, dropping their scheduled entries. Running checks are left alone."""
+        now = time.monotonic()
+        for name in names:
+            if name not in self._in_flight:
+                self._generations[name] = self._generations.get(name, 0) + 1
+                self._push(now, name)
+
+    def _push(self, due: float, name: str):
+        heapq.heappush(self._heap, (due, next(self._seq), name, self._generations.get(name, 0)))
+        self._wake.set()
+
+    async def _loop(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, name, generation = heapq.heappop(self._heap)
+                monitor = self.registry.monitor(name)
+                if monitor is None or generation != self._generations.get(name, 0):
+                    continue
+                parent = parent_of(monitor, self.registry)
+                if parent is not None:
+                    parent_result = self.store.get(parent)
+                    if parent_result is None:
+                        # Parent not checked yet; its first result re-queues this one. Retry later regardless.
+                        self._push(now + self.interval_for(monitor), name)
+                        continue
+                    if not is_up(parent_result):
+                        self._record(monitor, unreachable_status(monitor, parent_result))
+                        self._push(now + self.interval_for(monitor), name)
+                        continue
+                metrics.scheduler_lag.observe(now - due)
+                self._in_flight.add(name)
+                task = asyncio.create_task(self._run(monitor))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            # A timer rather than wait_for: on 3.11 wait_for can swallow the cancellation from stop()
+            # when the timeout fires at the same moment, leaving this loop running forever.
+            timer = None
+            if self._heap:
+                timer = asyncio.get_running_loop().call_later(self._heap[0][0] - now, self._wake.set)
+            try:
+                await self._wake.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    async def _run(self, monitor):
+        name = monitor["name"]
+        metrics.checks_in_flight.inc()
+        try:
+            start = time.monotonic()
+            result = await self._check(monitor)
+            if self.registry.monitor(name) is monitor:
+                self._record(monitor, result, time.monotonic() - start)
+        finally:
+            metrics.checks_in_flight.dec()
+            self._in_flight.discard(name)
+            current = self.registry.monitor(name)
+            if current is not None:
+                interval = self.breakers.interval(name, self.interval_for(current))
+                if current is monitor:
+                    delay = interval + random.uniform(-self.jitter, self.jitter) * interval
+                else:
+                    delay = 0  # changed while running: check the new definition right away
+                self._push(time.monotonic() + delay, name)
+
+    async def _check(self, monitor) -> CheckResult:
+        name = monitor["name"]
+        result = None
+        if breaker_option("probe") and self.breakers.is_open(name):
+            result = await probe(monitor)
+        if result is None:
+            result = await run_check(self._session, monitor)
+
+        previous = self.store.get(name)
+        if (breaker_option("confirm") and previous is not None and previous.status != UNREACHABLE
+                and is_up(previous) != is_up(result)):
+            # Only publish a flip between up and down once a second check agrees.
+            await asyncio.sleep(breaker_option("confirm_delay"))
+            result = await run_check(self._session, monitor)
+
+        self.breakers.record(name, is_up(result))
+        return result
+
+    def _record(self, monitor, result: MonitorStatus, latency: float = None, checked_at: float = None):
+        result.checked_at = checked_at or time.time()
+        previous = self.store.get(result.name)
+        self.store.set(result)
+        if previous is None or is_up(previous) != is_up(result):
+            self._requeue(self.registry.dependents(result.name))
+        metrics.record_check(result, is_up(result), latency)
+        if self.history is not None:
+            self.history.record(result, latency)
+        self._pending.discard(monitor["name"])
+        if not self._pending:
+            self._ready.set()
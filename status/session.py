@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import aiohttp
+
+DEFAULT_HTTP_CONFIG = {
+    "limit": 100,
+    "limit_per_host": 10,
+    "dns_ttl": 300,
+    "keepalive_timeout": 30,
+}
+
+_http_config = dict(DEFAULT_HTTP_CONFIG)
+_session = None
+_session_loop = None
+
+
+def configure_session(http_config: dict = None):
+    """Set connector options from the top-level `http:` section of the config.
+
+    Takes effect the next time the shared session is created.
+    """
+    global _http_config
+    _http_config = dict(DEFAULT_HTTP_CONFIG)
+    _http_config.update(http_config or {})
+
+
+def create_connector() -> aiohttp.TCPConnector:
+    return aiohttp.TCPConnector(
+        limit=_http_config["limit"],
+        limit_per_host=_http_config["limit_per_host"],
+        ttl_dns_cache=_http_config["dns_ttl"],
+        use_dns_cache=True,
+        keepalive_timeout=_http_config["keepalive_timeout"],
+    )
+
+
+def timing_trace_config() -> aiohttp.TraceConfig:
+    """Record monotonic timestamps into the dict passed as `trace_request_ctx`."""
+
+    def mark(name):
+        async def hook(session, context, params):
+            if isinstance(context.trace_request_ctx, dict):
+                context.trace_request_ctx[name] = time.monotonic()
+        return hook
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(mark("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(mark("dns_end"))
+    trace_config.on_connection_create_start.append(mark("connect_start"))
+    trace_config.on_connection_create_end.append(mark("connect_end"))
+    return trace_config
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide session, creating it on first use.
+
+    Connections, DNS lookups and TLS sessions are reused across every check
+    and cycle that shares it.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(connector=create_connector(), trace_configs=[timing_trace_config()])
+        _session_loop = loop
+    return _session
+
+
+async def close_session():
+    global _session, _session_loop
+    if _session is not None and not _session.closed and _session_loop is asyncio.get_running_loop():
+        await _session.close()
+    _session = None
+    _session_loop = None
@@ -0,0 +1,343 @@
+"""Sharded checking: monitors are split across worker processes, each running its own Scheduler.
+
+The coordinator talks to every worker over the worker's stdin/stdout pipes.
+Messages are length-prefixed marshal frames: a 4-byte big-endian length
+followed by marshal.dumps() of a tuple whose first item is the message kind.
+
+    coordinator -> worker   ("start", settings, monitors, interval, jitter)
+                            ("apply", added, removed, changed)
+    worker -> coordinator   ("results", [encoded result, ...])
+                            ("metrics", scheduler lag series, in flight, subprocesses, backed off)
+
+Workers report their scheduler metrics every METRICS_INTERVAL; the
+coordinator serves their sum on /metrics. A worker that exits on its own
+has its monitors marked as errored and is restarted with its shard after a
+growing delay.
+
+marshal is the cheapest serializer in the standard library for plain tuples,
+and both ends always run the same interpreter.
+"""
+import asyncio
+import marshal
+import os
+import struct
+import sys
+import zlib
+
+from .config import MonitorDiff
+from .core import CheckResult, TimingRecord, TIMING_FIELDS, make_result, parent_of
+from .scheduler import Scheduler, DEFAULT_INTERVAL, DEFAULT_JITTER
+from . import metrics
+
+HEADER = struct.Struct("!I")
+FLUSH_INTERVAL = 0.05
+METRICS_INTERVAL = 1
+STOP_TIMEOUT = 5
+RESTART_DELAY = 1
+MAX_RESTART_DELAY = 60
+WORKER_EXITED = "Error: worker exited"
+SETTINGS_SECTIONS = ("http", "ping", "ssh", "commands", "breaker", "syncthing", "tcp")
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def encode_frame(message: tuple) -> bytes:
+    payload = marshal.dumps(message)
+    return HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple | None:
+    try:
+        header = await reader.readexactly(HEADER.size)
+        payload = await reader.readexactly(HEADER.unpack(header)[0])
+    except asyncio.IncompleteReadError:
+        return None
+    return marshal.loads(payload)
+
+
+WORKER_GAUGES = (metrics.checks_in_flight, metrics.subprocesses_running, metrics.monitors_backed_off)
+
+
+def worker_metrics() -> tuple:
+    """This process's scheduler metrics, in the order of a "metrics" frame."""
+    return (metrics.scheduler_lag.series(), *(gauge.get() for gauge in WORKER_GAUGES))
+
+
+def _add_series(*series) -> list | None:
+    present = [counts for counts in series if counts is not None]
+    return [sum(counts) for counts in zip(*present)] if present else None
+
+
+def encode_result(result: CheckResult, latency: float = None) -> tuple:
+    timing = result.timing
+    return (
+        result.name, result.host_or_url, result.status, result.message, result.monitor_type, result.checked_at,
+        None if timing is None else tuple(getattr(timing, field) for field in TIMING_FIELDS),
+        latency,
+    )
+
+
+def decode_result(encoded: tuple) -> tuple[CheckResult, float | None]:
+    name, host_or_url, status, message, monitor_type, checked_at, timing, latency = encoded
+    result = CheckResult(name, host_or_url, status, message, monitor_type,
+                         None if timing is None else TimingRecord(*timing), checked_at)
+    return result, latency
+
+
+def shard_key(monitor: dict, registry) -> str:
+    """The name of the monitor's top-most dependency, so a dependency chain always lands on one shard."""
+    key = monitor["name"]
+    parent = parent_of(monitor, registry)
+    while parent is not None:
+        key = parent
+        parent = parent_of(registry.monitor(parent), registry)
+    return key
+
+
+def shard_for(key: str, workers: int) -> int:
+    # crc32 rather than hash(): it is stable across processes and runs
+    return zlib.crc32(key.encode()) % workers
+
+
+class Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.reader_task = None
+        self.metrics = None
+        self.restarts = 0
+
+    async def spawn(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_ROOT, env.get("PYTHONPATH")]))
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "status.shard",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, env=env,
+        )
+
+    def send(self, message: tuple):
+        if self.process is not None and self.process.returncode is None:
+            self.process.stdin.write(encode_frame(message))
+
+    async def stop(self):
+        if self.process is None:
+            return
+        if self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self.reader_task is not None:
+            self.reader_task.cancel()
+            await asyncio.gather(self.reader_task, return_exceptions=True)
+        self.process = None
+
+
+class ShardedScheduler(Scheduler):
+    """A Scheduler whose checks run in `workers` child processes.
+
+    The coordinator keeps the registry, the result store, metrics and
+    history; workers only run checks and stream results back. Monitors are
+    assigned to workers by a stable hash of their dependency root, and
+    config reloads are split into per-worker diffs.
+    """
+
+    def __init__(self, monitors: list, workers: int, interval: float = DEFAULT_INTERVAL,
+                 jitter: float = DEFAULT_JITTER, store=None, history=None, settings: dict = None):
+        super().__init__(monitors, interval=interval, jitter=jitter, store=store, history=history)
+        self.settings = {key: value for key, value in (settings or {}).items() if key in SETTINGS_SECTIONS}
+        self.workers = [Worker(i) for i in range(workers)]
+        self._shard_of: dict[str, int] = {}
+        self._stopping = False
+        # scheduler lag observed by worker processes that have since exited
+        self._retired_lag = None
+
+    def _assign(self, monitor: dict) -> int:
+        shard = shard_for(shard_key(monitor, self.registry), len(self.workers))
+        self._shard_of[monitor["name"]] = shard
+        return shard
+
+    async def start(self):
+        if not self._pending:
+            self._ready.set()
+        shards = [[] for _ in self.workers]
+        for monitor in self.registry.monitors:
+            shards[self._assign(monitor)].append(monitor)
+        for worker, monitors in zip(self.workers, shards):
+            await worker.spawn()
+            worker.send(("start", self.settings, monitors, self.interval, self.jitter))
+            worker.reader_task = asyncio.create_task(self._read(worker))
+
+    def _shard_monitors(self, index: int) -> list:
+        return [monitor for monitor in self.registry.monitors if self._shard_of.get(monitor["name"]) == index]
+
+    async def stop(self):
+        self._stopping = True
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        self._stopping = False
+
+    async def _read(self, worker: Worker):
+        while True:
+            message = await read_frame(worker.process.stdout)
+            if message is None:
+                if self._stopping:
+                    return
+                await self._restart(worker)
+                continue
+            if message[0] == "metrics":
+                worker.metrics = message[1:]
+                self._merge_metrics()
+                continue
+            if message[0] != "results":
+                continue
+            worker.restarts = 0
+            for encoded in message[1]:
+                result, latency = decode_result(encoded)
+                monitor = self.registry.monitor(result.name)
+                if monitor is not None and self._shard_of.get(result.name) == worker.index:
+                    self._record(monitor, result, latency, result.checked_at)
+
+    async def _restart(self, worker: Worker):
+        code = await worker.process.wait()
+        print(f"Worker {worker.index} exited unexpectedly with code {code}, restarting", file=sys.stderr)
+        self._retired_lag = _add_series(self._retired_lag, worker.metrics and worker.metrics[0])
+        worker.metrics = None
+        self._merge_metrics()
+        for monitor in self._shard_monitors(worker.index):
+            previous = self.store.get(monitor["name"])
+            self._record(monitor, make_result(monitor, previous.host_or_url if previous else "", WORKER_EXITED,
+                                              f"worker {worker.index} exited with code {code}"))
+        await asyncio.sleep(min(RESTART_DELAY * 2 ** worker.restarts, MAX_RESTART_DELAY))
+        worker.restarts += 1
+        await worker.spawn()
+        worker.send(("start", self.settings, self._shard_monitors(worker.index), self.interval, self.jitter))
+
+    def _merge_metrics(self):
+        # each worker reports its own totals; /metrics shows their sum
+        reports = [worker.metrics for worker in self.workers if worker.metrics is not None]
+        lag = _add_series(self._retired_lag, *(report[0] for report in reports))
+        if lag is not None:
+            metrics.scheduler_lag.set_series(lag)
+        for position, gauge in enumerate(WORKER_GAUGES, 1):
+            gauge.set(sum(report[position] for report in reports))
+
+    def _requeue(self, names):
+        # Dependents are re-queued by the worker that runs them.
+        pass
+
+    def apply(self, diff):
+        removed = [[] for _ in self.workers]
+        added = [[] for _ in self.workers]
+        changed = [[] for _ in self.workers]
+        for monitor in diff.removed:
+            shard = self._shard_of.pop(monitor["name"], None)
+            if shard is not None:
+                removed[shard].append(monitor)
+            self._pending.discard(monitor["name"])
+            self.store.remove(monitor["name"])
+            metrics.forget_monitor(monitor["name"], monitor.get("type", "url"))
+        self.registry.apply(diff)
+
+        for monitor in [*diff.added, *diff.changed]:
+            previous = self._shard_of.get(monitor["name"])
+            shard = self._assign(monitor)
+            if previous is None:
+                added[shard].append(monitor)
+            elif previous != shard:
+                # depends_on changed and moved the monitor to another shard
+                removed[previous].append(monitor)
+                added[shard].append(monitor)
+            else:
+                changed[shard].append(monitor)
+
+        for worker, parts in zip(self.workers, zip(added, removed, changed)):
+            if any(parts):
+                worker.send(("apply", *parts))
+        if not self._pending:
+            self._ready.set()
+
+
+def make_scheduler(monitors: list, workers: int = 1, settings: dict = None, **kwargs) -> Scheduler:
+    if workers and workers > 1:
+        return ShardedScheduler(monitors, workers, settings=settings, **kwargs)
+    return Scheduler(monitors, **kwargs)
+
+
+class WorkerScheduler(Scheduler):
+    """The Scheduler inside a worker process: every result is also queued for the coordinator."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outbox = []
+
+    def _record(self, monitor, result: CheckResult, latency: float = None):
+        super()._record(monitor, result, latency)
+        self.outbox.append(encode_result(result, latency))
+
+
+async def run_worker():
+    from .session import configure_session, close_session
+    from .ping import configure_ping
+    from .ssh import configure_ssh, close_ssh
+    from .executor import configure_commands
+    from .breaker import configure_breaker
+    from .syncthing import configure_syncthing
+    from .tcp import configure_tcp
+
+    loop = asyncio.get_running_loop()
+    # Frames go to the original stdout; anything printed by checks ends up on stderr instead.
+    out_fd = os.dup(1)
+    os.dup2(2, 1)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, os.fdopen(out_fd, "wb"))
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    message = await read_frame(reader)
+    if message is None or message[0] != "start":
+        return
+    _, settings, monitors, interval, jitter = message
+    configure_session(settings.get("http"))
+    configure_ping(settings.get("ping"))
+    configure_ssh(settings.get("ssh"))
+    configure_commands(settings.get("commands"))
+    configure_breaker(settings.get("breaker"))
+    configure_syncthing(settings.get("syncthing"))
+    configure_tcp(settings.get("tcp"))
+
+    scheduler = WorkerScheduler(monitors, interval=interval, jitter=jitter)
+
+    async def flush():
+        reported = None
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            if scheduler.outbox:
+                batch, scheduler.outbox = scheduler.outbox, []
+                writer.write(encode_frame(("results", batch)))
+            if reported is None or loop.time() - reported >= METRICS_INTERVAL:
+                reported = loop.time()
+                writer.write(encode_frame(("metrics", *worker_metrics())))
+            await writer.drain()
+
+    await scheduler.start()
+    flusher = asyncio.create_task(flush())
+    try:
+        while True:
+            message = await read_frame(reader)
+            if message is None:
+                break
+            if message[0] == "apply":
+                scheduler.apply(MonitorDiff(*message[1:]))
+    finally:
+        flusher.cancel()
+        await scheduler.stop()
+        await close_session()
+        await close_ssh()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_worker())
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
@@ -0,0 +1,130 @@
+"""Pre-serialized /api/status responses.
+
+A snapshot per filter combination is built once and then served to every
+client that asks for the same filter, until what a result says changes
+(ResultStore.content_version) or the filter selects different monitors.
+Each snapshot carries a weak ETag over the name, target, status, message
+and type of its results, so polling clients that send If-None-Match get a
+bodiless 304 at the cost of a dict lookup, even while rechecks keep
+writing to the store.
+
+The ETag is weak because the body it stands for also has checked_at and
+timing, which rechecks move without changing the ETag. The body is only
+serialized for a request that needs it, and again once the store has been
+written since. Compressed bodies are made once per body and encoding
+instead of once per request.
+"""
+import gzip
+import hashlib
+
+MAX_SNAPSHOTS = 256
+MIN_COMPRESS_BYTES = 1024
+
+_brotli = False
+
+
+def _load_brotli():
+    # brotli is optional; without it responses are only gzip-compressed
+    global _brotli
+    if _brotli is False:
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+        _brotli = brotli
+    return _brotli
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _load_brotli().compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    encodings = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: a W/ prefix is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def results_etag(results: list) -> str:
+    """A weak ETag over the fields of `results` that a client acts on."""
+    digest = hashlib.blake2b(digest_size=12)
+    for r in results:
+        digest.update(f"{r.name}\0{r.host_or_url}\0{r.status}\0{r.message}\0{r.monitor_type}\n".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+class Snapshot:
+    def __init__(self, store, version: int, names: tuple, build):
+        self.version = version
+        self.names = names
+        self._store = store
+        self._build = build
+        self._results = build()
+        self._results_version = store.version
+        self.etag = results_etag(self._results)
+        self._body = None
+        self._body_version = None
+        self._encoded: dict[str, bytes] = {}
+
+    @property
+    def body(self) -> bytes:
+        # serialized on the first request that is not answered with a 304, and again after rechecks
+        version = self._store.version
+        if self._body_version != version:
+            results = self._results if self._results_version == version else self._build()
+            self._body = ("[" + ",".join(r.model_dump_json() for r in results) + "]").encode()
+            self._body_version = version
+            self._results = None
+            self._encoded.clear()
+        return self._body
+
+    def encoded(self, accept_encoding: str | None) -> tuple[bytes, str | None]:
+        """The body for a request's Accept-Encoding, with its Content-Encoding.
+
+        The ETag is weak, so it is shared by every encoding of the body.
+        """
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            return self.body, None
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and (encoding != "br" or _load_brotli() is not None):
+                body = self._encoded.get(encoding)
+                if body is None:
+                    body = self._encoded[encoding] = _compress(self.body, encoding)
+                return body, encoding
+        return self.body, None
+
+
+class SnapshotCache:
+    """Snapshots per filter combination, rebuilt when the store's content or the selected monitors change."""
+
+    def __init__(self, store):
+        self.store = store
+        self._snapshots: dict[tuple, Snapshot] = {}
+
+    def get(self, key: tuple, names: tuple, build) -> Snapshot:
+        """The snapshot for `key`; `build()` returns the results to serialize when it is out of date."""
+        snapshot = self._snapshots.get(key)
+        version = self.store.content_version
+        if snapshot is None or snapshot.version != version or snapshot.names is not names:
+            if snapshot is None and len(self._snapshots) >= MAX_SNAPSHOTS:
+                self._snapshots.clear()
+            snapshot = self._snapshots[key] = Snapshot(self.store, version, names, build)
+        return snapshot
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+DEFAULT_SSH_CONFIG = {
+    "multiplex": True,
+    "persist": 300,
+    "connect_timeout": 10,
+    "control_dir": None,
+}
+
+_ssh_config = dict(DEFAULT_SSH_CONFIG)
+_multiplexer = None
+_multiplexer_loop = None
+_multiplex_hosts: set[str] | None = None
+
+
+def configure_ssh(ssh_config: dict = None):
+    """Set SSH options from the top-level `ssh:` section of the config.
+
+    With `multiplex` enabled every host gets one ControlMaster connection
+    that is kept open for `persist` seconds and shared by all command
+    monitors on that host. A master that has been idle for longer is
+    asked with `ssh -O check` whether it is still there before reuse.
+    """
+    global _ssh_config, _multiplexer, _multiplex_hosts
+    _ssh_config = dict(DEFAULT_SSH_CONFIG)
+    _ssh_config.update(ssh_config or {})
+    _multiplexer = None
+    _multiplex_hosts = None
+
+
+def multiplex_shared_hosts(monitors: list):
+    """Only multiplex hosts that more than one command monitor runs on.
+
+    For one-shot runs: a master for a single command costs two extra ssh
+    processes and saves nothing. Undone by close_ssh().
+    """
+    global _multiplex_hosts
+    counts = Counter(m.get("host") for m in monitors if m.get("type") == "command" and m.get("host"))
+    _multiplex_hosts = {host for host, count in counts.items() if count > 1}
+
+
+class SSHError(Exception):
+    pass
+
+
+class SSHMultiplexer:
+    def __init__(self, persist: int, connect_timeout: int, control_dir: str = None):
+        self.persist = persist
+        self.connect_timeout = connect_timeout
+        self._owns_control_dir = control_dir is None
+        self.control_dir = control_dir or tempfile.mkdtemp(prefix="status-ssh-")
+        # host -> when a command last used its master; ControlPersist counts idle time from there
+        self._masters: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def options(self, master: str = "no") -> list[str]:
+        return [
+            "-o", f"ControlPath={os.path.join(self.control_dir, '%C')}",
+            "-o", f"ControlMaster={master}",
+            "-o", f"ConnectTimeout={self.connect_timeout}",
+        ]
+
+    def argv(self, host: str, command: str) -> list[str]:
+        return ["ssh", *self.options(), host, command]
+
+    async def _ssh(self, *args: str, timeout: float) -> int:
+        proc = await asyncio.create_subprocess_exec(
+            "ssh", *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            return await asyncio.wait_for(proc.wait(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+
+    async def _alive(self, host: str, timeout: float) -> bool:
+        return await self._ssh(*self.options(), "-O", "check", host, timeout=timeout) == 0
+
+    async def ensure_master(self, host: str, timeout: float) -> float | None:
+        """Open the master connection for `host` if there is none yet.
+
+        Returns the handshake time in seconds, or None if an existing
+        connection was reused. Raises asyncio.TimeoutError if waiting for
+        another check's handshake, asking the master and the handshake take
+        longer than `timeout` seconds together.
+        """
+        deadline = time.monotonic() + timeout
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            last_used = self._masters.get(host)
+            if last_used is not None:
+                # past ControlPersist the master may have exited; ask it before trusting it
+                if (time.monotonic() - last_used < self.persist
+                        or await self._alive(host, deadline - time.monotonic())):
+                    self._masters[host] = time.monotonic()
+                    return None
+                del self._masters[host]
+            start = time.monotonic()
+            # -f backgrounds ssh once authenticated, so the exit of this process marks the end of the handshake.
+            returncode = await self._ssh(
+                *self.options("yes"), "-o", f"ControlPersist={self.persist}", "-o", "BatchMode=yes", "-N", "-f", host,
+                timeout=deadline - time.monotonic(),
+            )
+            if returncode != 0:
+                raise SSHError(f"SSH connection to {host} failed (exit code {returncode})")
+            self._masters[host] = time.monotonic()
+            return self._masters[host] - start
+
+    def discard(self, host: str):
+        self._masters.pop(host, None)
+
+    async def close(self):
+        for host in list(self._masters):
+            try:
+                await self._ssh(*self.options(), "-O", "exit", host, timeout=self.connect_timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._masters.clear()
+        if self._owns_control_dir:
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+
+
+def get_multiplexer(host: str = None) -> SSHMultiplexer | None:
+    global _multiplexer, _multiplexer_loop
+    if not _ssh_config["multiplex"] or (_multiplex_hosts is not None and host not in _multiplex_hosts):
+        return None
+    loop = asyncio.get_running_loop()
+    if _multiplexer is None or _multiplexer_loop is not loop:
+        _multiplexer = SSHMultiplexer(
+            persist=_ssh_config["persist"],
+            connect_timeout=_ssh_config["connect_timeout"],
+            control_dir=_ssh_config["control_dir"],
+        )
+        _multiplexer_loop = loop
+    return _multiplexer
+
+
+async def close_ssh():
+    global _multiplexer, _multiplexer_loop, _multiplex_hosts
+    if _multiplexer is not None and _multiplexer_loop is asyncio.get_running_loop():
+        await _multiplexer.close()
+    _multiplexer = None
+    _multiplexer_loop = None
+    _multiplex_hosts = None
@@ -0,0 +1,161 @@
+"""A cached client for the Syncthing REST API.
+
+All syncthing monitors that point at the same instance share one client, so
+an instance monitor and any number of folder and device monitors cost one
+sweep of the API per cache period instead of one request each. Responses
+are kept for `ttl` seconds (`config_ttl` for the configuration) and
+revalidated with If-None-Match when the instance sent an ETag. Requests for
+the same path that overlap are sent once.
+"""
+import asyncio
+import time
+from urllib.parse import quote
+
+DEFAULT_SYNCTHING_CONFIG = {
+    "ttl": 5,
+    "config_ttl": 60,
+}
+
+_syncthing_config = dict(DEFAULT_SYNCTHING_CONFIG)
+_clients: dict[tuple[str, str], "SyncthingClient"] = {}
+_clients_loop = None
+
+
+def configure_syncthing(syncthing_config: dict = None):
+    """Set syncthing options from the top-level `syncthing:` section of the config."""
+    global _syncthing_config
+    _syncthing_config = dict(DEFAULT_SYNCTHING_CONFIG)
+    _syncthing_config.update(syncthing_config or {})
+    _clients.clear()
+
+
+class SyncthingError(Exception):
+    """The API answered with an unexpected HTTP status."""
+
+    def __init__(self, status: int, text: str):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.text = text
+
+
+class SyncthingClient:
+    def __init__(self, url: str, api_key: str):
+        self.url = url.rstrip("/")
+        self.headers = {"X-API-Key": api_key}
+        # path -> (fetched at, ETag, parsed body)
+        self._cache: dict[str, tuple[float, str | None, object]] = {}
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    def cached(self, path: str, ttl: float):
+        """The cached body of `path` if it is younger than `ttl`, else None."""
+        cached = self._cache.get(path)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[2]
+        return None
+
+    async def get(self, session, path: str, ttl: float, timeout: float, marks: dict = None):
+        data = self.cached(path, ttl)
+        if data is not None:
+            return data
+        task = self._in_flight.get(path)
+        if task is None:
+            task = self._in_flight[path] = asyncio.ensure_future(self._fetch(session, path, timeout, marks))
+            task.add_done_callback(lambda _: self._in_flight.pop(path, None))
+        # shield: one caller timing out must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, session, path: str, timeout: float, marks: dict = None):
+        cached = self._cache.get(path)
+        headers = self.headers
+        if cached is not None and cached[1]:
+            headers = {**headers, "If-None-Match": cached[1]}
+        async with session.get(f"{self.url}{path}", headers=headers, timeout=timeout,
+                               trace_request_ctx=marks if marks is not None else {}) as response:
+            if response.status == 304 and cached is not None:
+                data = cached[2]
+            elif response.status == 200:
+                data = await response.json()
+            else:
+                raise SyncthingError(response.status, await response.text())
+            self._cache[path] = (time.monotonic(), response.headers.get("ETag"), data)
+            return data
+
+    async def sweep(self, session, timeout: float, folder: str = None, marks: dict = None) -> dict:
+        """Fetch everything a check needs at once: status, connections, config and a folder's completion.
+
+        `folder` may be an ID or a label; the config (almost always cached)
+        resolves it before the folder's completion and errors are requested
+        alongside the rest. When every response is still fresh the sweep
+        returns without scheduling anything.
+        """
+        ttl = _syncthing_config["ttl"]
+        paths = {"status": "/rest/system/status", "connections": "/rest/system/connections"}
+        config = self.cached("/rest/config", _syncthing_config["config_ttl"])
+        if config is not None and folder is not None:
+            paths.update(self._folder_paths(config, folder))
+        sweep = {key: self.cached(path, ttl) for key, path in paths.items()}
+        if config is not None and None not in sweep.values():
+            # everything is fresh: no tasks, no waiting
+            sweep["config"] = config
+            if folder is not None:
+                sweep["folder"] = find_folder(config, folder)
+            return sweep
+
+        requests = {
+            "status": asyncio.ensure_future(self.get(session, paths["status"], ttl, timeout, marks)),
+            "connections": asyncio.ensure_future(self.get(session, paths["connections"], ttl, timeout)),
+        }
+        try:
+            sweep = {"config": await self.get(session, "/rest/config", _syncthing_config["config_ttl"], timeout)}
+            if folder is not None:
+                sweep["folder"] = find_folder(sweep["config"], folder)
+                for key, path in self._folder_paths(sweep["config"], folder).items():
+                    requests[key] = asyncio.ensure_future(self.get(session, path, ttl, timeout))
+            results = await asyncio.gather(*requests.values())
+        finally:
+            for task in requests.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # retrieved, so a failure that lost the race isn't logged as unhandled
+        sweep.update(zip(requests, results))
+        return sweep
+
+    @staticmethod
+    def _folder_paths(config: dict, folder: str) -> dict[str, str]:
+        entry = find_folder(config, folder)
+        if entry is None or entry.get("paused"):
+            return {}  # nothing to ask about
+        folder_id = quote(entry["id"], safe="")
+        return {"completion": f"/rest/db/completion?folder={folder_id}",
+                "errors": f"/rest/folder/errors?folder={folder_id}"}
+
+
+def get_client(url: str, api_key: str) -> SyncthingClient:
+    global _clients_loop
+    loop = asyncio.get_running_loop()
+    if _clients_loop is not loop:
+        # in-flight tasks belong to a loop; a new loop (tests, shard workers) starts fresh
+        _clients.clear()
+        _clients_loop = loop
+    key = (url, api_key)
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = SyncthingClient(url, api_key)
+    return client
+
+
+def find_folder(config: dict, folder: str) -> dict | None:
+    """A folder from the instance config, by ID or label."""
+    for entry in config.get("folders", ()):
+        if entry.get("id") == folder or entry.get("label") == folder:
+            return entry
+    return None
+
+
+def find_device(config: dict, device: str) -> dict | None:
+    """A device from the instance config, by device ID or name."""
+    for entry in config.get("devices", ()):
+        if entry.get("deviceID") == device or entry.get("name") == device:
+            return entry
+    return None
@@ -0,0 +1,168 @@
+import asyncio
+import calendar
+import ssl
+import time
+from typing import NamedTuple
+
+DEFAULT_TCP_CONFIG = {
+    "max_parallel": 100,
+    "per_host": 10,
+    "cert_interval": 3600,
+    "warn_days": 14,
+}
+
+_tcp_config = dict(DEFAULT_TCP_CONFIG)
+_semaphore = None
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+_semaphores_loop = None
+_ssl_context = None
+_unverified_context = None
+# (host, port, server name) -> (handshake done at, certificate notAfter as a timestamp, verify error)
+_certificates: dict[tuple[str, int, str], tuple[float, float, str | None]] = {}
+
+
+class PortResult(NamedTuple):
+    connect: float
+    handshake: float | None = None
+    not_after: float | None = None
+    verify_error: str | None = None
+
+
+def configure_tcp(tcp_config: dict = None):
+    """Set tcp/tls options from the top-level `tcp:` section of the config.
+
+    At most `max_parallel` connects are open at once, and at most `per_host`
+    to any one host. A tls monitor's certificate is fetched with a full
+    handshake at most every `cert_interval` seconds; in between only the
+    port is connected to and the cached expiry is reported. Certificates
+    expiring within `warn_days` are reported as Expiring.
+    """
+    global _tcp_config, _semaphore
+    _tcp_config = dict(DEFAULT_TCP_CONFIG)
+    _tcp_config.update(tcp_config or {})
+    _semaphore = None
+    _host_semaphores.clear()
+    _certificates.clear()
+
+
+def tcp_option(name: str):
+    return _tcp_config[name]
+
+
+def _semaphores(host: str) -> tuple[asyncio.Semaphore, asyncio.Semaphore]:
+    global _semaphore, _semaphores_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphores_loop is not loop:
+        _semaphore = asyncio.Semaphore(_tcp_config["max_parallel"])
+        _host_semaphores.clear()
+        _semaphores_loop = loop
+    host_semaphore = _host_semaphores.get(host)
+    if host_semaphore is None:
+        host_semaphore = _host_semaphores[host] = asyncio.Semaphore(_tcp_config["per_host"])
+    return _semaphore, host_semaphore
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    # loading the CA bundle takes milliseconds, so it is done once
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def get_unverified_context() -> ssl.SSLContext:
+    global _unverified_context
+    if _unverified_context is None:
+        _unverified_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        _unverified_context.check_hostname = False
+        _unverified_context.verify_mode = ssl.CERT_NONE
+    return _unverified_context
+
+
+def _der_element(der: bytes, offset: int) -> tuple[int, int, int]:
+    """The tag, start of the contents and end of the DER element at `offset`."""
+    tag, length = der[offset], der[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7f
+        length = int.from_bytes(der[offset:offset + size], "big")
+        offset += size
+    return tag, offset, offset + length
+
+
+def certificate_not_after(der: bytes) -> float:
+    """The notAfter of a DER certificate as a timestamp.
+
+    getpeercert() only decodes certificates that passed verification, so
+    expired and untrusted ones are read here instead.
+    """
+    _, offset, _ = _der_element(der, 0)  # Certificate
+    _, offset, _ = _der_element(der, offset)  # tbsCertificate
+    if der[offset] == 0xa0:  # explicit version
+        offset = _der_element(der, offset)[2]
+    for _ in range(3):  # serialNumber, signature, issuer
+        offset = _der_element(der, offset)[2]
+    _, offset, _ = _der_element(der, offset)  # validity
+    offset = _der_element(der, offset)[2]  # notBefore
+    tag, start, end = _der_element(der, offset)
+    value = der[start:end].decode("ascii")
+    if tag == 0x17:  # UTCTime: two-digit years are 1950-2049
+        value = ("19" if value[:2] >= "50" else "20") + value
+    return calendar.timegm(time.strptime(value, "%Y%m%d%H%M%SZ"))
+
+
+async def _unverified_certificate(host: str, port: int, server_name: str = None) -> bytes:
+    _, writer = await asyncio.open_connection(host, port, ssl=get_unverified_context(),
+                                              server_hostname=server_name or host)
+    try:
+        return writer.get_extra_info("ssl_object").getpeercert(binary_form=True)
+    finally:
+        writer.close()
+
+
+async def open_port(host: str, port: int, timeout: float, tls: bool = False, server_name: str = None) -> PortResult:
+    """Connect to host:port and, with `tls`, complete a handshake; then close the connection.
+
+    Waits for a free slot first, then raises asyncio.TimeoutError if the
+    connect and handshake take longer than `timeout` seconds. `connect` and
+    `handshake` are in seconds; `not_after` is the certificate's expiry.
+    When the certificate fails verification, it is fetched again without
+    verifying so its expiry can still be reported, and `verify_error` says
+    why it was rejected.
+    """
+    total, per_host = _semaphores(host)
+    async with total, per_host:
+        start = time.monotonic()
+        async with asyncio.timeout(timeout):
+            _, writer = await asyncio.open_connection(host, port)
+            try:
+                connected = time.monotonic()
+                if not tls:
+                    return PortResult(connected - start)
+                try:
+                    await writer.start_tls(get_ssl_context(), server_hostname=server_name or host)
+                except ssl.SSLCertVerificationError as e:
+                    der = await _unverified_certificate(host, port, server_name)
+                    return PortResult(connected - start, time.monotonic() - connected,
+                                      certificate_not_after(der), e.verify_message)
+                certificate = writer.get_extra_info("ssl_object").getpeercert()
+                return PortResult(connected - start, time.monotonic() - connected,
+                                  ssl.cert_time_to_seconds(certificate["notAfter"]))
+            finally:
+                writer.close()
+
+
+async def certificate_expiry(host: str, port: int, timeout: float, server_name: str = None) -> tuple[PortResult, bool]:
+    """open_port with a TLS handshake, or a plain connect while the cached certificate is recent enough.
+
+    Returns the result (with `not_after` and `verify_error` filled in either
+    way) and whether they came from the cache.
+    """
+    key = (host, port, server_name or host)
+    cached = _certificates.get(key)
+    if cached is not None and time.monotonic() - cached[0] < _tcp_config["cert_interval"]:
+        result = await open_port(host, port, timeout)
+        return result._replace(not_after=cached[1], verify_error=cached[2]), True
+    result = await open_port(host, port, timeout, tls=True, server_name=server_name)
+    _certificates[key] = (time.monotonic(), result.not_after, result.verify_error)
+    return result, False
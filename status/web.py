@@ -1,16 +1,87 @@
-from fastapi import FastAPI, Query
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
-import aiohttp
 import asyncio
+import hmac
+import json
+from contextlib import asynccontextmanager
 from typing import List
 
-from .core import check_monitor, MonitorStatus, is_up, filter_monitors
+from .core import MonitorStatus, is_up, select_monitors
+from .scheduler import Scheduler, DEFAULT_INTERVAL
+from .history import parse_duration
+from .agent import AgentHub, agent_token, decode_push
+from .snapshot import SnapshotCache, etag_matches
+from . import metrics
+from .session import close_session
+from .ssh import close_ssh
 
-def create_web_app(monitors: list, args):
-    app = FastAPI()
+SSE_KEEPALIVE = 15
+
+def sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+def status_matches(result: MonitorStatus, status: str = None) -> bool:
+    if status == "up":
+        return is_up(result)
+    if status == "down":
+        return not is_up(result)
+    return True
+
+def create_web_app(monitors: list, args, history=None, config_path: str = None, reload_config: dict = None,
+                   scheduler: Scheduler = None):
+    if scheduler is None:
+        scheduler = Scheduler(monitors, interval=args.interval or DEFAULT_INTERVAL, history=history)
+
+    hub = AgentHub(scheduler.store, history)
+    snapshots = SnapshotCache(scheduler.store)
+
+    combined = {}
+
+    def select_names(name, type, tag) -> tuple:
+        # Both registries cache their answers; the joined tuple is cached too, so it only
+        # changes identity when one of them changed.
+        local = scheduler.registry.names(names=name, types=type, tags=tag)
+        if not len(hub.registry):
+            return local
+        remote = hub.registry.names(names=name, types=type, tags=tag)
+        key = (id(local), id(remote))
+        names = combined.get(key)
+        if names is None:
+            if len(combined) > 256:
+                combined.clear()
+            names = combined[key] = (local + remote, local, remote)
+        return names[0]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if history is not None:
+            await history.start()
+        await scheduler.start()
+        await hub.start()
+        loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+        watcher = None
+        if config_path is not None:
+            watcher = asyncio.create_task(scheduler.watch(
+                config_path, lambda config: select_monitors(config, args.monitor_name, args.monitor, args.tag), reload_config))
+        try:
+            yield
+        finally:
+            loop_monitor.cancel()
+            if watcher is not None:
+                watcher.cancel()
+            await hub.stop()
+            await scheduler.stop()
+            if history is not None:
+                await history.stop()
+            await close_session()
+            await close_ssh()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.scheduler = scheduler
+    app.state.agents = hub
 
     @app.get("/api/args")
     async def get_args():
@@ -19,30 +90,147 @@ def create_web_app(monitors: list, args):
             "up": args.up,
             "monitor_name": args.monitor_name,
             "monitor": args.monitor,
+            "tag": args.tag,
             "follow": args.follow,
             "interval": args.interval
         }
 
     @app.get("/api/status", response_model=list[MonitorStatus])
     async def get_status(
-        name: str = Query(None, description="Filter by monitor name"),
-        type: str = Query(None, description="Filter by monitor type"),
+        request: Request,
+        name: List[str] = Query(None, description="Filter by monitor name (glob patterns allowed)"),
+        type: List[str] = Query(None, description="Filter by monitor type"),
+        tag: List[str] = Query(None, description="Filter by monitor tag"),
+        status: str = Query(None, description="Filter by status (up or down)")
+    ):
+        # Whatever the store has right now: monitors without a first result yet are left out
+        # instead of holding up the request (a hung check or a dead worker would block it).
+        names_to_show = select_names(name, type, tag)
+
+        def build():
+            results = [r for r in scheduler.store.results_for(names_to_show) if status_matches(r, status)]
+            results.sort(key=lambda r: r.monitor_type)
+            return results
+
+        # One snapshot per filter until a result's content changes; rechecks that only move
+        # checked_at or timing keep it and its ETag, so polling clients mostly get a cheap 304.
+        key = (tuple(name or ()), tuple(type or ()), tuple(tag or ()), status)
+        snapshot = snapshots.get(key, names_to_show, build)
+        headers = {"ETag": snapshot.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+            return Response(status_code=304, headers=headers)
+        body, encoding = snapshot.encoded(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type="application/json", headers=headers)
+
+    @app.get("/api/status/stream")
+    async def stream_status(
+        name: List[str] = Query(None, description="Filter by monitor name (glob patterns allowed)"),
+        type: List[str] = Query(None, description="Filter by monitor type"),
+        tag: List[str] = Query(None, description="Filter by monitor tag"),
         status: str = Query(None, description="Filter by status (up or down)")
     ):
-        types_list = [type] if type else None
-        monitors_to_check = filter_monitors(monitors, name=name, types=types_list)
-
-        async with aiohttp.ClientSession() as session:
-            tasks = [check_monitor(session, monitor) for monitor in monitors_to_check]
-            results = await asyncio.gather(*tasks)
-
-        if status == "up":
-            results = [r for r in results if is_up(r)]
-        elif status == "down":
-            results = [r for r in results if not is_up(r)]
-        
-        results.sort(key=lambda r: r.monitor_type)
-        return results
+        names_to_show = select_names(name, type, tag)
+
+        async def generate():
+            # Results already in the store go out immediately, the rest as their first check finishes.
+            queue = scheduler.store.subscribe()
+            try:
+                remaining = set(names_to_show)
+                for result in scheduler.store.results_for(names_to_show):
+                    remaining.discard(result.name)
+                    if status_matches(result, status):
+                        yield result.model_dump_json() + "\n"
+                while remaining:
+                    result = await queue.get()
+                    if result.name not in remaining:
+                        continue
+                    remaining.discard(result.name)
+                    if status_matches(result, status):
+                        yield result.model_dump_json() + "\n"
+            finally:
+                scheduler.store.unsubscribe(queue)
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    @app.get("/api/events")
+    async def status_events(
+        name: List[str] = Query(None, description="Filter by monitor name (glob patterns allowed)"),
+        type: List[str] = Query(None, description="Filter by monitor type"),
+        tag: List[str] = Query(None, description="Filter by monitor tag"),
+        status: str = Query(None, description="Filter by status (up or down)")
+    ):
+        names_to_show = select_names(name, type, tag)
+
+        async def generate():
+            nonlocal names_to_show
+            names = set(names_to_show)
+            # A full snapshot on connect, then only monitors whose status changed.
+            queue = scheduler.store.subscribe(changes_only=True)
+            try:
+                results = [r for r in scheduler.store.results_for(names_to_show) if status_matches(r, status)]
+                results.sort(key=lambda r: r.monitor_type)
+                shown = {r.name for r in results}
+                yield sse_event("snapshot", json.dumps([r.model_dump() for r in results]))
+                while True:
+                    try:
+                        result = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                    if result.name not in names:
+                        # monitors added by a reload or a new agent since this stream started
+                        current = select_names(name, type, tag)
+                        if current is names_to_show:
+                            continue
+                        names_to_show, names = current, set(current)
+                        if result.name not in names:
+                            continue
+                    if status_matches(result, status):
+                        shown.add(result.name)
+                        yield sse_event("change", result.model_dump_json())
+                    elif result.name in shown:
+                        shown.discard(result.name)
+                        yield sse_event("remove", json.dumps({"name": result.name}))
+            finally:
+                scheduler.store.unsubscribe(queue)
+
+        return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.post("/api/agents/{agent}/results")
+    async def ingest_agent_results(agent: str, request: Request):
+        token = agent_token()
+        if token and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+            raise HTTPException(status_code=401, detail="Invalid agent token.")
+        try:
+            results = decode_push(await request.body(), request.headers.get("content-encoding"))
+            hub.ingest(agent, results)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"accepted": len(results)}
+
+    @app.get("/api/agents")
+    async def get_agents():
+        return hub.agents()
+
+    @app.get("/api/history")
+    async def get_history(
+        name: str = Query(..., description="Monitor name"),
+        range: str = Query("24h", description="How far back to look, e.g. 30m, 24h, 7d"),
+        resolution: str = Query(None, description="raw, 1m or 1h (picked from the range if omitted)")
+    ):
+        if history is None:
+            raise HTTPException(status_code=404, detail="History is not enabled.")
+        try:
+            return await history.query(name, parse_duration(range), resolution)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics():
+        # Only reads counters the scheduler already keeps up to date; never triggers a check.
+        return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -0,0 +1,7 @@
+from status.core import MonitorStatus
+
+
+def make_status(name='web', status=200, monitor_type='url', host_or_url=None, message='', checked_at=None):
+    """A MonitorStatus with defaults for everything a test doesn't care about."""
+    return MonitorStatus(name=name, host_or_url=host_or_url if host_or_url is not None else f'https://{name}',
+                         status=status, message=message, monitor_type=monitor_type, checked_at=checked_at)
@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+
+import aiohttp
+import uvicorn
+
+from pydantic import ValidationError
+
+from status.agent import AgentHub, AgentPusher, configure_agent, decode_push, STALE
+from status.scheduler import ResultStore
+from status.web import create_web_app
+
+from helpers import make_status
+
+
+class TestAgent(unittest.TestCase):
+
+    def tearDown(self):
+        configure_agent()
+
+    def test_decode_push_limits_inflated_size(self):
+        configure_agent({'max_body_bytes': 1000})
+        body = gzip.compress(json.dumps({'results': [{'name': 'x' * 2000}]}).encode())
+        with self.assertRaises(ValueError):
+            decode_push(body, 'gzip')
+        self.assertEqual(decode_push(b'{"results": []}'), [])
+
+    def test_push_with_an_invalid_result_changes_nothing(self):
+        hub = AgentHub(ResultStore())
+        good = make_status('db').model_dump()
+        with self.assertRaises(ValidationError):
+            hub.ingest('east', [good, {'name': 'broken'}])
+        self.assertIsNone(hub.store.get('east/db'))
+        self.assertEqual(hub.agents(), [])
+
+        hub.ingest('east', [good])
+        self.assertEqual(hub.registry.names(), ('east/db',))
+
+    def test_agents_push_to_server(self):
+        async def run_test():
+            configure_agent({'token': 'secret', 'stale_after': 0})
+            args = SimpleNamespace(down=False, up=False, monitor_name=None, monitor=None, tag=None, follow=False,
+                                   interval=60)
+            app = create_web_app([], args)
+            server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+            serve = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.01)
+            url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}"
+
+            try:
+                async with aiohttp.ClientSession() as session:
+                    for agent in ('east', 'west'):
+                        store = ResultStore()
+                        pusher = AgentPusher(store, url, name=agent)
+                        pusher._queue = store.subscribe()
+                        store.set(make_status('db'))
+                        self.assertTrue(await pusher.push(session))
+
+                    async with session.get(f'{url}/api/status', params={'tag': 'agent:west'}) as response:
+                        self.assertEqual([r['name'] for r in await response.json()], ['west/db'])
+                    async with session.get(f'{url}/api/agents') as response:
+                        self.assertEqual([a['name'] for a in await response.json()], ['east', 'west'])
+
+                    store = ResultStore()
+                    pusher = AgentPusher(store, url, name='rogue', token='wrong')
+                    pusher._queue = store.subscribe()
+                    store.set(make_status('db'))
+                    self.assertFalse(await pusher.push(session))
+                    self.assertIn('db', pusher._pending)
+
+                    await asyncio.sleep(0.01)
+                    app.state.agents.check_stale()
+                    async with session.get(f'{url}/api/status') as response:
+                        results = await response.json()
+                    self.assertEqual({r['name']: r['status'] for r in results}, {'east/db': STALE, 'west/db': STALE})
+            finally:
+                server.should_exit = True
+                await serve
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
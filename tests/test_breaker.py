@@ -0,0 +1,91 @@
+import unittest
+import asyncio
+import itertools
+import socket
+from unittest.mock import patch, AsyncMock
+
+from status.breaker import Breakers, configure_breaker, probe, probe_address
+from status.scheduler import Scheduler
+from status.session import close_session
+from status import metrics
+
+from helpers import make_status
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestBreaker(unittest.TestCase):
+
+    def tearDown(self):
+        configure_breaker()
+
+    def test_backoff_is_exponential_and_capped(self):
+        configure_breaker({'threshold': 2, 'max_interval': 50})
+        breakers = Breakers()
+        backed_off = metrics.monitors_backed_off.get()
+        intervals = []
+        for _ in range(6):
+            breakers.record('a', False)
+            intervals.append(breakers.interval('a', 5))
+        self.assertEqual(intervals, [5, 10, 20, 40, 50, 50])
+        self.assertEqual(metrics.monitors_backed_off.get(), backed_off + 1)
+        breakers.record('a', True)
+        self.assertEqual(breakers.interval('a', 5), 5)
+        self.assertEqual(metrics.monitors_backed_off.get(), backed_off)
+
+    def test_probe_address(self):
+        self.assertEqual(probe_address({'name': 'a', 'url': 'https://example.com/x'}), ('example.com', 443))
+        self.assertEqual(probe_address({'name': 'a', 'url': 'http://example.com:8080'}), ('example.com', 8080))
+        self.assertIsNone(probe_address({'name': 'a', 'type': 'ping', 'host': 'example.com'}))
+
+    def test_probe_fails_fast_on_closed_port(self):
+        async def run_test():
+            result = await probe({'name': 'a', 'url': f'http://127.0.0.1:{closed_port()}'})
+            self.assertTrue(result.status.startswith('Error'))
+            self.assertIn('probe', result.message)
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_open_breaker_probes_before_full_check(self, mock_run_check):
+        async def run_test():
+            configure_breaker({'threshold': 1, 'confirm': False})
+            mock_run_check.side_effect = lambda session, monitor: make_status(monitor['name'], 'Timeout')
+            monitor = {'name': 'a', 'url': f'http://127.0.0.1:{closed_port()}', 'interval': 0.01}
+            scheduler = Scheduler([monitor], interval=60, jitter=0)
+            await scheduler.start()
+            try:
+                await asyncio.sleep(0.3)
+            finally:
+                await scheduler.stop()
+                await close_session()
+            # one full check trips the breaker; later cycles stop at the failed probe and back off
+            self.assertEqual(mock_run_check.call_count, 1)
+            self.assertIn('probe', scheduler.store.get('a').message)
+            self.assertGreater(scheduler.breakers.interval('a', 0.01), 0.01)
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_flip_is_confirmed(self, mock_run_check):
+        async def run_test():
+            configure_breaker({'confirm_delay': 0})
+            statuses = itertools.chain([200, 'Timeout'], itertools.repeat(200))
+            mock_run_check.side_effect = lambda session, monitor: make_status(monitor['name'], next(statuses))
+            scheduler = Scheduler([{'name': 'a', 'url': 'http://a', 'interval': 0.01}], interval=60, jitter=0)
+            changes = scheduler.store.subscribe(changes_only=True)
+            await scheduler.start()
+            try:
+                await asyncio.sleep(0.1)
+            finally:
+                await scheduler.stop()
+                await close_session()
+            # the single timeout was re-checked and never published
+            self.assertEqual([changes.get_nowait().status for _ in range(changes.qsize())], [200])
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+from unittest.mock import patch, MagicMock
+
+from status import checkers
+from status.checkers import Checker, register_checker, get_checker
+from status.core import (check_monitor, run_check, make_result, select_monitors, CheckResult, MonitorStatus,
+                         Timing, TimingRecord, CONFIG_ERROR)
+
+
+class EchoChecker(Checker):
+    required = ("text",)
+
+    def __init__(self):
+        self.calls = 0
+
+    async def check(self, session, monitor):
+        self.calls += 1
+        return make_result(monitor, monitor["text"], "OK", monitor["text"])
+
+
+class TestCheckers(unittest.TestCase):
+
+    def tearDown(self):
+        checkers._checkers.pop("echo", None)
+
+    def test_registered_checker_runs(self):
+        checker = EchoChecker()
+        register_checker("echo", checker)
+        result = asyncio.run(check_monitor(None, {'name': 'e', 'type': 'echo', 'text': 'hello'}))
+        self.assertIsInstance(result, MonitorStatus)
+        self.assertEqual((result.status, result.message, result.monitor_type), ('OK', 'hello', 'echo'))
+        self.assertEqual(checker.calls, 1)
+
+    def test_entry_points_are_loaded_on_first_unknown_type(self):
+        entry_point = MagicMock(value='plugin:EchoChecker')
+        entry_point.name = 'echo'
+        entry_point.load.return_value = EchoChecker
+        with patch('status.checkers._entry_points_loaded', False), \
+                patch('importlib.metadata.entry_points', return_value=[entry_point]) as entry_points:
+            self.assertIsInstance(get_checker('echo'), EchoChecker)
+            get_checker('nope')
+            entry_points.assert_called_once_with(group='status.checkers')
+
+    def test_config_is_validated_once_at_load(self):
+        config = {'monitors': [
+            {'name': 'no-url', 'type': 'url'},
+            {'name': 'head-body', 'url': 'http://a', 'method': 'HEAD', 'expect_substring': 'x'},
+            {'name': 'bad-regex', 'url': 'http://a', 'expect_regex': '('},
+            {'name': 'ok', 'url': 'http://a'},
+            {'name': 'other', 'type': 'unknown'},
+        ]}
+        monitors = select_monitors(config)
+        errors = {m['name']: m.get('config_error') for m in monitors}
+        self.assertEqual(errors['no-url'], 'missing url')
+        self.assertIn('GET', errors['head-body'])
+        self.assertTrue(errors['bad-regex'].startswith('expect_regex'))
+        self.assertIsNone(errors['ok'])
+        self.assertIsNone(errors['other'])
+        self.assertIs(monitors[3], config['monitors'][3])
+        self.assertNotIn('config_error', config['monitors'][0])
+
+        result = asyncio.run(run_check(None, monitors[0]))
+        self.assertEqual((result.status, result.message), (CONFIG_ERROR, 'missing url'))
+        result = asyncio.run(run_check(None, monitors[4]))
+        self.assertEqual(result.status, 'Unknown type')
+
+    def test_check_result_dumps_like_monitor_status(self):
+        result = CheckResult('a', 'http://a', 200, 'OK', 'url', TimingRecord(connect=1.0, total=2.5), 1.5)
+        model = MonitorStatus(name='a', host_or_url='http://a', status=200, message='OK', monitor_type='url',
+                              checked_at=1.5, timing=Timing(connect=1.0, total=2.5))
+        self.assertEqual(result.model_dump(), model.model_dump())
+        self.assertEqual(result.model_dump_json(), model.model_dump_json())
+        self.assertEqual(result.to_status(), model)
+        self.assertEqual(result.model_copy(update={'status': 'Stale'}).status, 'Stale')
+        self.assertEqual(result.status, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+from unittest.mock import patch, AsyncMock
+
+from status.config import get_config, diff_monitors, config_sources
+from status.scheduler import Scheduler
+from status.session import close_session
+
+from helpers import make_status
+
+
+class TestConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmpdir.name, 'config.yaml')
+        self.csv_path = os.path.join(self.tmpdir.name, 'hosts.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write("name,subdomain,domain,ssl\napp,app,example.com,true\n,,,\nplain,plain,example.com,no\n")
+        with open(self.config_path, 'w') as f:
+            f.write(f"monitors:\n"
+                    f"  - name: static\n    type: url\n    url: http://static\n"
+                    f"  - type: url_csv\n    path: {self.csv_path}\n    timeout: 3\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_csv_expansion(self):
+        with patch('builtins.print') as mock_print:
+            monitors = get_config(self.config_path)['monitors']
+        self.assertEqual([m['name'] for m in monitors], ['static', 'app', 'plain'])
+        self.assertEqual(monitors[1]['url'], 'https://app.example.com')
+        self.assertEqual(monitors[2]['url'], 'http://plain.example.com')
+        self.assertEqual(monitors[1]['timeout'], 3)
+        mock_print.assert_called_once()
+
+    def test_csv_rows_without_name_are_skipped(self):
+        hosts_path = os.path.join(self.tmpdir.name, 'ping.csv')
+        with open(hosts_path, 'w') as f:
+            f.write("host\n10.0.0.1\n10.0.0.2\n")
+        with open(self.config_path, 'w') as f:
+            f.write(f"monitors:\n  - type: ping_csv\n    path: {hosts_path}\n")
+        with patch('builtins.print') as mock_print:
+            monitors = get_config(self.config_path)['monitors']
+        self.assertEqual(monitors, [])
+        self.assertEqual(mock_print.call_count, 2)
+        self.assertIn("missing 'name'", mock_print.call_args[0][0])
+
+    def test_unchanged_files_are_not_parsed_again(self):
+        first = get_config(self.config_path)
+        os.utime(self.csv_path)  # touched, same content
+        with patch('status.config._parse_url_csv') as mock_parse:
+            second = get_config(self.config_path)
+        mock_parse.assert_not_called()
+        self.assertEqual(first, second)
+
+        # the cached document is not shared with callers
+        second['monitors'].append({'name': 'extra'})
+        self.assertEqual(len(get_config(self.config_path)['monitors']), 3)
+
+    def test_changed_csv_is_reloaded(self):
+        get_config(self.config_path)
+        before = config_sources(self.config_path)
+        with open(self.csv_path, 'a') as f:
+            f.write("new,new,example.com,1\n")
+        self.assertNotEqual(config_sources(self.config_path), before)
+        self.assertEqual(get_config(self.config_path)['monitors'][-1]['name'], 'new')
+
+    def test_diff_monitors(self):
+        old = [{'name': 'a', 'url': 'http://a'}, {'name': 'b', 'url': 'http://b'}]
+        new = [{'name': 'a', 'url': 'http://a'}, {'name': 'b', 'url': 'http://b2'}, {'name': 'c', 'url': 'http://c'}]
+        diff = diff_monitors(old, new)
+        self.assertEqual([m['name'] for m in diff.added], ['c'])
+        self.assertEqual([m['name'] for m in diff.changed], ['b'])
+        self.assertEqual(diff.removed, [])
+        self.assertFalse(diff_monitors(new, new))
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_scheduler_applies_diff(self, mock_run_check):
+        async def run_test():
+            mock_run_check.side_effect = lambda session, monitor: make_status(monitor['name'])
+            old = [{'name': 'a', 'url': 'http://a'}, {'name': 'b', 'url': 'http://b'}]
+            new = [{'name': 'a', 'url': 'http://a'}, {'name': 'c', 'url': 'http://c'}]
+            scheduler = Scheduler(old, interval=60, jitter=0)
+            await scheduler.start()
+            try:
+                await asyncio.wait_for(scheduler.wait_ready(), 1)
+                scheduler.apply(diff_monitors(scheduler.monitors, new))
+                await asyncio.sleep(0.05)
+
+                self.assertEqual([m['name'] for m in scheduler.monitors], ['a', 'c'])
+                self.assertIsNone(scheduler.store.get('b'))
+                self.assertIsNotNone(scheduler.store.get('c'))
+                # the unchanged monitor keeps its schedule
+                checked = [call.args[1]['name'] for call in mock_run_check.call_args_list]
+                self.assertEqual(sorted(checked), ['a', 'b', 'c'])
+            finally:
+                await scheduler.stop()
+                await close_session()
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_reload_messages_stay_off_stdout(self, mock_run_check):
+        # follow mode's json/ndjson output and terminal frames go to stdout
+        async def run_test():
+            mock_run_check.side_effect = lambda session, monitor: make_status(monitor['name'])
+            scheduler = Scheduler(get_config(self.config_path)['monitors'], interval=60, jitter=0)
+            await scheduler.start()
+            watcher = asyncio.create_task(
+                scheduler.watch(self.config_path, lambda c: c['monitors'], {'interval': 0.02}))
+            try:
+                await asyncio.sleep(0.05)
+                with open(self.csv_path, 'a') as f:
+                    f.write("new,new,example.com,1\n")
+                while scheduler.registry.monitor('new') is None:
+                    await asyncio.sleep(0.02)
+            finally:
+                watcher.cancel()
+                await scheduler.stop()
+                await close_session()
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            asyncio.run(asyncio.wait_for(run_test(), 5))
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertIn('Config reloaded: 1 added', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
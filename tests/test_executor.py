@@ -0,0 +1,65 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+from status.core import check_monitor
+from status.executor import configure_commands, run_command
+
+
+class TestExecutor(unittest.TestCase):
+
+    def tearDown(self):
+        configure_commands()
+
+    def test_timeout_kills_process_group(self):
+        async def run_test():
+            monitor = {'name': 'hang', 'type': 'command', 'command': 'sleep 30 & sleep 30', 'timeout': 0.2}
+            start = time.monotonic()
+            result = await check_monitor(None, monitor)
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertEqual(result.status, 'Timeout')
+            self.assertEqual(result.message, '')
+        asyncio.run(run_test())
+
+    def test_cancel_reaps_process(self):
+        async def run_test():
+            spawned = []
+            create = asyncio.create_subprocess_shell
+
+            async def create_subprocess_shell(*args, **kwargs):
+                spawned.append(await create(*args, **kwargs))
+                return spawned[-1]
+
+            with patch('asyncio.create_subprocess_shell', create_subprocess_shell):
+                task = asyncio.create_task(run_command('sleep 30', 10))
+                await asyncio.sleep(0.2)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+            self.assertIsNotNone(spawned[0].returncode)
+        asyncio.run(run_test())
+
+    def test_max_parallel_bounds_running_commands(self):
+        async def run_test():
+            configure_commands({'max_parallel': 2})
+            monitors = [{'name': f'c{i}', 'type': 'command', 'command': 'sleep 0.2'} for i in range(4)]
+            start = time.monotonic()
+            results = await asyncio.gather(*(check_monitor(None, m) for m in monitors))
+            self.assertGreaterEqual(time.monotonic() - start, 0.4)
+            self.assertEqual([r.status for r in results], ['OK'] * 4)
+        asyncio.run(run_test())
+
+    def test_exec_without_shell(self):
+        async def run_test():
+            configure_commands({'shell': False})
+            ok = await check_monitor(None, {'name': 'ok', 'type': 'command', 'command': 'test -d /'})
+            # without a shell "&&" is passed to test as an argument
+            down = await check_monitor(None, {'name': 'down', 'type': 'command', 'command': 'test -d / && true'})
+            self.assertEqual(ok.status, 'OK')
+            self.assertEqual(down.status, 'Down')
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
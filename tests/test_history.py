@@ -0,0 +1,74 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import time
+
+from status.history import History, parse_duration, resolution_for
+
+from helpers import make_status
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'history.db')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration('90s'), 90)
+        self.assertEqual(parse_duration('24h'), 86400)
+        self.assertEqual(parse_duration('2w'), 1209600)
+        self.assertEqual(resolution_for(parse_duration('1h')), 'raw')
+        self.assertEqual(resolution_for(parse_duration('7d')), '1m')
+        self.assertEqual(resolution_for(parse_duration('30d')), '1h')
+        with self.assertRaises(ValueError):
+            parse_duration('soon')
+
+    def test_records_are_batched_and_rolled_up(self):
+        async def run_test():
+            history = History(self.path, flush_interval=60)
+            await history.start()
+            now = time.time() // 60 * 60 - 120
+            history.record(make_status('web', 200, checked_at=now + 1), latency=0.1)
+            history.record(make_status('web', 'Timeout', checked_at=now + 2), latency=0.3)
+            history.record(make_status('web', 200, checked_at=now + 61), latency=0.2)
+
+            # nothing is written until the batch is flushed
+            self.assertEqual((await history.query('web', 3600))['points'], [])
+            await history.flush()
+
+            raw = await history.query('web', 3600)
+            self.assertEqual(raw['resolution'], 'raw')
+            self.assertEqual([p['up'] for p in raw['points']], [True, False, True])
+            self.assertAlmostEqual(raw['uptime'], 2 / 3)
+
+            minutes = await history.query('web', 3600, resolution='1m')
+            self.assertEqual([(p['t'], p['count'], p['uptime']) for p in minutes['points']],
+                             [(now, 2, 0.5), (now + 60, 1, 1.0)])
+            self.assertAlmostEqual(minutes['points'][0]['latency_avg'], 0.2)
+            self.assertEqual(minutes['points'][0]['latency_max'], 0.3)
+
+            hours = await history.query('web', 86400 * 30)
+            self.assertEqual(hours['resolution'], '1h')
+            self.assertEqual(sum(p['count'] for p in hours['points']), 3)
+            await history.stop()
+        asyncio.run(run_test())
+
+    def test_old_raw_rows_are_pruned(self):
+        async def run_test():
+            history = History(self.path, retention={'raw': '1h'})
+            history.record(make_status('web', 200, checked_at=time.time() - 7200))
+            history.record(make_status('web', 200, checked_at=time.time()))
+            await history.flush()
+            self.assertEqual(len((await history.query('web', 86400, resolution='raw'))['points']), 1)
+            self.assertEqual(len((await history.query('web', 86400, resolution='1h'))['points']), 2)
+            await history.stop()
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from status.metrics import Registry, Gauge, Counter, Histogram
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_render_exposition_format(self):
+        registry = Registry()
+        up = registry.register(Gauge('status_monitor_up', 'Up or not.', ('name', 'type')))
+        total = registry.register(Counter('status_checks_total', 'Checks.', ('type',)))
+        up.set(1, name='web "main"', type='url')
+        total.inc(type='url')
+        total.inc(type='url')
+
+        lines = registry.render().splitlines()
+
+        self.assertIn('# TYPE status_monitor_up gauge', lines)
+        self.assertIn('status_monitor_up{name="web \\"main\\"",type="url"} 1', lines)
+        self.assertIn('# TYPE status_checks_total counter', lines)
+        self.assertIn('status_checks_total{type="url"} 2', lines)
+        with self.assertRaises(TypeError):
+            total.set(0, type='url')
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        duration = registry.register(Histogram('status_check_duration_seconds', 'Durations.', ('type',), buckets=(0.1, 1)))
+        for value in (0.05, 0.1, 0.5, 3):
+            duration.observe(value, type='ping')
+
+        lines = registry.render().splitlines()
+
+        self.assertIn('status_check_duration_seconds_bucket{type="ping",le="0.1"} 2', lines)
+        self.assertIn('status_check_duration_seconds_bucket{type="ping",le="1.0"} 3', lines)
+        self.assertIn('status_check_duration_seconds_bucket{type="ping",le="+Inf"} 4', lines)
+        self.assertIn('status_check_duration_seconds_count{type="ping"} 4', lines)
+        self.assertIn('status_check_duration_seconds_sum{type="ping"} 3.65', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
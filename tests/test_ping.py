@@ -0,0 +1,56 @@
+import unittest
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from status.core import check_monitor
+from status.ping import configure_ping
+
+
+def make_host(address, is_alive=True):
+    host = MagicMock(address=address, is_alive=is_alive, avg_rtt=1.5, packet_loss=0.0, jitter=0.2)
+    return host
+
+
+class TestPing(unittest.TestCase):
+
+    def tearDown(self):
+        configure_ping()
+
+    @patch('status.ping.async_multiping', new_callable=AsyncMock)
+    def test_batch_engine_groups_due_monitors(self, mock_multiping):
+        async def run_test():
+            configure_ping({'engine': 'batch', 'window': 0.01})
+            mock_multiping.side_effect = lambda hosts, **kwargs: [make_host(h, h != '10.0.0.2') for h in hosts]
+            monitors = [{'name': f'h{i}', 'host': f'10.0.0.{i}', 'type': 'ping'} for i in range(1, 4)]
+
+            results = await asyncio.gather(*(check_monitor(None, m) for m in monitors))
+
+            mock_multiping.assert_called_once()
+            self.assertEqual(mock_multiping.call_args.args[0], ['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+            self.assertEqual([r.status for r in results], ['OK', 'Down', 'OK'])
+            self.assertEqual(results[0].message, '1.5ms, loss 0%, jitter 0.2ms')
+        asyncio.run(run_test())
+
+    @patch('status.ping.async_ping', new_callable=AsyncMock)
+    @patch('status.ping.async_multiping', new_callable=AsyncMock)
+    def test_batch_engine_isolates_failing_host(self, mock_multiping, mock_ping):
+        async def run_test():
+            configure_ping({'engine': 'batch', 'window': 0.01})
+            mock_multiping.side_effect = OSError('lookup failed')
+
+            async def ping(host, **kwargs):
+                if host == 'bad.invalid':
+                    raise OSError('lookup failed')
+                return make_host(host)
+
+            mock_ping.side_effect = ping
+            monitors = [{'name': 'good', 'host': '10.0.0.1'}, {'name': 'bad', 'host': 'bad.invalid'}]
+
+            results = await asyncio.gather(*(check_monitor(None, dict(m, type='ping')) for m in monitors))
+
+            self.assertEqual([r.status for r in results], ['OK', 'Error'])
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
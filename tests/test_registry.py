@@ -0,0 +1,60 @@
+import unittest
+
+from status.config import MonitorDiff
+from status.core import filter_monitors
+from status.registry import MonitorRegistry, url_host
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.monitors = [
+            {'name': 'web-a', 'type': 'url', 'url': 'https://user@a.example.com:8443/health', 'tags': ['prod']},
+            {'name': 'web-b', 'url': 'http://b.example.com', 'tags': ['staging']},
+            {'name': 'ping-a', 'type': 'ping', 'host': 'a.example.com', 'tags': ['prod', 'net']},
+            {'name': 'disk', 'type': 'command', 'command': 'df', 'host': 'a.example.com'},
+        ]
+        self.registry = MonitorRegistry(self.monitors)
+
+    def test_url_host(self):
+        self.assertEqual(url_host('https://user:pw@Example.com:8443/x?y#z'), 'example.com')
+        self.assertEqual(url_host('http://[::1]:8080/'), '::1')
+        self.assertEqual(url_host('example.com/path'), 'example.com')
+
+    def test_select(self):
+        self.assertEqual(self.registry.names(), ('web-a', 'web-b', 'ping-a', 'disk'))
+        self.assertEqual(self.registry.names(types='url'), ('web-a', 'web-b'))
+        self.assertEqual(self.registry.names(names=['disk', 'web-b']), ('web-b', 'disk'))
+        self.assertEqual(self.registry.names(names='web-*'), ('web-a', 'web-b'))
+        self.assertEqual(self.registry.names(tags='prod'), ('web-a', 'ping-a'))
+        self.assertEqual(self.registry.names(tags='prod', types=['ping', 'command']), ('ping-a',))
+        self.assertEqual(self.registry.names(hosts='a.example.com'), ('web-a', 'ping-a', 'disk'))
+        self.assertEqual(self.registry.names(names='missing'), ())
+
+    def test_records_share_monitor_dicts(self):
+        record = self.registry.select(names='disk')[0]
+        self.assertIs(record.config, self.monitors[3])
+        self.assertEqual(record.tags, frozenset())
+        self.assertIs(self.registry.select(types='url'), self.registry.select(types=['url']))
+
+    def test_apply_updates_indexes(self):
+        self.registry.names(tags='prod')
+        changed = {'name': 'web-a', 'type': 'url', 'url': 'https://c.example.com', 'tags': ['staging']}
+        added = {'name': 'ping-b', 'type': 'ping', 'host': 'b.example.com', 'tags': 'prod'}
+        self.registry.apply(MonitorDiff(added=[added], removed=[self.monitors[2]], changed=[changed]))
+
+        self.assertEqual(self.registry.names(), ('web-a', 'web-b', 'disk', 'ping-b'))
+        self.assertEqual(self.registry.names(tags='prod'), ('ping-b',))
+        self.assertEqual(self.registry.names(tags='staging'), ('web-a', 'web-b'))
+        self.assertEqual(self.registry.names(hosts='a.example.com'), ('disk',))
+        self.assertIs(self.registry.monitor('web-a'), changed)
+        self.assertNotIn('ping-a', self.registry)
+
+    def test_filter_monitors(self):
+        self.assertEqual(filter_monitors(self.monitors, name='disk'), [self.monitors[3]])
+        self.assertEqual(filter_monitors(self.monitors, types=['url']), self.monitors[:2])
+        self.assertIs(filter_monitors(self.monitors), self.monitors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import io
+import os
+import unittest
+from unittest.mock import patch
+
+from status.cli import format_results_for_console
+from status.render import TerminalRenderer, CLEAR
+
+from helpers import make_status
+
+
+def size(columns, lines):
+    return patch('status.render.terminal_size', return_value=os.terminal_size((columns, lines)))
+
+
+class TestTerminalRenderer(unittest.TestCase):
+
+    def test_only_changed_rows_are_redrawn(self):
+        out = io.StringIO()
+        renderer = TerminalRenderer(out)
+        with size(80, 24):
+            renderer.render(['a', 'b', 'c'])
+            self.assertTrue(out.getvalue().startswith(CLEAR))
+
+            out.seek(0)
+            out.truncate()
+            renderer.render(['a', 'B', 'c'])
+            self.assertEqual(out.getvalue(), '\033[2;1HB\033[K')
+
+            out.seek(0)
+            out.truncate()
+            self.assertEqual(renderer.render(['a', 'B', 'c']), 0)
+            self.assertEqual(out.getvalue(), '')
+
+    def test_shorter_frame_clears_leftover_rows(self):
+        out = io.StringIO()
+        renderer = TerminalRenderer(out)
+        with size(80, 24):
+            renderer.render(['a', 'b', 'c'])
+            out.seek(0)
+            out.truncate()
+            renderer.render(['a'])
+        self.assertEqual(out.getvalue(), '\033[2;1H\033[J')
+
+    def test_resize_redraws_everything(self):
+        out = io.StringIO()
+        renderer = TerminalRenderer(out)
+        with size(80, 24):
+            renderer.render(['a', 'b'])
+        out.seek(0)
+        out.truncate()
+        with size(100, 24):
+            renderer.render(['a', 'b'])
+        self.assertEqual(out.getvalue(), CLEAR + '\033[1;1Ha\033[K\033[2;1Hb\033[K')
+
+    def test_large_frames_are_paged(self):
+        out = io.StringIO()
+        renderer = TerminalRenderer(out)
+        lines = [f'line {i}' for i in range(10)]
+        with size(80, 5):
+            renderer.render(lines)
+            self.assertEqual(renderer.pages, 3)
+            self.assertIn('line 3', out.getvalue())
+            self.assertNotIn('line 4', out.getvalue())
+            self.assertIn('page 1/3', out.getvalue())
+
+            renderer.next_page()
+            renderer.next_page()
+            out.seek(0)
+            out.truncate()
+            renderer.render(lines)
+            self.assertIn('line 9', out.getvalue())
+            self.assertIn('page 3/3', out.getvalue())
+            self.assertIn('\033[J', out.getvalue())
+
+            renderer.next_page()
+            self.assertEqual(renderer.page, 0)
+
+
+class TestFormatResults(unittest.TestCase):
+
+    def test_rows_fill_the_given_width(self):
+        lines = format_results_for_console([make_status('a', 'OK'), make_status('b', 'Timeout')], width=60)
+        self.assertEqual(len(lines), 4)
+        for line in lines[1:-1]:
+            visible = line.replace('\033[38;5;68m', '').replace('\033[0m', '').replace('\033[1m', '').replace('\033[31m', '')
+            self.assertEqual(len(visible), 60)
+
+    def test_one_change_redraws_one_row(self):
+        results = [make_status(f'm{i}', 'OK') for i in range(50)]
+        out = io.StringIO()
+        renderer = TerminalRenderer(out)
+        columns = {}
+        with size(80, 100):
+            renderer.render(format_results_for_console(list(results), width=78, columns=columns))
+            results[10] = make_status('m10', 'Timeout')
+            renderer.render(format_results_for_console(list(results), width=78, columns=columns))
+            out.seek(0)
+            out.truncate()
+            # back up: the status column stays wide, so only that row changes
+            results[10] = make_status('m10', 'OK')
+            renderer.render(format_results_for_console(list(results), width=78, columns=columns))
+        self.assertEqual(out.getvalue().count('\033[K'), 1)
+        self.assertIn('\033[12;1H', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
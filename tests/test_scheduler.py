@@ -0,0 +1,142 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch, AsyncMock
+
+from status.config import diff_monitors
+from status.scheduler import Scheduler, ResultStore
+from status.session import close_session
+from status.breaker import configure_breaker
+
+from helpers import make_status
+
+
+class TestScheduler(unittest.TestCase):
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_results_are_served_from_store(self, mock_run_check):
+        async def run_test():
+            mock_run_check.side_effect = lambda session, monitor: make_status(monitor['name'])
+            monitors = [{'name': 'a', 'url': 'http://a'}, {'name': 'b', 'url': 'http://b'}]
+            scheduler = Scheduler(monitors, interval=60, jitter=0)
+            await scheduler.start()
+            try:
+                await asyncio.wait_for(scheduler.wait_ready(), 1)
+                results = scheduler.store.results_for(m['name'] for m in monitors)
+                self.assertEqual([r.name for r in results], ['a', 'b'])
+                self.assertTrue(all(r.checked_at for r in results))
+
+                scheduler.store.results_for(m['name'] for m in monitors)
+                self.assertEqual(mock_run_check.call_count, 2)
+            finally:
+                await scheduler.stop()
+                await close_session()
+        asyncio.run(run_test())
+
+    def test_no_monitors_is_ready(self):
+        async def run_test():
+            scheduler = Scheduler([], interval=60)
+            await scheduler.start()
+            await asyncio.wait_for(scheduler.wait_ready(), 1)
+            await scheduler.stop()
+            await close_session()
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_first_round_and_reloads_are_spread_over_the_interval(self, mock_run_check):
+        async def run_test():
+            monitors = [{'name': f'm{i}', 'url': f'http://m{i}'} for i in range(200)]
+            scheduler = Scheduler(monitors, interval=60)
+            await scheduler.start()
+            try:
+                now = time.monotonic()
+                first = sorted(due - now for due, *_ in scheduler._heap)
+                added = [{'name': f'n{i}', 'url': f'http://n{i}'} for i in range(200)]
+                scheduler.apply(diff_monitors(monitors, monitors + added))
+                reloaded = sorted(due - now for due, _, name, _ in scheduler._heap if name.startswith('n'))
+            finally:
+                await scheduler.stop()
+                await close_session()
+            for dues in (first, reloaded):
+                self.assertLess(dues[0], 5)
+                self.assertGreater(dues[-1], 50)
+                self.assertLessEqual(dues[-1], 60)
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_per_monitor_interval_without_overlap(self, mock_run_check):
+        async def run_test():
+            in_flight = set()
+            overlaps = []
+
+            async def slow_check(session, monitor):
+                if monitor['name'] in in_flight:
+                    overlaps.append(monitor['name'])
+                in_flight.add(monitor['name'])
+                await asyncio.sleep(0.05)
+                in_flight.discard(monitor['name'])
+                return make_status(monitor['name'])
+
+            mock_run_check.side_effect = slow_check
+            monitors = [{'name': 'fast', 'url': 'http://a', 'interval': 0.01}, {'name': 'slow', 'url': 'http://b'}]
+            scheduler = Scheduler(monitors, interval=60, jitter=0)
+            await scheduler.start()
+            await asyncio.sleep(0.3)
+            await scheduler.stop()
+            await close_session()
+
+            names = [call.args[1]['name'] for call in mock_run_check.call_args_list]
+            self.assertEqual(names.count('slow'), 1)
+            self.assertGreater(names.count('fast'), 2)
+            self.assertEqual(overlaps, [])
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
+    def test_dependents_follow_parent(self, mock_run_check):
+        async def run_test():
+            host_status = ['Timeout']
+
+            async def check(session, monitor):
+                status = host_status[0] if monitor['name'] == 'host' else 200
+                return make_status(monitor['name'], status)
+
+            mock_run_check.side_effect = check
+            monitors = [
+                {'name': 'site', 'url': 'http://a', 'depends_on': 'host'},
+                {'name': 'host', 'type': 'ping', 'host': 'a', 'interval': 0.05},
+            ]
+            configure_breaker({'confirm': False})
+            scheduler = Scheduler(monitors, interval=60, jitter=0)
+            await scheduler.start()
+            try:
+                await asyncio.wait_for(scheduler.wait_ready(), 1)
+                self.assertEqual(scheduler.store.get('site').status, 'Unreachable (parent down)')
+                self.assertNotIn('site', [call.args[1]['name'] for call in mock_run_check.call_args_list])
+
+                # the parent coming back re-checks the dependent right away, not after its 60s interval
+                host_status[0] = 200
+                await asyncio.sleep(0.2)
+                self.assertEqual(scheduler.store.get('site').status, 200)
+            finally:
+                configure_breaker()
+                await scheduler.stop()
+                await close_session()
+        asyncio.run(run_test())
+
+    def test_change_subscribers_only_see_status_changes(self):
+        async def run_test():
+            store = ResultStore()
+            every = store.subscribe()
+            changes = store.subscribe(changes_only=True)
+            for status in [200, 200, 'Timeout', 'Timeout', 200]:
+                store.set(make_status('a', status))
+            self.assertEqual(every.qsize(), 5)
+            self.assertEqual([changes.get_nowait().status for _ in range(changes.qsize())], [200, 'Timeout', 200])
+            store.unsubscribe(changes)
+            store.set(make_status('a', 500))
+            self.assertTrue(changes.empty())
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+
+from status import metrics
+from status.config import diff_monitors
+from status.core import MonitorStatus, Timing
+from status.registry import MonitorRegistry
+from status.shard import WORKER_EXITED, ShardedScheduler, decode_result, encode_frame, encode_result, shard_key
+
+
+def command_monitor(name, **extra):
+    return {'name': name, 'type': 'command', 'command': 'true', 'shell': False, **extra}
+
+
+class TestShard(unittest.TestCase):
+
+    def test_result_round_trip(self):
+        result = MonitorStatus(name='a', host_or_url='http://a', status=200, message='OK', monitor_type='url',
+                               checked_at=1.5, timing=Timing(connect=1.0, total=2.5))
+        frame = encode_frame(('results', [encode_result(result, 0.25)]))
+        self.assertEqual(int.from_bytes(frame[:4], 'big'), len(frame) - 4)
+        decoded, latency = decode_result(encode_result(result, 0.25))
+        self.assertEqual(decoded.model_dump(), result.model_dump())
+        self.assertEqual(latency, 0.25)
+
+    def test_dependency_chain_shares_a_shard_key(self):
+        registry = MonitorRegistry([
+            {'name': 'host', 'type': 'ping', 'host': 'a'},
+            {'name': 'site', 'url': 'http://a', 'depends_on': 'host'},
+            {'name': 'page', 'url': 'http://a/x', 'depends_on': 'site'},
+            {'name': 'orphan', 'url': 'http://b', 'depends_on': 'missing'},
+        ])
+        self.assertEqual({shard_key(m, registry) for m in registry.monitors[:3]}, {'host'})
+        self.assertEqual(shard_key(registry.monitor('orphan'), registry), 'orphan')
+
+    def test_workers_stream_results_and_apply_reloads(self):
+        async def run_test():
+            monitors = [command_monitor(f'c{i}') for i in range(6)]
+            scheduler = ShardedScheduler(monitors, 2, interval=60, jitter=0)
+            await scheduler.start()
+            try:
+                await asyncio.wait_for(scheduler.wait_ready(), 30)
+                self.assertEqual(len(scheduler.store), 6)
+                self.assertEqual(scheduler.store.get('c0').status, 'OK')
+                self.assertIsNotNone(scheduler.store.get('c0').timing.spawn)
+
+                new = monitors[1:] + [command_monitor('added')]
+                scheduler.apply(diff_monitors(scheduler.monitors, new))
+                self.assertIsNone(scheduler.store.get('c0'))
+                for _ in range(100):
+                    if scheduler.store.get('added') is not None:
+                        break
+                    await asyncio.sleep(0.1)
+                self.assertEqual(scheduler.store.get('added').status, 'OK')
+            finally:
+                await scheduler.stop()
+        asyncio.run(run_test())
+
+    @patch('status.shard.RESTART_DELAY', 0.1)
+    def test_exited_worker_is_reported_and_restarted(self):
+        async def wait_until(condition):
+            for _ in range(300):
+                if condition():
+                    return
+                await asyncio.sleep(0.1)
+            self.fail('timed out')
+
+        def lag_count():
+            series = metrics.scheduler_lag.series()
+            return series and sum(series[:-1])
+
+        async def run_test():
+            monitors = [command_monitor(f'c{i}') for i in range(6)]
+            scheduler = ShardedScheduler(monitors, 2, interval=60, jitter=0)
+            await scheduler.start()
+            try:
+                await asyncio.wait_for(scheduler.wait_ready(), 30)
+                # the workers' scheduler lag is served by the coordinator
+                await wait_until(lambda: lag_count() == 6)
+                self.assertEqual(metrics.checks_in_flight.get(), 0)
+
+                worker = max(scheduler.workers, key=lambda w: len(scheduler._shard_monitors(w.index)))
+                names = [m['name'] for m in scheduler._shard_monitors(worker.index)]
+                worker.process.kill()
+                await wait_until(lambda: scheduler.store.get(names[0]).status == WORKER_EXITED)
+                self.assertTrue(all(scheduler.store.get(name).status == WORKER_EXITED for name in names))
+
+                await wait_until(lambda: all(scheduler.store.get(name).status == 'OK' for name in names))
+                # lag seen by the killed process is kept
+                await wait_until(lambda: lag_count() == 6 + len(names))
+            finally:
+                await scheduler.stop()
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
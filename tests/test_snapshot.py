@@ -0,0 +1,184 @@
+import unittest
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import aiohttp
+import uvicorn
+
+from status.scheduler import ResultStore, Scheduler
+from status.snapshot import SnapshotCache, accepted_encodings, etag_matches
+from status.web import create_web_app
+
+from helpers import make_status
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_rebuilt_only_when_the_store_changes(self):
+        store = ResultStore()
+        store.set(make_status('a'))
+        cache = SnapshotCache(store)
+        names = ('a',)
+        builds = []
+
+        def build():
+            builds.append(1)
+            return store.results_for(names)
+
+        first = cache.get(('a',), names, build)
+        self.assertIs(cache.get(('a',), names, build), first)
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(json.loads(first.body)[0]['name'], 'a')
+
+        store.set(make_status('a', checked_at=2.0))
+        self.assertIs(cache.get(('a',), names, build), first)  # only checked_at moved
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(json.loads(first.body)[0]['checked_at'], 2.0)  # but the body shows it
+        self.assertEqual(len(builds), 2)
+
+        store.set(make_status('a', 500))
+        second = cache.get(('a',), names, build)
+        self.assertNotEqual(second.etag, first.etag)
+
+    def test_compressed_once_per_encoding(self):
+        store = ResultStore()
+        names = tuple(f'monitor-{i}' for i in range(50))
+        for name in names:
+            store.set(make_status(name))
+        snapshot = SnapshotCache(store).get((), names, lambda: store.results_for(names))
+        with patch('gzip.compress', wraps=gzip.compress) as compress:
+            body, encoding = snapshot.encoded('gzip, deflate')
+            self.assertEqual(snapshot.encoded('deflate, gzip;q=0.5')[0], body)
+            compress.assert_called_once()
+        self.assertEqual(gzip.decompress(body), snapshot.body)
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(snapshot.encoded('gzip;q=0'), (snapshot.body, None))
+
+    def test_headers(self):
+        self.assertEqual(accepted_encodings('gzip;q=1.0, br;q=0, identity'), {'gzip', 'identity'})
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"abc"', 'W/"abc"'))
+        self.assertTrue(etag_matches('*', '"abc"'))
+        self.assertFalse(etag_matches('"abcd"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+    def test_status_api_serves_304_and_gzip(self):
+        async def run_test():
+            args = SimpleNamespace(down=False, up=False, monitor_name=None, monitor=None, tag=None, follow=False,
+                                   interval=60)
+            app = create_web_app([], args)
+            server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+            serve = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.01)
+            url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/api/status"
+            hub = app.state.agents
+            hub.ingest('east', [make_status(f'db-{i}').model_dump() for i in range(50)])
+
+            try:
+                async with aiohttp.ClientSession(auto_decompress=False) as session:
+                    async with session.get(url, headers={'Accept-Encoding': 'gzip'}) as response:
+                        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+                        results = json.loads(gzip.decompress(await response.read()))
+                        etag = response.headers['ETag']
+                    self.assertEqual(len(results), 50)
+                    async with session.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}) as response:
+                        self.assertEqual(response.status, 304)
+                        self.assertEqual(await response.read(), b'')
+                    async with session.get(url, headers={'Accept-Encoding': 'identity'}) as response:
+                        self.assertNotIn('Content-Encoding', response.headers)
+                        self.assertEqual(json.loads(await response.read()), results)
+
+                    hub.ingest('east', [make_status('db-0', 500).model_dump()])
+                    async with session.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}) as response:
+                        self.assertEqual(response.status, 200)
+                    async with session.get(url, params={'status': 'down'}) as response:
+                        self.assertEqual([r['name'] for r in await response.json()], ['east/db-0'])
+            finally:
+                server.should_exit = True
+                await serve
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check')
+    def test_recheck_with_the_same_status_is_not_modified(self, mock_run_check):
+        statuses = {'a': 200}
+
+        async def run_check(session, monitor):
+            return make_status(monitor['name'], statuses[monitor['name']])
+
+        mock_run_check.side_effect = run_check
+
+        async def run_test():
+            args = SimpleNamespace(down=False, up=False, monitor_name=None, monitor=None, tag=None, follow=False,
+                                   interval=0.05)
+            monitors = [{'name': 'a', 'url': 'http://a'}]
+            scheduler = Scheduler(monitors, interval=0.05, jitter=0)
+            app = create_web_app(monitors, args, scheduler=scheduler)
+            server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+            serve = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.01)
+            url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/api/status"
+            try:
+                await asyncio.wait_for(scheduler.wait_ready(), 2)
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url) as response:
+                        etag = response.headers['ETag']
+                        checked_at = (await response.json())[0]['checked_at']
+
+                    version = scheduler.store.version
+                    while scheduler.store.version == version:
+                        await asyncio.sleep(0.01)
+                    async with session.get(url, headers={'If-None-Match': etag}) as response:
+                        self.assertEqual(response.status, 304)
+                    async with session.get(url) as response:
+                        self.assertEqual(response.headers['ETag'], etag)
+                        self.assertGreater((await response.json())[0]['checked_at'], checked_at)
+
+                    statuses['a'] = 500
+                    version = scheduler.store.version
+                    while scheduler.store.version == version:
+                        await asyncio.sleep(0.01)
+                    async with session.get(url, headers={'If-None-Match': etag}) as response:
+                        self.assertEqual(response.status, 200)
+                        self.assertEqual((await response.json())[0]['status'], 500)
+            finally:
+                server.should_exit = True
+                await serve
+        asyncio.run(run_test())
+
+    @patch('status.scheduler.run_check')
+    def test_status_api_does_not_wait_for_slow_monitors(self, mock_run_check):
+        async def run_check(session, monitor):
+            if monitor['name'] == 'hung':
+                await asyncio.Event().wait()
+            return make_status(monitor['name'])
+
+        mock_run_check.side_effect = run_check
+
+        async def run_test():
+            args = SimpleNamespace(down=False, up=False, monitor_name=None, monitor=None, tag=None, follow=False,
+                                   interval=60)
+            monitors = [{'name': 'fast', 'url': 'http://fast'}, {'name': 'hung', 'url': 'http://hung'}]
+            app = create_web_app(monitors, args, scheduler=Scheduler(monitors, interval=60, jitter=0))
+            server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+            serve = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.01)
+            url = f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}/api/status"
+            try:
+                await asyncio.sleep(0.05)
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=2)) as response:
+                        self.assertEqual([r['name'] for r in await response.json()], ['fast'])
+            finally:
+                server.should_exit = True
+                await serve
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from status.core import check_monitor
+from status.ssh import configure_ssh, close_ssh, multiplex_shared_hosts
+
+
+def make_proc(returncode=0):
+    proc = MagicMock()
+    proc.returncode = returncode
+    proc.wait = AsyncMock(return_value=returncode)
+    proc.communicate = AsyncMock(return_value=(b'', b''))
+    return proc
+
+
+class TestSSH(unittest.TestCase):
+
+    def tearDown(self):
+        configure_ssh()
+
+    @patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_commands_share_one_master_per_host(self, mock_exec):
+        async def run_test():
+            configure_ssh({'control_dir': '/tmp/status-ssh-test'})
+            mock_exec.return_value = make_proc()
+            monitors = [
+                {'name': 'mount', 'type': 'command', 'command': 'mountpoint -q /mnt/media', 'host': 'plex'},
+                {'name': 'disk', 'type': 'command', 'command': 'test -d /srv', 'host': 'plex'},
+            ]
+
+            results = await asyncio.gather(*(check_monitor(None, m) for m in monitors))
+
+            masters = [call for call in mock_exec.call_args_list if 'ControlMaster=yes' in call.args]
+            commands = [call for call in mock_exec.call_args_list if 'ControlMaster=no' in call.args]
+            self.assertEqual(len(masters), 1)
+            self.assertEqual(masters[0].args[-1], 'plex')
+            self.assertEqual(sorted(call.args[-1] for call in commands), ['mountpoint -q /mnt/media', 'test -d /srv'])
+            self.assertIn('ControlPath=/tmp/status-ssh-test/%C', commands[0].args)
+            self.assertEqual([r.status for r in results], ['OK', 'OK'])
+            self.assertEqual(results[0].host_or_url, "ssh plex 'mountpoint -q /mnt/media'")
+            messages = sorted(r.message for r in results)
+            self.assertRegex(messages[0], r'^Exit code: 0 \(ssh handshake \d+ms, command \d+ms\)$')
+            self.assertRegex(messages[1], r'^Exit code: 0 \(ssh reused, command \d+ms\)$')
+
+            await close_ssh()
+            self.assertIn('-O', mock_exec.call_args.args)
+        asyncio.run(run_test())
+
+    @patch('asyncio.create_subprocess_shell', new_callable=AsyncMock)
+    @patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_failed_connection_is_down(self, mock_exec, mock_shell):
+        async def run_test():
+            mock_exec.return_value = make_proc(255)
+            monitor = {'name': 'mount', 'type': 'command', 'command': 'true', 'host': 'plex'}
+
+            result = await check_monitor(None, monitor)
+
+            self.assertEqual(result.status, 'Down')
+            self.assertEqual(result.message, 'SSH connection to plex failed (exit code 255)')
+            mock_shell.assert_not_called()
+            await close_ssh()
+        asyncio.run(run_test())
+
+    @patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_handshake_is_bounded_by_timeout(self, mock_exec):
+        async def run_test():
+            proc = make_proc()
+            waits = []
+
+            async def wait():
+                waits.append(1)
+                if len(waits) == 1:
+                    await asyncio.Event().wait()  # the host never answers
+                return -9
+
+            proc.wait = wait
+            mock_exec.return_value = proc
+            monitor = {'name': 'mount', 'type': 'command', 'command': 'true', 'host': 'plex', 'timeout': 0.1}
+
+            result = await check_monitor(None, monitor)
+
+            self.assertEqual(result.status, 'Timeout')
+            proc.kill.assert_called_once()
+            await close_ssh()
+        asyncio.run(run_test())
+
+    @patch('status.executor._kill_group')
+    @patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_handshake_and_command_share_the_timeout(self, mock_exec, mock_kill_group):
+        async def run_test():
+            master = make_proc()
+
+            async def handshake():
+                await asyncio.sleep(0.2)
+                return 0
+
+            async def hang():
+                await asyncio.Event().wait()
+
+            master.wait = handshake
+            command = make_proc()
+            command.communicate = hang
+            mock_exec.side_effect = [master, command]
+            monitor = {'name': 'mount', 'type': 'command', 'command': 'true', 'host': 'plex', 'timeout': 0.3}
+
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await check_monitor(None, monitor)
+
+            self.assertEqual(result.status, 'Timeout')
+            self.assertLess(loop.time() - start, 0.45)
+            mock_kill_group.assert_called_once_with(command)
+            mock_exec.side_effect = None
+            mock_exec.return_value = make_proc()
+            await close_ssh()
+        asyncio.run(run_test())
+
+    @patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_master_is_checked_after_persist(self, mock_exec):
+        async def run_test():
+            configure_ssh({'persist': 0})
+            monitor = {'name': 'mount', 'type': 'command', 'command': 'true', 'host': 'plex'}
+            # master, command; then -O check (alive), command; then -O check (gone), new master, command
+            mock_exec.side_effect = [make_proc(), make_proc(), make_proc(0), make_proc(), make_proc(255),
+                                     make_proc(), make_proc()]
+
+            first = await check_monitor(None, monitor)
+            reused = await check_monitor(None, monitor)
+            reopened = await check_monitor(None, monitor)
+
+            checks = [call for call in mock_exec.call_args_list if 'check' in call.args]
+            masters = [call for call in mock_exec.call_args_list if 'ControlMaster=yes' in call.args]
+            self.assertEqual((len(checks), len(masters)), (2, 2))
+            self.assertIn('ssh handshake', first.message)
+            self.assertIn('ssh reused', reused.message)
+            self.assertIn('ssh handshake', reopened.message)
+            mock_exec.side_effect = None
+            mock_exec.return_value = make_proc()
+            await close_ssh()
+        asyncio.run(run_test())
+
+    @patch('asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    def test_one_shot_multiplexes_only_shared_hosts(self, mock_exec):
+        async def run_test():
+            mock_exec.return_value = make_proc()
+            monitors = [
+                {'name': 'a', 'type': 'command', 'command': 'true', 'host': 'plex'},
+                {'name': 'b', 'type': 'command', 'command': 'true', 'host': 'plex'},
+                {'name': 'c', 'type': 'command', 'command': 'true', 'host': 'nas'},
+            ]
+            multiplex_shared_hosts(monitors)
+
+            await asyncio.gather(*(check_monitor(None, m) for m in monitors))
+
+            masters = [call.args[-1] for call in mock_exec.call_args_list if 'ControlMaster=yes' in call.args]
+            self.assertEqual(masters, ['plex'])
+            self.assertIn(['ssh', 'nas', 'true'], [list(call.args) for call in mock_exec.call_args_list])
+            await close_ssh()
+        asyncio.run(run_test())
+
+
+if __name__ == '__main__':
+    unittest.main()
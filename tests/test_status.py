@@ -1,9 +1,16 @@
 import unittest
 import asyncio
-from unittest.mock import patch, MagicMock, AsyncMock
+import os
+import subprocess
+import sys
+from unittest.mock import patch, ANY, MagicMock, AsyncMock
 
-from status.core import check_monitor, MonitorStatus
+from status.core import check_monitor, iter_checks, MonitorStatus
 from status.cli import main
+from status.session import configure_session, get_session, close_session
+
+import aiohttp
+from aiohttp import web
 
 class TestStatus(unittest.TestCase):
 
@@ -22,6 +29,30 @@ class TestStatus(unittest.TestCase):
             self.assertEqual(result.message, 'OK')
         asyncio.run(run_test())
 
+    def test_check_monitor_records_timing(self):
+        async def run_test():
+            session = MagicMock()
+
+            def get(url, timeout, trace_request_ctx):
+                # what the trace hooks of the shared session would record
+                trace_request_ctx.update({'dns_start': 1.0, 'dns_end': 1.002, 'connect_start': 1.0, 'connect_end': 1.005})
+                context_manager = AsyncMock()
+                context_manager.__aenter__.return_value.status = 200
+                return context_manager
+
+            session.get.side_effect = get
+            result = await check_monitor(session, {'name': 'example', 'url': 'http://example.com', 'type': 'url'})
+            self.assertEqual(result.timing.dns, 2.0)
+            self.assertEqual(result.timing.connect, 3.0)
+            self.assertIsNotNone(result.timing.ttfb)
+            self.assertGreaterEqual(result.timing.total, result.timing.ttfb)
+
+            result = await check_monitor(None, {'name': 'cmd', 'type': 'command', 'command': 'true'})
+            self.assertIsNotNone(result.timing.spawn)
+            self.assertIsNotNone(result.timing.run)
+            self.assertIn('timing', result.model_dump())
+        asyncio.run(run_test())
+
     def test_check_monitor_timeout(self):
         async def run_test():
             session = MagicMock()
@@ -36,10 +67,10 @@ class TestStatus(unittest.TestCase):
         asyncio.run(run_test())
 
     @patch('status.cli.print_results')
-    @patch('status.cli.check_monitor', new_callable=AsyncMock)
+    @patch('status.cli.run_check', new_callable=AsyncMock)
     @patch('status.cli.get_config')
     @patch('status.cli.argparse.ArgumentParser')
-    def test_main_console_mode(self, mock_parser, mock_get_config, mock_check_monitor, mock_print_results):
+    def test_main_console_mode(self, mock_parser, mock_get_config, mock_run_check, mock_print_results):
         async def run_test():
             mock_args = MagicMock()
             mock_args.console = True
@@ -47,6 +78,9 @@ class TestStatus(unittest.TestCase):
             mock_args.web = False
             mock_args.monitor_name = None
             mock_args.monitor = None
+            mock_args.tag = None
+            mock_args.workers = None
+            mock_args.agent = False
             mock_args.down = False
             mock_args.up = False
             mock_args.output = "text"
@@ -57,7 +91,7 @@ class TestStatus(unittest.TestCase):
             mock_get_config.return_value = {'monitors': monitors}
             
             results = [MonitorStatus(name='example', host_or_url='http://example.com', status=200, message='OK', monitor_type='url')]
-            mock_check_monitor.return_value = results[0]
+            mock_run_check.return_value = results[0]
 
             await main()
 
@@ -66,10 +100,10 @@ class TestStatus(unittest.TestCase):
 
     @patch('status.cli.asyncio.sleep', new_callable=AsyncMock)
     @patch('status.cli.print_results')
-    @patch('status.cli.check_monitor', new_callable=AsyncMock)
+    @patch('status.scheduler.run_check', new_callable=AsyncMock)
     @patch('status.cli.get_config')
     @patch('status.cli.argparse.ArgumentParser')
-    def test_main_follow_mode(self, mock_parser, mock_get_config, mock_check_monitor, mock_print_results, mock_asyncio_sleep):
+    def test_main_follow_mode(self, mock_parser, mock_get_config, mock_run_check, mock_print_results, mock_asyncio_sleep):
         async def run_test():
             mock_args = MagicMock()
             mock_args.follow = True
@@ -77,6 +111,9 @@ class TestStatus(unittest.TestCase):
             mock_args.web = False
             mock_args.monitor_name = None
             mock_args.monitor = None
+            mock_args.tag = None
+            mock_args.workers = None
+            mock_args.agent = False
             mock_args.down = False
             mock_args.up = False
             mock_args.output = "text"
@@ -85,10 +122,11 @@ class TestStatus(unittest.TestCase):
             mock_parser.return_value.parse_args.return_value = mock_args
 
             monitors = [{'name': 'example', 'url': 'http://example.com'}]
-            mock_get_config.return_value = {'monitors': monitors, 'follow': {'interval': 1}}
+            # asyncio.sleep is patched module-wide, so keep the config watcher out of its call count
+            mock_get_config.return_value = {'monitors': monitors, 'follow': {'interval': 1}, 'reload': {'enabled': False}}
             
             results = [MonitorStatus(name='example', host_or_url='http://example.com', status=200, message='OK', monitor_type='url')]
-            mock_check_monitor.return_value = results[0]
+            mock_run_check.return_value = results[0]
 
             # To prevent an infinite loop in the test, we'll raise an exception after a few calls
             mock_asyncio_sleep.side_effect = [None, None, KeyboardInterrupt]
@@ -96,8 +134,49 @@ class TestStatus(unittest.TestCase):
             with self.assertRaises(KeyboardInterrupt):
                 await main()
 
-            self.assertEqual(mock_check_monitor.call_count, 3)
+            # Checks run on the scheduler's own interval, not once per redraw
+            self.assertEqual(mock_run_check.call_count, 1)
             self.assertEqual(mock_print_results.call_count, 3)
+            mock_print_results.assert_called_with(results)
+        asyncio.run(run_test())
+
+    @patch('status.cli.print_results')
+    @patch('status.scheduler.run_check')
+    @patch('status.cli.get_config')
+    @patch('status.cli.argparse.ArgumentParser')
+    def test_main_follow_mode_draws_before_every_first_check(self, mock_parser, mock_get_config, mock_run_check,
+                                                              mock_print_results):
+        async def run_check(session, monitor):
+            if monitor['name'] == 'slow':
+                await asyncio.Event().wait()
+            return MonitorStatus(name=monitor['name'], host_or_url=monitor['url'], status=200, message='OK',
+                                 monitor_type='url')
+
+        async def run_test():
+            mock_args = MagicMock()
+            mock_args.follow = True
+            mock_args.web = False
+            mock_args.monitor_name = None
+            mock_args.monitor = None
+            mock_args.tag = None
+            mock_args.workers = None
+            mock_args.agent = False
+            mock_args.down = False
+            mock_args.up = False
+            mock_args.output = "text"
+            mock_args.config = "config.yaml"
+            mock_args.interval = 0.2
+            mock_parser.return_value.parse_args.return_value = mock_args
+
+            monitors = [{'name': 'fast', 'url': 'http://fast'}, {'name': 'slow', 'url': 'http://slow', 'interval': 600}]
+            mock_get_config.return_value = {'monitors': monitors, 'reload': {'enabled': False}}
+            mock_run_check.side_effect = run_check
+            mock_print_results.side_effect = RuntimeError('drawn')
+
+            with self.assertRaises(RuntimeError):
+                async with asyncio.timeout(5):
+                    await main()
+            self.assertEqual([r.name for r in mock_print_results.call_args[0][0]], ['fast'])
         asyncio.run(run_test())
 
     @patch('status.cli.run_web_server')
@@ -112,6 +191,9 @@ class TestStatus(unittest.TestCase):
             mock_args.follow = False
             mock_args.monitor_name = None
             mock_args.monitor = None
+            mock_args.tag = None
+            mock_args.workers = None
+            mock_args.agent = False
             mock_args.down = False
             mock_args.up = False
             mock_args.output = "text"
@@ -123,14 +205,17 @@ class TestStatus(unittest.TestCase):
             
             await main()
 
-            mock_create_web_app.assert_called_once_with(monitors)
-            mock_run_web_server.assert_called_once()
+            mock_create_web_app.assert_called_once_with(monitors, mock_args, history=None, config_path='config.yaml',
+                                                        reload_config=None, scheduler=ANY)
+            scheduler = mock_create_web_app.call_args.kwargs['scheduler']
+            self.assertEqual([m['name'] for m in scheduler.monitors], ['example'])
+            mock_run_web_server.assert_called_once_with(mock_create_web_app.return_value)
         asyncio.run(run_test())
 
-    @patch('status.cli.check_monitor', new_callable=AsyncMock)
+    @patch('status.cli.run_check', new_callable=AsyncMock)
     @patch('status.cli.get_config')
     @patch('status.cli.argparse.ArgumentParser')
-    def test_main_ignore_monitors(self, mock_parser, mock_get_config, mock_check_monitor):
+    def test_main_ignore_monitors(self, mock_parser, mock_get_config, mock_run_check):
         async def run_test():
             mock_args = MagicMock()
             mock_args.console = True
@@ -138,6 +223,9 @@ class TestStatus(unittest.TestCase):
             mock_args.web = False
             mock_args.monitor_name = None
             mock_args.monitor = None
+            mock_args.tag = None
+            mock_args.workers = None
+            mock_args.agent = False
             mock_args.down = False
             mock_args.up = False
             mock_args.output = "text"
@@ -153,11 +241,134 @@ class TestStatus(unittest.TestCase):
             
             await main()
 
-            # Check that check_monitor is called only for the non-ignored monitor
-            self.assertEqual(mock_check_monitor.call_count, 1)
-            self.assertEqual(mock_check_monitor.call_args[0][1]['name'], 'example1')
+            # Check that run_check is called only for the non-ignored monitor
+            self.assertEqual(mock_run_check.call_count, 1)
+            self.assertEqual(mock_run_check.call_args[0][1]['name'], 'example1')
+        asyncio.run(run_test())
+
+    @patch('status.core.run_check', new_callable=AsyncMock)
+    def test_iter_checks_yields_in_completion_order(self, mock_run_check):
+        async def run_test():
+            async def check(session, monitor):
+                await asyncio.sleep(monitor['delay'])
+                return MonitorStatus(name=monitor['name'], host_or_url='', status='OK', message='', monitor_type='url')
+
+            mock_run_check.side_effect = check
+            monitors = [{'name': 'slow', 'delay': 0.2}, {'name': 'fast', 'delay': 0}]
+            names = [result.name async for result in iter_checks(None, monitors)]
+            self.assertEqual(names, ['fast', 'slow'])
+        asyncio.run(run_test())
+
+    @patch('status.core.run_check', new_callable=AsyncMock)
+    def test_iter_checks_skips_dependents_of_down_parent(self, mock_run_check):
+        async def run_test():
+            async def check(session, monitor):
+                status = 'Timeout' if monitor['name'] == 'host' else 200
+                return MonitorStatus(name=monitor['name'], host_or_url='', status=status, message='', monitor_type='url')
+
+            mock_run_check.side_effect = check
+            monitors = [
+                {'name': 'site', 'url': 'http://a', 'depends_on': 'host'},
+                {'name': 'host', 'type': 'ping', 'host': 'a'},
+                {'name': 'page', 'url': 'http://a/page', 'depends_on': 'site'},
+                {'name': 'loop-a', 'url': 'http://b', 'depends_on': 'loop-b'},
+                {'name': 'loop-b', 'url': 'http://c', 'depends_on': 'loop-a'},
+            ]
+            results = {result.name: result async for result in iter_checks(None, monitors)}
+            self.assertEqual(results['site'].status, 'Unreachable (parent down)')
+            self.assertEqual(results['page'].status, 'Unreachable (parent down)')
+            self.assertEqual(results['loop-a'].status, 200)
+            checked = sorted(call.args[1]['name'] for call in mock_run_check.call_args_list)
+            self.assertEqual(checked, ['host', 'loop-a', 'loop-b'])
+        asyncio.run(run_test())
+
+    def test_shared_session_is_reused(self):
+        async def run_test():
+            configure_session({'limit_per_host': 3})
+            try:
+                session = await get_session()
+                self.assertIs(await get_session(), session)
+                self.assertEqual(session.connector.limit_per_host, 3)
+                await close_session()
+                self.assertTrue(session.closed)
+                self.assertIsNot(await get_session(), session)
+                await close_session()
+            finally:
+                configure_session()
         asyncio.run(run_test())
 
+    def test_cli_import_skips_web_and_ping_dependencies(self):
+        code = "import sys, status.cli; print(' '.join(m for m in ('fastapi', 'uvicorn', 'icmplib') if m in sys.modules))"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), '')
+
+
+class TestHttpChecks(unittest.TestCase):
+    """check_url against a local server that streams its body in small, slow chunks."""
+
+    def check(self, **options):
+        async def run_test():
+            sent = []
+
+            async def page(request):
+                if request.method == 'HEAD':
+                    return web.Response()
+                response = web.StreamResponse()
+                await response.prepare(request)
+                try:
+                    for i in range(64):
+                        # the marker is split over two writes
+                        chunk = {40: b'status: hea', 41: b'lthy ok'}.get(i, b'<p>filler</p>' * 100)
+                        await response.write(chunk)
+                        sent.append(len(chunk))
+                        await asyncio.sleep(0.005)
+                    await response.write_eof()
+                except ConnectionResetError:
+                    pass  # the check stopped reading early
+                return response
+
+            app = web.Application()
+            app.router.add_route('*', '/', page)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            try:
+                monitor = {'name': 'page', 'url': f'http://127.0.0.1:{runner.addresses[0][1]}/', **options}
+                async with aiohttp.ClientSession() as session:
+                    return await check_monitor(session, monitor), len(sent)
+            finally:
+                await runner.cleanup()
+        return asyncio.run(run_test())
+
+    def test_substring_stops_reading_when_found(self):
+        result, chunks = self.check(expect_substring='healthy ok')
+        self.assertEqual((result.status, result.message), (200, 'OK'))
+        self.assertLess(chunks, 64)
+
+    def test_regex_across_chunks(self):
+        result, _ = self.check(expect_regex=r'status: (healthy|ok)')
+        self.assertEqual(result.status, 200)
+
+    def test_max_body_bytes_bounds_the_read(self):
+        result, chunks = self.check(expect_substring='healthy', max_body_bytes=4000)
+        self.assertEqual(result.status, 'Content mismatch')
+        self.assertEqual(result.message, "'healthy' not found in first 4000 bytes")
+        self.assertLess(chunks, 40)
+
+    def test_expect_status(self):
+        result, _ = self.check(expect_status=[200, 204])
+        self.assertEqual((result.status, result.message), ('OK', 'HTTP 200'))
+        result, _ = self.check(expect_status=503)
+        self.assertEqual((result.status, result.message), ('HTTP 200', 'expected 503'))
+
+    def test_head(self):
+        result, _ = self.check(method='head')
+        self.assertEqual(result.status, 200)
+        result, _ = self.check(method='HEAD', expect_substring='ok')
+        self.assertTrue(result.status.startswith('Error'))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+from collections import Counter
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp import web
+
+from status import syncthing
+from status.core import check_monitor, select_monitors
+
+CONFIG = {
+    'folders': [
+        {'id': 'abcd-1234', 'label': 'Photos', 'paused': False},
+        {'id': 'docs', 'label': 'Documents', 'paused': False},
+        {'id': 'old', 'label': 'Old', 'paused': True},
+    ],
+    'devices': [
+        {'deviceID': 'SELF', 'name': 'here'},
+        {'deviceID': 'LAPTOP', 'name': 'laptop'},
+        {'deviceID': 'PHONE', 'name': 'phone'},
+    ],
+}
+CONNECTIONS = {'connections': {'LAPTOP': {'connected': True, 'address': '10.0.0.2:22000'},
+                               'PHONE': {'connected': False}}}
+COMPLETION = {'abcd-1234': {'completion': 100, 'needItems': 0}, 'docs': {'completion': 87.5, 'needItems': 12}}
+ERRORS = {'docs': [{'path': 'a.txt', 'error': 'permission denied'}]}
+
+
+class FakeSyncthing:
+    """A local Syncthing REST API that counts requests and answers If-None-Match with 304."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = Counter()
+        self.not_modified = 0
+
+    def json(self, request, body):
+        etag = f'"{request.path}-1"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.json_response(body, headers={'ETag': etag})
+
+    async def handle(self, request):
+        self.requests[request.path] += 1
+        if request.headers.get('X-API-Key') != 'key':
+            return web.Response(status=403, text='Forbidden')
+        if self.status != 200:
+            return web.Response(status=self.status, text='broken')
+        folder = request.query.get('folder')
+        body = {
+            '/rest/system/status': {'myID': 'SELF', 'uptime': 3600},
+            '/rest/system/connections': CONNECTIONS,
+            '/rest/config': CONFIG,
+            '/rest/db/completion': COMPLETION.get(folder),
+            '/rest/folder/errors': {'folder': folder, 'errors': ERRORS.get(folder)},
+        }[request.path]
+        return self.json(request, body)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', 0).start()
+        self.url = f'http://127.0.0.1:{self.runner.addresses[0][1]}'
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+class TestSyncthing(unittest.TestCase):
+
+    def tearDown(self):
+        syncthing.configure_syncthing()
+
+    def monitor(self, server, **options):
+        return {'name': 'st', 'type': 'syncthing', 'url': server.url, 'api_key': 'key', **options}
+
+    def test_monitors_share_one_sweep(self):
+        async def run_test():
+            async with FakeSyncthing() as server, aiohttp.ClientSession() as session:
+                monitors = [self.monitor(server), self.monitor(server, folder='Photos'),
+                            self.monitor(server, folder='docs'), self.monitor(server, folder='Old'),
+                            self.monitor(server, folder='missing'), self.monitor(server, device='laptop'),
+                            self.monitor(server, device='PHONE')]
+                results = await asyncio.gather(*(check_monitor(session, m) for m in monitors))
+                return [(r.status, r.message) for r in results], server.requests
+        results, requests = asyncio.run(run_test())
+        self.assertEqual(results, [
+            ('OK', 'Uptime: 3600s, 1/2 devices connected'),
+            ('OK', '100% synced'),
+            ('Errors', '1 errors, first: a.txt: permission denied'),
+            ('Paused', ''),
+            ('Not found', 'no folder missing'),
+            ('OK', 'Connected to 10.0.0.2:22000'),
+            ('Disconnected', ''),
+        ])
+        self.assertEqual(requests['/rest/system/status'], 1)
+        self.assertEqual(requests['/rest/system/connections'], 1)
+        self.assertEqual(requests['/rest/config'], 1)
+        self.assertEqual(requests['/rest/db/completion'], 2)
+
+    def test_min_completion(self):
+        async def run_test():
+            async with FakeSyncthing() as server, aiohttp.ClientSession() as session:
+                syncing = await check_monitor(session, self.monitor(server, folder='docs'))
+                enough = await check_monitor(session, self.monitor(server, folder='docs', min_completion=80))
+                return syncing, enough
+        with patch.dict(ERRORS, clear=True):
+            syncing, enough = asyncio.run(run_test())
+        self.assertEqual((syncing.status, syncing.message), ('Syncing', '88% synced, 12 items needed'))
+        self.assertEqual(enough.status, 'OK')
+
+    def test_expired_entries_are_revalidated_with_etag(self):
+        syncthing.configure_syncthing({'ttl': 0, 'config_ttl': 0})
+
+        async def run_test():
+            async with FakeSyncthing() as server, aiohttp.ClientSession() as session:
+                first = await check_monitor(session, self.monitor(server))
+                second = await check_monitor(session, self.monitor(server))
+                return first, second, server
+        first, second, server = asyncio.run(run_test())
+        self.assertEqual(first.message, second.message)
+        self.assertEqual(server.requests['/rest/system/status'], 2)
+        self.assertEqual(server.not_modified, 3)
+
+    def test_http_error(self):
+        async def run_test():
+            async with FakeSyncthing(status=500) as server, aiohttp.ClientSession() as session:
+                return await check_monitor(session, self.monitor(server, folder='docs'))
+        result = asyncio.run(run_test())
+        self.assertEqual((result.status, result.message), ('HTTP 500', 'broken'))
+
+    def test_folder_and_device_are_exclusive(self):
+        monitors = select_monitors({'monitors': [
+            {'name': 'st', 'type': 'syncthing', 'url': 'http://a', 'api_key': 'k', 'folder': 'f', 'device': 'd'},
+        ]})
+        self.assertEqual(monitors[0]['config_error'], 'set folder or device, not both')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import unittest
+import asyncio
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+from status import tcp
+from status.core import check_monitor, select_monitors
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestTcp(unittest.TestCase):
+
+    def tearDown(self):
+        tcp.configure_tcp()
+
+    def test_open_and_refused_ports(self):
+        async def run_test():
+            server = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                open_port = await check_monitor(None, {'name': 'db', 'type': 'tcp', 'host': '127.0.0.1', 'port': port})
+                closed = await check_monitor(None, {'name': 'db', 'type': 'tcp', 'host': '127.0.0.1',
+                                                    'port': free_port()})
+            return open_port, closed
+        open_port, closed = asyncio.run(run_test())
+        self.assertEqual(open_port.status, 'OK')
+        self.assertTrue(open_port.message.startswith('Connected in'))
+        self.assertIsNotNone(open_port.timing.connect)
+        self.assertEqual(closed.status, 'Refused')
+
+    def test_connects_per_host_are_capped(self):
+        tcp.configure_tcp({'per_host': 2})
+        running = []
+        most = []
+
+        class Writer:
+            def close(self):
+                pass
+
+        async def open_connection(host, port):
+            running.append(port)
+            most.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(port)
+            return None, Writer()
+
+        async def run_test():
+            monitors = [{'name': f'p{port}', 'type': 'tcp', 'host': 'db', 'port': port} for port in range(1000, 1010)]
+            monitors.append({'name': 'other', 'type': 'tcp', 'host': 'other', 'port': 1})
+            return await asyncio.gather(*(check_monitor(None, m) for m in monitors))
+
+        with patch('asyncio.open_connection', open_connection):
+            results = asyncio.run(run_test())
+        self.assertTrue(all(result.status == 'OK' for result in results))
+        self.assertEqual(max(most), 3)  # two to db, one to other
+
+    def test_port_is_validated(self):
+        monitors = select_monitors({'monitors': [
+            {'name': 'a', 'type': 'tcp', 'host': 'db'},
+            {'name': 'b', 'type': 'tcp', 'host': 'db', 'port': 'postgres'},
+            {'name': 'c', 'type': 'tls', 'host': 'db'},
+        ]})
+        self.assertEqual(monitors[0]['config_error'], 'missing port')
+        self.assertIn('port must be a number', monitors[1]['config_error'])
+        self.assertNotIn('config_error', monitors[2])
+
+
+@unittest.skipUnless(shutil.which('openssl'), 'needs the openssl command')
+class TestTls(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.cert = os.path.join(cls.tmpdir.name, 'cert.pem')
+        cls.key = os.path.join(cls.tmpdir.name, 'key.pem')
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '30',
+                        '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+                        '-keyout', cls.key, '-out', cls.cert], check=True, capture_output=True)
+        cls.expired = cls.expired_certificate()
+
+    @classmethod
+    def expired_certificate(cls):
+        # openssl req can't backdate a certificate, openssl ca can
+        directory = os.path.join(cls.tmpdir.name, 'ca')
+        os.mkdir(directory)
+        with open(os.path.join(directory, 'ca.cnf'), 'w') as f:
+            f.write("[ca]\ndefault_ca = ca\n[ca]\ndatabase = index.txt\nnew_certs_dir = .\nserial = serial\n"
+                    "default_md = sha256\npolicy = policy\ncopy_extensions = copy\n[policy]\ncommonName = supplied\n")
+        with open(os.path.join(directory, 'index.txt'), 'w'):
+            pass
+        with open(os.path.join(directory, 'serial'), 'w') as f:
+            f.write('01\n')
+        subprocess.run(['openssl', 'req', '-new', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+                        '-addext', 'subjectAltName=DNS:localhost', '-keyout', 'key.pem', '-out', 'req.pem'],
+                       cwd=directory, check=True, capture_output=True)
+        subprocess.run(['openssl', 'ca', '-batch', '-config', 'ca.cnf', '-selfsign', '-keyfile', 'key.pem',
+                        '-in', 'req.pem', '-out', 'cert.pem', '-startdate', '20200101000000Z',
+                        '-enddate', '20200201000000Z'], cwd=directory, check=True, capture_output=True)
+        return os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        client = ssl.create_default_context(cafile=self.cert)
+        patcher = patch('status.tcp._ssl_context', client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        tcp.configure_tcp()
+
+    def check(self, *monitors, cert=None, key=None):
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert or self.cert, key or self.key)
+        handshakes = []
+
+        async def handle(reader, writer):
+            handshakes.append(writer.get_extra_info('ssl_object') is not None)
+            writer.close()
+
+        async def run_test():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0, ssl=server_context)
+            port = server.sockets[0].getsockname()[1]
+            results = []
+            async with server:
+                for options in monitors:
+                    monitor = {'name': 'site', 'type': 'tls', 'host': '127.0.0.1', 'port': port,
+                               'server_name': 'localhost', **options}
+                    results.append(await check_monitor(None, monitor))
+            return results
+        return asyncio.run(run_test())
+
+    def test_expiry_and_cached_handshake(self):
+        first, second = self.check({}, {})
+        self.assertEqual(first.status, 'OK')
+        self.assertRegex(first.message, r'^Certificate expires in 29 days \(\d{4}-\d\d-\d\d\)$')
+        self.assertIsNotNone(first.timing.handshake)
+        self.assertTrue(second.message.endswith(', handshake cached'))
+        self.assertIsNone(second.timing.handshake)
+
+    def test_expiring_soon(self):
+        tcp.configure_tcp({'cert_interval': 0})
+        result, = self.check({'warn_days': 60})
+        self.assertEqual(result.status, 'Expiring')
+
+    def test_untrusted_certificate(self):
+        with patch('status.tcp._ssl_context', ssl.create_default_context()):
+            result, = self.check({})
+        self.assertEqual(result.status, 'TLS error')
+        self.assertRegex(result.message, r'^Certificate verify failed: .+, expires in 29 days \(\d{4}-\d\d-\d\d\)$')
+
+    def test_expired_certificate(self):
+        cert, key = self.expired
+        with patch('status.tcp._ssl_context', ssl.create_default_context(cafile=cert)):
+            first, second = self.check({}, {}, cert=cert, key=key)
+        self.assertEqual(first.status, 'Expired')
+        self.assertEqual(first.message, 'Certificate expired on 2020-02-01')
+        self.assertEqual(second.status, 'Expired')
+        self.assertTrue(second.message.endswith(', handshake cached'))
+
+    def test_not_after_from_der(self):
+        with open(self.cert) as f:
+            der = ssl.PEM_cert_to_DER_cert(f.read())
+        end_date = subprocess.run(['openssl', 'x509', '-in', self.cert, '-noout', '-enddate'],
+                                  check=True, capture_output=True, text=True).stdout
+        self.assertEqual(tcp.certificate_not_after(der), ssl.cert_time_to_seconds(end_date.strip().split('=')[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()